@@ -14,9 +14,11 @@ const AiInput = ({ onPromptGenerated, setLoading }) => {
     setLoading(true);
     try {
       // Send the custom input to the backend
-      const response = await api.post('/ai-prompt/custom', { 
+      const submitted = await api.post('/ai-prompt/custom', { 
         customInput: customPrompt.trim() 
       });
+      // The prompt is generated in the background; wait for the job to finish
+      const response = await api.waitForJob(submitted);
       
       // Handle the response
       if (response && response.prompt) {
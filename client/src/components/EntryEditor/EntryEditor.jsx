@@ -1,8 +1,9 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useLocation, useNavigate } from 'react-router-dom';
 import ReactQuill from 'react-quill';
 import 'react-quill/dist/quill.snow.css';
 import { api } from '../../services/api';
+import { htmlDelta } from '../../services/textDelta';
 import './EntryEditor.css';
 import AiInput from '../AiInput/AiInput';
 import toast from 'react-hot-toast';
@@ -23,6 +24,8 @@ const EntryEditor = () => {
   const [loading, setLoading] = useState(true);
   const [aiLoading, setAiLoading] = useState(false);
   const [error, setError] = useState('');
+  // The body and version the server last stored; saves send edits against it
+  const saved = useRef(null);
 
   
   useEffect(() => {
@@ -37,6 +40,9 @@ const EntryEditor = () => {
         } else {
           const entryData = await api.get(`/entries/${entryId}`);
           setEntry(entryData);
+          if (entryData) {
+            saved.current = { version: entryData.version, text: entryData.main_text || '' };
+          }
           
           if (entryData.moods && entryData.moods.length > 0) {
             setMoods(entryData.moods);
@@ -46,8 +52,8 @@ const EntryEditor = () => {
         if (isNewEntry && requestedAiPrompt) {
           setAiLoading(true);
           try {
-            const promptResponse = await api.get('/ai-prompt');
-            setAiPrompt(promptResponse.prompt || 'What would you like to write about today?');
+            const promptResponse = await api.waitForJob(await api.get('/ai-prompt'));
+            setAiPrompt(promptResponse?.prompt || 'What would you like to write about today?');
           } catch (err) {
             console.error('Error fetching AI prompt:', err);
             setAiPrompt('What would you like to write about today?');
@@ -76,8 +82,8 @@ const EntryEditor = () => {
   const refreshAiPrompt = async () => {
     setAiLoading(true);
     try {
-      const promptResponse = await api.get('/ai-prompt');
-      setAiPrompt(promptResponse.prompt || 'What would you like to write about today?');
+      const promptResponse = await api.waitForJob(await api.get('/ai-prompt'));
+      setAiPrompt(promptResponse?.prompt || 'What would you like to write about today?');
     } catch (err) {
       console.error('Error refreshing AI prompt:', err);
     } finally {
@@ -89,16 +95,25 @@ const EntryEditor = () => {
     try {
       
       const titleToSave = values.entryTitle.trim() || 'Untitled Entry';
-      const requestData = {
-        title: titleToSave,
-        main_text: values.editorContent
-      };
+      const requestData = { title: titleToSave };
+      if (saved.current) {
+        // Send only what changed since the last save, and let the server refuse it
+        // (409) if someone else saved in between
+        requestData.base_version = saved.current.version;
+        const ops = htmlDelta(saved.current.text, values.editorContent);
+        if (ops.length) requestData.ops = ops;
+      } else {
+        requestData.main_text = values.editorContent;
+      }
 
       console.log('Sending PATCH request data:', requestData);
 
       
       const response = await api.patch(`/entries/${entryId}`, requestData);
       console.log('Response from API:', response);
+      if (response && saved.current) {
+        saved.current = { version: response.version, text: values.editorContent };
+      }
 
       toast.success('Entry saved successfully!');
 
@@ -108,7 +123,18 @@ const EntryEditor = () => {
       }, 700);
     } catch (err) {
       console.error('Error saving entry:', err);
-      toast.error('Failed to save entry. Please try again.');
+      if (err.status === 409) {
+        // Keep what is in the editor; saving again replaces the other version with it
+        try {
+          const latest = await api.get(`/entries/${entryId}`);
+          if (latest) saved.current = { version: latest.version, text: latest.main_text || '' };
+        } catch (reloadErr) {
+          console.error('Error reloading entry:', reloadErr);
+        }
+        toast.error('This entry was changed elsewhere. Save again to replace that version with yours.');
+      } else {
+        toast.error('Failed to save entry. Please try again.');
+      }
     } finally {
       setSubmitting(false);
     }
@@ -78,7 +78,11 @@ const handleResponse = async (response) => {
       throw new Error(errorData.error || 'CSRF token invalid or missing');
     }
 
-    throw new Error(errorData.error || `Request failed with status ${response.status}`);
+    // Keep the status and body so callers can tell e.g. a 409 version conflict apart
+    const error = new Error(errorData.error || `Request failed with status ${response.status}`);
+    error.status = response.status;
+    error.data = errorData;
+    throw error;
   }
 
   // Handle empty responses
@@ -210,6 +214,29 @@ export const api = {
       console.error(`DELETE ${endpoint} error:`, error);
       throw error;
     }
+  },
+
+  // Follow a 202 job response to its result, waiting Retry-After seconds between polls
+  async waitForJob(job) {
+    try {
+      while (job && job.status === 'pending' && job.poll_url) {
+        const response = await fetch(`${BASE}${job.poll_url}`, {
+          method: 'GET',
+          credentials: 'include',
+          headers: prepareHeaders('GET')
+        });
+        const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+        const polled = await handleResponse(response);
+        if (polled && polled.status === 'pending') {
+          await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+        }
+        job = polled && { ...polled, poll_url: job.poll_url };
+      }
+      return job;
+    } catch (error) {
+      console.error(`Polling ${job?.poll_url} error:`, error);
+      throw error;
+    }
   }
 };
 
@@ -0,0 +1,37 @@
+// client/src/services/textDelta.js
+
+// Ops turning `base` into `text` for PATCH /entries/<id> {base_version, ops}.
+// They edit the HTML string the server stored (server/utils/text_delta.py),
+// not Quill's document, so `base` must be the main_text the server last returned.
+// Offsets count UTF-16 code units, which is how JavaScript indexes strings.
+
+const isHighSurrogate = (code) => code >= 0xd800 && code <= 0xdbff;
+const isLowSurrogate = (code) => code >= 0xdc00 && code <= 0xdfff;
+
+export const htmlDelta = (base, text) => {
+  base = base || '';
+  text = text || '';
+
+  // One changed span: keep the common prefix and suffix, replace the middle
+  let prefix = 0;
+  const maxPrefix = Math.min(base.length, text.length);
+  while (prefix < maxPrefix && base[prefix] === text[prefix]) prefix++;
+  if (prefix > 0 && isHighSurrogate(base.charCodeAt(prefix - 1))) prefix--;
+
+  let suffix = 0;
+  const maxSuffix = maxPrefix - prefix;
+  while (
+    suffix < maxSuffix &&
+    base[base.length - 1 - suffix] === text[text.length - 1 - suffix]
+  ) suffix++;
+  if (suffix > 0 && isLowSurrogate(base.charCodeAt(base.length - suffix))) suffix--;
+
+  const deleted = base.length - prefix - suffix;
+  const inserted = text.slice(prefix, text.length - suffix);
+
+  const ops = [];
+  if (prefix) ops.push({ retain: prefix });
+  if (deleted) ops.push({ delete: deleted });
+  if (inserted) ops.push({ insert: inserted });
+  return deleted || inserted ? ops : [];
+};
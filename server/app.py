@@ -2,25 +2,29 @@
 from config import app, api, jwt
 from models import *
 from routes import Signup, Login, Logout, UserProfile, GoogleLogin, GoogleAuthorize, TokenRefresh, DeleteUser, UserStats, CsrfToken
+from routes.usersroute import UserExport
 # DeleteUser
 from routes.journalsroute import JournalsResource, JournalResource
-from routes.entriesroute import EntryResource, AiPromptResource,CustomAiPromptResource, JournalEntriesResource
-from routes.moodsroute import MoodsResource
+from routes.entriesroute import EntryResource, AiPromptResource,CustomAiPromptResource, AiPromptJobResource, JournalEntriesResource, EntrySearchResource, EntryRevisionsResource, EntryRevisionResource
+from routes.moodsroute import MoodsResource, MoodTrendResource
+from routes.batchroute import BatchResource
+from routes.importroute import ImportsResource, ImportJobResource
 import os
-from flask import jsonify, request
+import click
+from flask import jsonify
 from flask_jwt_extended import JWTManager
 from flask_jwt_extended.exceptions import CSRFError
+from utils.query_budget import init_query_budget
+from utils.request_log import init_request_logging
+from utils.metrics import init_metrics
+from utils.representation import init_json_representation
+from utils.static_assets import init_static_assets
 
-@app.before_request
-def log_request_info():
-    print(f"📥 {request.method} {request.path}")
-    print(f"Cookies: {request.cookies}")
-    print(f"Headers: {dict(request.headers)}")
-    if request.method != "GET":
-        try:
-            print(f"Body: {request.get_json()}")
-        except Exception as e:
-            print(f"Failed to parse JSON: {e}")
+init_query_budget(app)
+init_request_logging(app)
+init_json_representation(app, api)
+init_metrics(app, api)
+init_static_assets(app)
 
 
 @app.route("/")
@@ -34,6 +38,7 @@ api.add_resource(GoogleLogin, "/api/login/google", endpoint="google_login_api")
 api.add_resource(GoogleAuthorize, "/api/authorize", endpoint="google_authorize_api")
 api.add_resource(UserProfile, '/api/user/profile', endpoint="user_profile_api")
 api.add_resource(UserStats, '/api/user/stats', endpoint="user_stats_api")
+api.add_resource(UserExport, '/api/user/export', endpoint="user_export_api")
 api.add_resource(DeleteUser, '/api/user/delete', endpoint="delete_user_api")
 api.add_resource(CsrfToken, "/api/csrf-token")
 
@@ -42,17 +47,85 @@ api.add_resource(JournalsResource, '/api/journals', endpoint="journals_api")
 
 api.add_resource(EntryResource, '/api/entries', '/api/entries/<int:entry_id>', endpoint="entry_api")
 api.add_resource(JournalEntriesResource, '/api/journals/<int:journal_id>/entries', endpoint="journal_entries_api")
+api.add_resource(EntrySearchResource, '/api/search', endpoint="entry_search_api")
+api.add_resource(EntryRevisionsResource, '/api/entries/<int:entry_id>/revisions', endpoint="entry_revisions_api")
+api.add_resource(EntryRevisionResource, '/api/entries/<int:entry_id>/revisions/<int:version>', endpoint="entry_revision_api")
 
 api.add_resource(AiPromptResource, '/api/ai-prompt', endpoint="ai_prompt_api")
 api.add_resource(CustomAiPromptResource, '/api/ai-prompt/custom', endpoint="custom_ai_prompt_api")
+api.add_resource(AiPromptJobResource, '/api/ai-prompt/jobs/<string:job_id>', endpoint="ai_prompt_job_api")
 
 api.add_resource(MoodsResource, '/api/moods', endpoint="moods_api")
+api.add_resource(MoodTrendResource, '/api/moods/trend', endpoint="mood_trend_api")
 api.add_resource(TokenRefresh, '/api/refresh-token', endpoint="token_refresh_api")
 
+api.add_resource(BatchResource, '/api/batch', endpoint="batch_api")
+api.add_resource(ImportsResource, '/api/imports', endpoint="imports_api")
+api.add_resource(ImportJobResource, '/api/imports/<string:job_id>', endpoint="import_job_api")
+
+@app.cli.command("rebuild-stats")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user")
+def rebuild_stats(user_id):
+    """Backfill user_activity/activity_days and mood rollups from entries"""
+    user_ids = [user_id] if user_id else [row.id for row in db.session.query(User.id)]
+    for uid in user_ids:
+        UserActivity.rebuild(uid)
+        MoodDailyRollup.rebuild(uid)
+        db.session.commit()
+    print(f"Rebuilt stats for {len(user_ids)} user(s)")
+
+@app.cli.command("refill-prompts")
+@click.option("--context", default=None, help='Mood context such as "5,3"; defaults to every known context')
+def refill_prompts(context):
+    """Evict stale pooled prompts and top the pool up within the daily quota"""
+    from utils import prompt_pool
+
+    contexts = [context] if context is not None else prompt_pool.known_contexts()
+    added = sum(prompt_pool.refill(c) for c in contexts)
+    print(f"Added {added} prompt(s) across {len(contexts)} context(s)")
+
+@app.cli.command("rebuild-search")
+@click.option("--user-id", type=int, default=None, help="Only re-index this user's entries")
+def rebuild_search(user_id):
+    """Re-index entries for full-text search"""
+    from utils import search
+
+    search.ensure_index()
+    count = search.rebuild(user_id)
+    db.session.commit()
+    print(f"Indexed {count} entr{'y' if count == 1 else 'ies'}")
+
+@app.cli.command("prune-revisions")
+def prune_revisions():
+    """Thin entry revision history per the retention policy"""
+    from utils import revisions
+
+    removed = revisions.prune_all()
+    print(f"Removed {removed} revision(s)")
+
+@app.cli.command("prune-prompt-jobs")
+def prune_prompt_jobs():
+    """Delete AI prompt jobs that are past polling, for users who stopped asking"""
+    from utils import ai_prompts
+
+    removed = ai_prompts.prune()
+    db.session.commit()
+    print(f"Removed {removed} prompt job(s)")
+
+@app.cli.command("compress-static")
+def compress_static():
+    """Precompress the client build (.gz / .br siblings); run after `vite build`"""
+    from utils.static_assets import compress_build
+
+    written = compress_build(app.static_folder)
+    print(f"Wrote {written} compressed file(s) in {app.static_folder}")
+
 from seed import seed_moods_if_empty
+from utils.search import ensure_index as ensure_search_index
 
 with app.app_context():
     db.create_all()
+    ensure_search_index()
     seed_moods_if_empty()
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+"""
+Shared bootstrap for the benchmark scripts.
+
+Points the app at a throwaway SQLite database (unless DATABASE_URI is
+already set) so benchmarks never touch real data. Run from server/:
+
+    python -m benchmarks.<name>
+"""
+import os
+import tempfile
+import timeit
+
+os.environ.setdefault("DATABASE_URI", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-only-secret")
+
+from app import app  # noqa: E402  (creates tables + seeds moods)
+from config import db  # noqa: E402
+
+
+def best_of(fn, number, repeat=5):
+    """Best per-call time in microseconds"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def report(label, baseline_us, candidate_us):
+    print(f"{label:<32} mixin {baseline_us:10.1f} us   compiled {candidate_us:10.1f} us   x{baseline_us / candidate_us:5.1f}")
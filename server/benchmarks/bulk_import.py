@@ -0,0 +1,109 @@
+"""
+Throughput and peak Python memory of utils.importer against POST /api/entries.
+
+Imports NDJSON files of increasing size. Parsing and inserting hold one
+chunk of entries however big the file is; the peak still rises with the
+final stats rebuild, which holds one row per distinct entry day.
+
+    python -m benchmarks.bulk_import
+"""
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token, get_csrf_token
+
+from benchmarks._setup import app, db
+from models import Entry, ImportJob, Journal, User
+from utils import importer
+
+SIZES = (2000, 20000)
+PER_REQUEST = 300
+MOODS = ["😊", "😌", "😐", "😔", "🤔"]
+WORDS = "the morning light over the river felt quiet and I walked for an hour thinking about work".split()
+
+
+def write_export(count):
+    random.seed(count)
+    start = datetime(2015, 1, 1)
+    fd, path = tempfile.mkstemp(suffix=".ndjson")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for i in range(count):
+            body = "".join(f"<p>{' '.join(random.choices(WORDS, k=60))}</p>" for _ in range(4))
+            f.write(json.dumps({
+                "title": f"Entry {i}", "main_text": body,
+                "created_at": (start + timedelta(hours=6 * i)).isoformat(),
+                "moods": random.sample(MOODS, 2),
+            }) + "\n")
+    return path, os.path.getsize(path)
+
+
+def make_user(name):
+    user = User(username=name, email=f"{name}@example.com")
+    db.session.add(user)
+    db.session.flush()
+    journal = Journal(title=name, year=2024, user_id=user.id)
+    db.session.add(journal)
+    db.session.commit()
+    return user.id, journal.id
+
+
+def import_once(count, label, traced):
+    path, size = write_export(count)
+    job_id = f"bench-{label}-{count}"
+    with app.app_context():
+        user_id, journal_id = make_user(f"bench_{label}_{count}")
+        db.session.add(ImportJob(id=job_id, user_id=user_id, format="json"))
+        db.session.commit()
+
+    if traced:
+        tracemalloc.start()
+    started = time.perf_counter()
+    importer._run(job_id, path, journal_id)  #! inline instead of on the worker; removes the file when done
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if traced else None
+    tracemalloc.stop()
+
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        assert job.status == "done" and job.imported == count, job.to_dict()
+    return size, elapsed, peak
+
+
+def run_import(count):
+    size, elapsed, _ = import_once(count, "timed", traced=False)
+    _, _, peak = import_once(count, "traced", traced=True)  #! tracemalloc slows the run, so time it separately
+    print(f"  importer  {count:>6} entries ({size / 1024 / 1024:5.1f} MiB)  {elapsed:6.2f} s  "
+          f"{count / elapsed:8.0f} entries/s  peak {peak / 1024 / 1024:5.1f} MiB")
+
+
+def run_requests(count):
+    with app.app_context():
+        user_id, journal_id = make_user("bench_import_requests")
+        token = create_access_token(identity=str(user_id))
+        headers = {"X-CSRF-TOKEN": get_csrf_token(token)}
+    client = app.test_client()
+    client.set_cookie("access_token_cookie", token)
+    started = time.perf_counter()
+    for i in range(count):
+        response = client.post("/api/entries", json={"title": f"Entry {i}", "journal_id": journal_id, "mood_ids": [1, 2]},
+                               headers=headers)
+        assert response.status_code == 201
+    elapsed = time.perf_counter() - started
+    print(f"  POST /api/entries x{count:<5}                   {elapsed:6.2f} s  {count / elapsed:8.0f} entries/s")
+
+
+def main():
+    print(f"chunk size {importer.CHUNK_SIZE}")
+    for count in SIZES:
+        run_import(count)
+    run_requests(PER_REQUEST)
+    with app.app_context():
+        print(f"\n{Entry.query.count()} entries in the database")
+
+
+if __name__ == "__main__":
+    main()
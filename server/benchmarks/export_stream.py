@@ -0,0 +1,75 @@
+"""
+Peak Python memory and time of GET /api/user/export against building the
+same data with user.to_dict(), for accounts of increasing size.
+
+The NDJSON export's peak should stay flat as the account grows tenfold;
+the zip's grows by its central directory, about half a KiB per entry.
+
+    python -m benchmarks.export_stream
+"""
+import time
+import tracemalloc
+from flask_jwt_extended import create_access_token
+
+from benchmarks._setup import app, db
+from benchmarks.bulk_import import make_user, write_export
+from models import ImportJob, User
+from utils import importer
+
+SIZES = (2000, 20000)
+
+
+def build_account(count):
+    path, _ = write_export(count)
+    with app.app_context():
+        user_id, journal_id = make_user(f"bench_export_{count}")
+        db.session.add(ImportJob(id=f"bench-export-{count}", user_id=user_id, format="json"))
+        db.session.commit()
+    importer._run(f"bench-export-{count}", path, journal_id)
+    return user_id
+
+
+def traced(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def stream(client, url):
+    def consume():
+        response = client.get(url)
+        return sum(len(chunk) for chunk in response.response)  #! read chunk by chunk, never joined
+    return consume
+
+
+def to_dict(user_id):
+    def build():
+        with app.app_context():
+            return len(str(db.session.get(User, user_id).to_dict()))
+    return build
+
+
+def main():
+    print("(times include tracemalloc overhead)")
+    for count in SIZES:
+        user_id = build_account(count)
+        with app.app_context():
+            token = create_access_token(identity=str(user_id))
+        client = app.test_client()
+        client.set_cookie("access_token_cookie", token)
+        print(f"\n{count} entries")
+        for label, fn in (
+            ("user.to_dict()", to_dict(user_id)),
+            ("export ndjson", stream(client, "/api/user/export")),
+            ("export zip", stream(client, "/api/user/export?format=zip")),
+        ):
+            size, elapsed, peak = traced(fn)
+            print(f"  {label:<16} {elapsed:6.2f} s  {size / 1024 / 1024:6.1f} MiB out  peak {peak / 1024 / 1024:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Encode time and bytes on the wire for one journal with 1,000 entries.
+
+Compares flask_restful's stock output_json (stdlib json.dumps) with
+utils.representation (msgspec, then gzip or brotli), and times the whole
+GET /api/journals/<id>/entries request per Accept-Encoding.
+
+    python -m benchmarks.json_representation
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from flask_restful.representations.json import output_json as stock_output_json
+
+from benchmarks._setup import app, db, best_of
+from models import Entry, Journal, Mood, User
+from utils import representation
+from utils.serializers import dumps
+
+ENTRIES = 1000
+WORDS = "the morning light over the river felt quiet and I walked for an hour thinking about work".split()
+
+
+def build_journal():
+    user = User(username="bench_json", email="bench_json@example.com")
+    db.session.add(user)
+    db.session.flush()
+    journal = Journal(title="Bench json", year=2024, user_id=user.id)
+    db.session.add(journal)
+    moods = Mood.query.all()
+    random.seed(7)
+    start = datetime(2024, 1, 1)
+    for i in range(ENTRIES):
+        body = "".join(f"<p>{' '.join(random.choices(WORDS, k=60))}</p>" for _ in range(4))
+        entry = Entry(title=f"Entry {i}", main_text=body, created_at=start + timedelta(hours=i),
+                      updated_at=start + timedelta(hours=i), ai_prompt_used=bool(i % 2))
+        entry.moods = random.sample(moods, 2)
+        journal.entries.append(entry)
+    db.session.commit()
+    return user.id, journal.id
+
+
+def main():
+    with app.app_context():
+        user_id, journal_id = build_journal()
+        token = create_access_token(identity=str(user_id))
+        data = {"entries": [entry.to_dict() for entry in db.session.get(Journal, journal_id).entries]}
+
+    raw = dumps(data)
+    print(f"{ENTRIES} entries, {len(raw) / 1024:.0f} KiB of JSON\n")
+
+    print("encode only")
+    print(f"  {'json.dumps':<28} {best_of(lambda: json.dumps(data).encode(), 5) / 1000:8.2f} ms")
+    print(f"  {'msgspec':<28} {best_of(lambda: dumps(data), 5) / 1000:8.2f} ms")
+    print(f"  {'msgspec + gzip':<28} {best_of(lambda: representation._gzip(dumps(data)), 5) / 1000:8.2f} ms")
+    if representation.brotli is not None:
+        print(f"  {'msgspec + brotli':<28} {best_of(lambda: representation._brotli(dumps(data)), 5) / 1000:8.2f} ms")
+
+    print("\nfull representation (in a request context)")
+    cases = [("stock output_json", stock_output_json, None), ("new, identity", representation.output_json, None),
+             ("new, gzip", representation.output_json, "gzip")]
+    if representation.brotli is not None:
+        cases.append(("new, br", representation.output_json, "br, gzip"))
+    for label, output, accept in cases:
+        headers = {"Accept-Encoding": accept} if accept else {}
+        with app.test_request_context(headers=headers):
+            size = len(output(data, 200).get_data())
+            per_call = best_of(lambda: output(data, 200), 5)
+        print(f"  {label:<28} {per_call / 1000:8.2f} ms {size / 1024:10.1f} KiB on the wire")
+
+    print(f"\nGET /api/journals/{journal_id}/entries")
+    client = app.test_client()
+    client.set_cookie("access_token_cookie", token)
+    for accept in (None, "gzip", "br, gzip"):
+        if accept == "br, gzip" and representation.brotli is None:
+            continue
+        headers = {"Accept-Encoding": accept} if accept else {}
+        response = client.get(f"/api/journals/{journal_id}/entries", headers=headers)
+        per_call = best_of(lambda: client.get(f"/api/journals/{journal_id}/entries", headers=headers), 3)
+        label = response.headers.get("Content-Encoding", "identity")
+        print(f"  {label:<28} {per_call / 1000:8.2f} ms {len(response.get_data()) / 1024:10.1f} KiB on the wire")
+
+
+if __name__ == "__main__":
+    main()
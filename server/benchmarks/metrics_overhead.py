@@ -0,0 +1,32 @@
+"""
+Per-request cost of the utils.metrics hooks.
+
+Times the before/after/teardown hooks directly inside a request context,
+so the number is the overhead METRICS_ENABLED=1 adds to every request.
+
+    python -m benchmarks.metrics_overhead
+"""
+from flask import Response
+
+from benchmarks._setup import app, best_of
+from utils import metrics
+
+
+def main():
+    response = Response(status=200)
+    with app.test_request_context("/api/journals"):
+        def one_request():
+            metrics._start_request()
+            metrics.add_serialize_time(0.0001)
+            metrics._record(response)
+            metrics._finish_request()
+
+        per_request = best_of(one_request, 20000)
+        per_render = best_of(metrics.render, 200)
+
+    print(f"{'hooks per request':<32} {per_request:10.2f} us")
+    print(f"{'render /metrics':<32} {per_render:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
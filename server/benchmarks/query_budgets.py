@@ -0,0 +1,146 @@
+"""
+Query-budget check for every @query_budget route.
+
+Runs with QUERY_BUDGET_STRICT on, seeds one user with N entries (each
+with moods) across a few journals, and calls every budgeted resource
+method through the test client, including its unpaged, expanded,
+paginated and filtered forms. The default N is above selectinload's
+500-key IN chunks, so a route whose query count grows with the account
+fails here. Exits 1 if a call's X-Query-Count is over the method's budget,
+the call comes back as the budget 500 or any other error, or a budgeted
+method isn't driven at all. Run from server/:
+
+    python -m benchmarks.query_budgets [--entries 1200] [-v]
+"""
+import argparse
+import inspect
+import os
+import sys
+from datetime import datetime, timedelta
+
+#! read by config at import
+os.environ["QUERY_BUDGET_STRICT"] = "1"
+
+from benchmarks._setup import app, db  # noqa: E402
+from benchmarks.query_plans import Session  # noqa: E402
+from models import Entry, EntryMood, Journal, Mood, MoodDailyRollup, User, UserActivity  # noqa: E402
+from utils import revisions, search  # noqa: E402
+
+PASSWORD = "Budget-check-1!"
+JOURNALS = 3
+
+
+def seed(entries):
+    mood_ids = [mood.id for mood in Mood.query.order_by(Mood.id).limit(5)]
+    user = User(username="budgets", email="budgets@example.com")
+    user.set_password(PASSWORD)
+    db.session.add(user)
+    db.session.flush()
+    journal_ids = []
+    for j in range(JOURNALS):
+        journal = Journal(title=f"budgets {j}", year=2024, user_id=user.id)
+        db.session.add(journal)
+        db.session.flush()
+        journal_ids.append(journal.id)
+
+    rows = []
+    for e in range(entries):
+        created = datetime(2024, 1, 1) + timedelta(hours=9 * e)
+        rows.append(Entry(title=f"entry {e}", main_text=f"<p>a walk by the river, day {e}</p>", created_at=created,
+                          updated_at=created, journal_id=journal_ids[e % JOURNALS], ai_prompt_used=False))
+    db.session.add_all(rows)
+    db.session.flush()
+    db.session.add_all(
+        EntryMood(entry_id=entry.id, mood_id=mood_ids[(e + k) % len(mood_ids)])
+        for e, entry in enumerate(rows) for k in range(2)
+    )
+    db.session.commit()
+
+    search.rebuild()
+    UserActivity.rebuild(user.id)
+    MoodDailyRollup.rebuild(user.id)
+    revisions.record(rows[0].id)
+    db.session.commit()
+    return user.id, journal_ids, rows[0].id, mood_ids
+
+
+def budgeted():
+    """{(endpoint, METHOD): budget} for every resource method wearing @query_budget"""
+    found = {}
+    for endpoint, view in app.view_functions.items():
+        view_class = getattr(view, "view_class", None)
+        for name, method in inspect.getmembers(view_class or object, inspect.isfunction):
+            if hasattr(method, "query_budget"):
+                found[(endpoint, name.upper())] = method.query_budget
+    return found
+
+
+def calls(journal_ids, entry_id, mood_ids):
+    """(label, method, url, json) for each budgeted route in the forms clients use"""
+    journal_id = journal_ids[0]
+    return [
+        ("login", "POST", "/api/login", {"username": "budgets", "password": PASSWORD}),
+        ("profile", "GET", "/api/user/profile", None),
+        ("profile expanded", "GET", "/api/user/profile?expand=journals.entries", None),
+        ("journals", "GET", "/api/journals", None),
+        ("journals expanded", "GET", "/api/journals?expand=entries", None),
+        ("entries", "GET", "/api/entries", None),
+        ("entries page", "GET", "/api/entries?limit=20", None),
+        ("entries filtered", "GET", f"/api/entries?journal_id={journal_id}&start=2024-01-03&end=2024-02-09&limit=20", None),
+        ("entry", "GET", f"/api/entries/{entry_id}", None),
+        ("journal entries", "GET", f"/api/journals/{journal_id}/entries", None),
+        ("journal entries page", "GET", f"/api/journals/{journal_id}/entries?limit=20", None),
+        ("search", "GET", "/api/search?q=river", None),
+        ("search filtered", "GET", f"/api/search?q=river&journal_id={journal_id}&mood_id={mood_ids[0]}", None),
+        ("revisions", "GET", f"/api/entries/{entry_id}/revisions", None),
+        ("revision", "GET", f"/api/entries/{entry_id}/revisions/1", None),
+        ("mood trend", "GET", "/api/moods/trend", None),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=1200, help="entries to seed (default 1200)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every call, not just failures")
+    args = parser.parse_args()
+
+    with app.app_context():
+        user_id, journal_ids, entry_id, mood_ids = seed(args.entries)
+        session = Session(user_id)
+    budgets = budgeted()
+    urls = app.url_map.bind("")
+
+    failures, driven = [], set()
+    for label, method, url, body in calls(journal_ids, entry_id, mood_ids):
+        endpoint, _ = urls.match(url.split("?")[0], method)
+        key = (endpoint, method)
+        driven.add(key)
+        budget = budgets.get(key)
+
+        response = getattr(session, method.lower())(url, json=body)
+        count = response.headers.get("X-Query-Count")
+        line = f"{label:<22} {response.status_code}  {count} / {budget} queries"
+        data = response.get_json(silent=True)
+        if isinstance(data, dict) and data.get("error") == "Query budget exceeded":
+            failures.append(f"{line}  (budget exceeded)")
+        elif budget is None:
+            failures.append(f"{line}  ({endpoint} {method} has no @query_budget)")
+        elif count is None or int(count) > budget:
+            failures.append(f"{line}  (over budget)")
+        elif response.status_code >= 400:
+            failures.append(f"{line}  ({data})")
+        elif args.verbose:
+            print(line)
+
+    for endpoint, method in sorted(set(budgets) - driven):
+        failures.append(f"{endpoint} {method} has a budget of {budgets[endpoint, method]} but isn't driven")
+
+    print(f"\n{len(driven)} budgeted methods driven with {args.entries} entries")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
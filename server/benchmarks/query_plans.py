@@ -0,0 +1,196 @@
+"""
+Query-plan regression check for every route that touches user data.
+
+Seeds a throwaway SQLite database, drives each handler in entriesroute,
+journalsroute, moodsroute and usersroute through the test client and
+records every SELECT / UPDATE / DELETE they issue. Each distinct statement
+is then re-run under EXPLAIN QUERY PLAN with its captured parameters; the
+run fails (exit 1) if any plan walks a whole table or index (SCAN <table>)
+instead of searching it. Run from server/:
+
+    python -m benchmarks.query_plans [-v]
+
+Not driven: the Google OAuth routes (they need the live provider) and
+csrf-token / refresh-token, which run no SQL. The AI prompt routes only
+get as far as their config check.
+"""
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks._setup import app, db
+from flask_jwt_extended import create_access_token, get_csrf_token
+from sqlalchemy import event, inspect
+from models import Entry, EntryMood, Journal, Mood, MoodDailyRollup, User, UserActivity
+from routes.journalsroute import JournalResource
+from utils import search
+
+#! a full pass over these is expected: tiny static catalog / bookkeeping
+SCAN_ALLOWED = {"moods", "alembic_version"}
+
+#! "SCAN t" and "SCAN t USING [COVERING] INDEX ix" both read every row
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX \w+)?$")
+
+PASSWORD = "Plan-check-1!"
+
+
+def seed(users=3, journals=3, entries=20):
+    mood_ids = [mood.id for mood in Mood.query.order_by(Mood.id).limit(3)]
+    user_ids = []
+    for n in range(users):
+        user = User(username=f"plans{n}", email=f"plans{n}@example.com")
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.flush()
+        for j in range(journals):
+            journal = Journal(title=f"plans {n}-{j}", year=2024, user_id=user.id)
+            db.session.add(journal)
+            db.session.flush()
+            for e in range(entries):
+                created = datetime(2024, 1, 1) + timedelta(days=e, hours=j)
+                entry = Entry(title=f"entry {e}", main_text="<p>a walk by the river</p>", created_at=created,
+                              updated_at=created, journal_id=journal.id, ai_prompt_used=False)
+                db.session.add(entry)
+                db.session.flush()
+                db.session.add(EntryMood(entry_id=entry.id, mood_id=mood_ids[e % len(mood_ids)]))
+        user_ids.append(user.id)
+    db.session.commit()
+
+    search.rebuild()
+    for user_id in user_ids:
+        UserActivity.rebuild(user_id)
+        MoodDailyRollup.rebuild(user_id)
+    db.session.commit()
+    return user_ids, mood_ids
+
+
+class Session:
+    """Test client logged in as one user"""
+
+    def __init__(self, user_id):
+        self.token = create_access_token(identity=str(user_id))
+        self.headers = {"X-CSRF-TOKEN": get_csrf_token(self.token)}
+        self.client = app.test_client()
+        self.client.set_cookie("access_token_cookie", self.token)
+
+    def __getattr__(self, method):
+        call = getattr(self.client, method)
+        return lambda url, **kwargs: call(url, headers=self.headers, **kwargs)
+
+    def resource(self, method, *args, json=None):
+        """Call an unregistered Resource method inside a fake request"""
+        with app.test_request_context(method=method.upper(), json=json, headers={
+            **self.headers, "Cookie": f"access_token_cookie={self.token}",
+        }):
+            response = getattr(JournalResource(), method)(*args)
+        return type("Response", (), {"status_code": response[1]})
+
+
+def calls(user_ids, mood_ids):
+    """(label, thunk) for every handler, in an order that keeps data around"""
+    with app.app_context():
+        me, other = Session(user_ids[0]), Session(user_ids[1])
+        journals = [j.id for j in Journal.query.filter_by(user_id=user_ids[0]).order_by(Journal.id)]
+        entry_id = Entry.query.filter_by(journal_id=journals[0]).order_by(Entry.id).first().id
+    journal_id = journals[0]
+    anonymous = app.test_client()
+
+    def next_page():
+        cursor = me.get("/api/entries?limit=5").get_json()["next_cursor"]
+        return me.get(f"/api/entries?limit=5&cursor={cursor}")
+
+    return [
+        ("signup", lambda: anonymous.post("/api/signup", json={
+            "username": "plansnew", "email": "plansnew@example.com", "password": PASSWORD})),
+        ("login", lambda: anonymous.post("/api/login", json={"username": "plans0", "password": PASSWORD})),
+        ("profile", lambda: me.get("/api/user/profile")),
+        ("stats", lambda: me.get("/api/user/stats")),
+        ("journals", lambda: me.get("/api/journals")),
+        ("journals expanded", lambda: me.get("/api/journals?expand=entries")),
+        ("create journal", lambda: me.post("/api/journals", json={"title": "plans extra", "year": 2024})),
+        ("journal", lambda: me.resource("get", journal_id)),
+        ("update journal", lambda: me.resource("put", journal_id, json={"year": 2023})),
+        ("entries", lambda: me.get("/api/entries")),
+        ("entries page", lambda: me.get("/api/entries?limit=5")),
+        ("entries next page", next_page),
+        ("entries filtered", lambda: me.get(f"/api/entries?journal_id={journal_id}&start=2024-01-03&end=2024-01-09&limit=5")),
+        ("entry", lambda: me.get(f"/api/entries/{entry_id}")),
+        ("journal entries", lambda: me.get(f"/api/journals/{journal_id}/entries")),
+        ("journal entries page", lambda: me.get(f"/api/journals/{journal_id}/entries?limit=5")),
+        ("search", lambda: me.get(f"/api/search?q=river&journal_id={journal_id}&mood_id={mood_ids[0]}")),
+        ("moods", lambda: me.get("/api/moods")),
+        ("mood trend", lambda: me.get("/api/moods/trend")),
+        ("create entry", lambda: me.post("/api/entries", json={
+            "title": "new", "main_text": "<p>hi</p>", "journal_id": journal_id,
+            "mood_ids": mood_ids[:2], "ai_prompt_used": False})),
+        ("patch entry", lambda: me.patch(f"/api/entries/{entry_id}", json={"main_text": "<p>edited</p>"})),
+        ("put entry", lambda: me.put(f"/api/entries/{entry_id}", json={
+            "title": "put", "main_text": "<p>put</p>", "mood_ids": mood_ids[1:], "ai_prompt_used": False})),
+        ("revisions", lambda: me.get(f"/api/entries/{entry_id}/revisions?limit=5")),
+        ("revision", lambda: me.get(f"/api/entries/{entry_id}/revisions/1")),
+        ("delete entry", lambda: me.delete(f"/api/entries/{entry_id}")),
+        ("delete journal", lambda: me.resource("delete", journals[1])),
+        ("ai prompt", lambda: me.get("/api/ai-prompt")),
+        ("ai prompt job", lambda: me.get("/api/ai-prompt/jobs/0123456789abcdef0123456789abcdef")),
+        ("logout", lambda: me.post("/api/logout")),
+        ("delete user", lambda: other.delete("/api/user/delete")),
+    ]
+
+
+def explain(statement, parameters):
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan, not just failures")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if db.engine.dialect.name != "sqlite":
+            sys.exit("query_plans reads SQLite EXPLAIN QUERY PLAN output; unset DATABASE_URI")
+        tables = set(inspect(db.engine).get_table_names())
+        user_ids, mood_ids = seed()
+        engine = db.engine
+
+    captured = {}
+    label = [None]
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if label[0] and not executemany and verb in ("SELECT", "UPDATE", "DELETE"):
+            captured.setdefault(statement, (parameters, label[0]))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for label[0], call in calls(user_ids, mood_ids):
+            #! the statements a handler ran before failing still get checked
+            try:
+                status = call().status_code
+            except Exception as e:
+                status = f"raised {e!r}"
+            if args.verbose or not isinstance(status, int) or status >= 500:
+                print(f"{label[0]:<24} {status}")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    failures = 0
+    with app.app_context():
+        for statement, (parameters, route) in captured.items():
+            plan = explain(statement, parameters)
+            scans = [line for line in plan
+                     if (m := _FULL_SCAN.match(line)) and m.group(1) in tables and m.group(1) not in SCAN_ALLOWED]
+            failures += bool(scans)
+            if scans or args.verbose:
+                print(f"\n[{route}] {' '.join(statement.split())[:400]}")
+                for line in plan:
+                    print(f"  {'!!' if line in scans else '  '} {line}")
+
+    print(f"\n{len(captured)} distinct statements, {failures} with full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Concurrency stress test for utils.rate_limit.consume().
+
+Several worker processes (like gunicorn workers) hammer the same quotas on
+one shared database. The run fails unless exactly `limit` calls were let
+through for every quota, i.e. no increments were lost and none leaked.
+
+    python -m benchmarks.rate_limit_stress [--workers 8] [--calls 50]
+"""
+import argparse
+import multiprocessing
+import time
+
+from benchmarks._setup import app, db
+from models import RateLimitCounter
+from utils.rate_limit import consume, Quota, DAY
+
+QUOTAS = (
+    Quota("stress:user", 20, DAY, True, ""),
+    Quota("stress:global", 45, DAY, False, ""),
+)
+USERS = 4
+
+
+def worker(args):
+    worker_id, calls, now = args
+    allowed = {}
+    with app.app_context():
+        db.engine.dispose()  # never share pooled connections across fork()
+        for i in range(calls):
+            user_id = (worker_id + i) % USERS
+            if consume(QUOTAS, user_id, now=now) is None:
+                allowed[user_id] = allowed.get(user_id, 0) + 1
+    return allowed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    with app.app_context():
+        db.session.query(RateLimitCounter).delete()
+        db.session.commit()
+        db.engine.dispose()
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        results = pool.map(worker, [(w, args.calls, now) for w in range(args.workers)])
+    elapsed = time.perf_counter() - started
+
+    per_user = {}
+    for result in results:
+        for user_id, count in result.items():
+            per_user[user_id] = per_user.get(user_id, 0) + count
+    total = sum(per_user.values())
+    attempts = args.workers * args.calls
+
+    print(f"{attempts} attempts from {args.workers} workers in {elapsed:.2f}s "
+          f"({attempts / elapsed:.0f} consume/s), {total} allowed, per user {dict(sorted(per_user.items()))}")
+
+    user_quota, global_quota = QUOTAS
+    assert total == min(global_quota.limit, user_quota.limit * USERS), "global quota leaked or lost updates"
+    assert all(count <= user_quota.limit for count in per_user.values()), "per-user quota leaked"
+
+    with app.app_context():
+        stored = db.session.get(RateLimitCounter, (global_quota.name, now - now % global_quota.window)).count
+    assert stored == total, f"counter says {stored}, workers saw {total}"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Check that the text an overwrite replaced can be read back from an
+entry's revision history.
+
+Runs one editing session (two PATCHes inside REVISION_INTERVAL), waits
+out the interval, then overwrites the entry with a PUT. Both the last
+text of the session and the overwrite must be listed under
+/api/entries/<id>/revisions and load from /revisions/<version>; exits 1
+otherwise. Run from server/:
+
+    python -m benchmarks.revision_recovery
+"""
+import os
+import sys
+import time
+
+#! a short interval so the run doesn't sit out the default five minutes
+os.environ.setdefault("REVISION_INTERVAL_SECONDS", "2")
+
+from benchmarks._setup import app, db  # noqa: E402
+from flask_jwt_extended import create_access_token, get_csrf_token  # noqa: E402
+from models import Journal, User  # noqa: E402
+from utils import revisions  # noqa: E402
+
+SESSION_END = "<p>final text of session one</p>"
+OVERWRITE = "<p>overwritten</p>"
+
+
+def settle():
+    """Wait for the background revision thread to finish what was queued"""
+    deadline = time.monotonic() + 10
+    while revisions._pending and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def main():
+    with app.app_context():
+        user = User(username="revision_check", email="revision_check@example.com")
+        db.session.add(user)
+        db.session.flush()
+        journal = Journal(title="revision check", year=2024, user_id=user.id)
+        db.session.add(journal)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        headers = {"X-CSRF-TOKEN": get_csrf_token(token)}
+        journal_id = journal.id
+
+    client = app.test_client()
+    client.set_cookie("access_token_cookie", token)
+
+    created = client.post("/api/entries", json={"title": "draft", "journal_id": journal_id}, headers=headers)
+    assert created.status_code == 201, created.get_json()
+    entry_id = created.get_json()["id"]
+
+    for text in ("<p>draft one</p>", SESSION_END):
+        response = client.patch(f"/api/entries/{entry_id}", json={"main_text": text}, headers=headers)
+        assert response.status_code == 200, response.get_json()
+    settle()
+
+    time.sleep(revisions.REVISION_INTERVAL.total_seconds() + 0.5)
+    response = client.put(f"/api/entries/{entry_id}", json={"main_text": OVERWRITE}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    settle()
+
+    listed = client.get(f"/api/entries/{entry_id}/revisions").get_json()["revisions"]
+    texts = {}
+    for revision in listed:
+        texts[revision["version"]] = client.get(f"/api/entries/{entry_id}/revisions/{revision['version']}").get_json()["main_text"]
+    for version, text in sorted(texts.items()):
+        print(f"  v{version:<3} {text}")
+
+    missing = [text for text in (SESSION_END, OVERWRITE) if text not in texts.values()]
+    if missing:
+        print(f"FAIL: not recoverable from history: {', '.join(missing)}")
+        sys.exit(1)
+    print("OK: the text before the overwrite is recoverable")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compiled serializer plans vs sqlalchemy_serializer.SerializerMixin.
+
+    python -m benchmarks.serializers
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from sqlalchemy_serializer import SerializerMixin
+
+from benchmarks._setup import app, db, best_of, report
+from models import User, Journal, Entry, Mood
+from utils.serializers import serialize, dumps
+
+JOURNALS = 5
+ENTRIES_PER_JOURNAL = 200
+
+
+def build_user():
+    user = User(username="bench_user", email="bench@example.com")
+    db.session.add(user)
+    db.session.flush()
+
+    moods = Mood.query.all()
+    start = datetime(2024, 1, 1)
+    for j in range(JOURNALS):
+        journal = Journal(title=f"Bench journal {j}", year=2024, user_id=user.id)
+        db.session.add(journal)
+        for i in range(ENTRIES_PER_JOURNAL):
+            entry = Entry(
+                title=f"Entry {i}",
+                main_text="Lorem ipsum dolor sit amet. " * 40,
+                created_at=start + timedelta(hours=i),
+                updated_at=start + timedelta(hours=i, minutes=5),
+                ai_prompt_used=bool(i % 2),
+            )
+            entry.moods = random.sample(moods, 2)
+            journal.entries.append(entry)
+    db.session.commit()
+    return user
+
+
+def main():
+    with app.app_context():
+        user = build_user()
+        journal = user.journals[0]
+        entries = journal.entries
+        entry = entries[0]
+
+        #! make sure every relationship is loaded before timing
+        assert SerializerMixin.to_dict(user) == serialize(user)
+
+        cases = [
+            ("Entry (with moods)", lambda: SerializerMixin.to_dict(entry), lambda: serialize(entry), 2000),
+            (f"{len(entries)} entries", lambda: [SerializerMixin.to_dict(e) for e in entries],
+             lambda: [serialize(e) for e in entries], 5),
+            ("Journal (with entries)", lambda: SerializerMixin.to_dict(journal), lambda: serialize(journal), 5),
+            ("User (with journals)", lambda: SerializerMixin.to_dict(user), lambda: serialize(user), 2),
+        ]
+        for label, baseline, candidate, number in cases:
+            report(label, best_of(baseline, number), best_of(candidate, number))
+
+        data = serialize(user)
+        report("User -> JSON bytes", best_of(lambda: json.dumps(SerializerMixin.to_dict(user)).encode(), 2),
+               best_of(lambda: dumps(serialize(user)), 2))
+        print(f"payload: {len(dumps(data)) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+SQL gaps-and-islands streaks vs the old fetch-every-date Python walk.
+
+    python -m benchmarks.streaks
+"""
+import random
+from datetime import datetime, date, timedelta
+from sqlalchemy import func
+
+from benchmarks._setup import app, db, best_of
+from models import User, Journal, Entry, UserActivity
+from utils.streaks import compute_streaks
+
+ENTRY_DAYS = 12000
+
+
+def build_user():
+    user = User(username="streak_user", email="streaks@example.com")
+    db.session.add(user)
+    db.session.flush()
+    journal = Journal(title="Streaks", year=2024, user_id=user.id)
+    db.session.add(journal)
+    db.session.flush()
+
+    random.seed(7)
+    day = date.today() - timedelta(days=int(ENTRY_DAYS * 1.2))
+    rows = []
+    while len(rows) < ENTRY_DAYS:
+        #! mostly consecutive days with the occasional gap
+        day += timedelta(days=1 if random.random() < 0.9 else random.randint(2, 5))
+        created_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=9)
+        rows.append({
+            "title": "Entry", "main_text": "", "created_at": created_at, "updated_at": created_at,
+            "journal_id": journal.id, "ai_prompt_used": False,
+        })
+    db.session.execute(db.insert(Entry), rows)
+    UserActivity.rebuild(user.id)
+    db.session.commit()
+    return user.id
+
+
+def python_walk(user_id):
+    """What UserStats._calculate_streaks used to do"""
+    rows = db.session.query(func.date(Entry.created_at).label("entry_date")).join(Journal).filter(
+        Journal.user_id == user_id
+    ).group_by(func.date(Entry.created_at)).order_by(func.date(Entry.created_at)).all()
+    dates = [datetime.strptime(row.entry_date, "%Y-%m-%d").date() for row in rows]
+    longest = streak = 1
+    for i in range(1, len(dates)):
+        streak = streak + 1 if (dates[i] - dates[i - 1]).days == 1 else 1
+        longest = max(longest, streak)
+    current = 1
+    for i in range(len(dates) - 2, -1, -1):
+        if (dates[i + 1] - dates[i]).days != 1:
+            break
+        current += 1
+    return longest, current
+
+
+def main():
+    with app.app_context():
+        user_id = build_user()
+
+        legacy = python_walk(user_id)
+        from_entries = compute_streaks(db.session, UserActivity.entry_days(user_id))
+        from_days = compute_streaks(db.session, UserActivity.activity_days(user_id))
+        assert legacy == (from_entries["longest_streak"], from_entries["current_run"])
+        assert from_entries == from_days
+
+        print(f"{ENTRY_DAYS} entry days, longest {legacy[0]}, current run {legacy[1]}")
+        print(f"{'python walk over entries':<36} {best_of(lambda: python_walk(user_id), 3) / 1000:8.2f} ms")
+        print(f"{'SQL islands over entries':<36} "
+              f"{best_of(lambda: compute_streaks(db.session, UserActivity.entry_days(user_id)), 3) / 1000:8.2f} ms")
+        print(f"{'SQL islands over activity_days':<36} "
+              f"{best_of(lambda: compute_streaks(db.session, UserActivity.activity_days(user_id)), 3) / 1000:8.2f} ms")
+
+        def stats_read():
+            db.session.expire_all()  # force a real SELECT, not an identity-map hit
+            return db.session.get(UserActivity, user_id).to_stats()
+
+        print(f"{'UserStats read (primary key)':<36} {best_of(stats_read, 100) / 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
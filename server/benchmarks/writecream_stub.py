@@ -0,0 +1,135 @@
+"""
+Local Writecream stand-in for exercising the AI prompt job flow.
+
+Serve only (point the app's api_url at it):
+
+    python -m benchmarks.writecream_stub --serve [--port 8765] [--delay 3]
+
+Without --serve it starts the stub on a free port, then drives
+/api/ai-prompt through the test client and checks that the submit
+returns immediately, polling (202 with Retry-After while pending)
+delivers the stub's prompt, and a provider slower than the job timeout
+settles on a fallback.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_PROMPT = "What small thing did you notice today that you usually overlook?"
+
+
+def make_handler(delay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  #! keep-alive, like the real API
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(delay)
+            payload = json.dumps({"output": f"{STUB_PROMPT} ({body.get('tool_input', '')[:20]})"}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(port=0, delay=0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def drive(delay):
+    #! quotas are read at import; this run makes more calls than the burst allows
+    os.environ.setdefault("AI_BURST_LIMIT", "100")
+    from benchmarks._setup import app, db
+    from flask_jwt_extended import create_access_token, get_csrf_token
+    from models import User
+    from utils import ai_prompts
+
+    stub = start_stub(delay=delay)
+    os.environ.update(api_key="stub", tool_id="stub", api_url=f"http://127.0.0.1:{stub.server_port}/")
+
+    with app.app_context():
+        user = User.query.filter_by(username="stubuser").first()
+        if user is None:
+            user = User(username="stubuser", email="stub@example.com")
+            db.session.add(user)
+            db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        csrf = {"X-CSRF-TOKEN": get_csrf_token(token)}
+
+    client = app.test_client()
+    client.set_cookie("access_token_cookie", token)
+
+    started = time.perf_counter()
+    submitted = client.get("/api/ai-prompt")
+    submit_ms = (time.perf_counter() - started) * 1000
+    assert submitted.status_code == 202, submitted.get_json()
+    job = submitted.get_json()
+    print(f"submit              {submit_ms:8.1f} ms  -> {job['status']}")
+
+    while True:
+        polled = client.get(job["poll_url"])
+        if polled.status_code == 200:
+            break
+        time.sleep(0.1)
+    print(f"poll result         {(time.perf_counter() - started) * 1000:8.1f} ms  -> {polled.get_json()['prompt']!r}")
+    assert polled.get_json()["prompt"].startswith(STUB_PROMPT), polled.get_json()
+
+    pending = client.get(client.get("/api/ai-prompt").get_json()["poll_url"])
+    assert pending.status_code == 202 and pending.headers["Retry-After"] == "1", pending.headers
+    print("pending poll        202 with Retry-After: 1")
+
+    started = time.perf_counter()
+    custom = client.post("/api/ai-prompt/custom", json={"customInput": "rain"}, headers=csrf)
+    assert custom.status_code == 202 and "poll_url" in custom.get_json(), custom.get_json()
+    print(f"custom submit       {(time.perf_counter() - started) * 1000:8.1f} ms  -> {custom.get_json()['status']}")
+
+    stub.shutdown()
+    slow = start_stub(delay=ai_prompts.JOB_TIMEOUT.total_seconds() + 1)
+    os.environ["api_url"] = f"http://127.0.0.1:{slow.server_port}/"
+    original_timeout, ai_prompts.JOB_TIMEOUT = ai_prompts.JOB_TIMEOUT, timedelta(seconds=0.5)
+    try:
+        job = client.get("/api/ai-prompt").get_json()
+        time.sleep(0.6)
+        timed_out = client.get(job["poll_url"]).get_json()
+        assert timed_out["prompt"] in ai_prompts.FALLBACK_PROMPTS, timed_out
+        print(f"slow provider       fallback after timeout ({timed_out['note']})")
+    finally:
+        ai_prompts.JOB_TIMEOUT = original_timeout
+        slow.shutdown()
+    print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds the stub waits before answering")
+    args = parser.parse_args()
+
+    if args.serve:
+        stub = start_stub(args.port, args.delay)
+        print(f"Writecream stub on http://127.0.0.1:{stub.server_port}/ (delay {args.delay}s), Ctrl-C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            stub.shutdown()
+    else:
+        drive(args.delay)
+
+
+if __name__ == "__main__":
+    main()
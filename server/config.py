@@ -39,6 +39,17 @@ IS_PRODUCTION = os.getenv("FLASK_ENV") == "production" or os.getenv("NODE_ENV")
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "super-secret-key")
 app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URI")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+#! fail requests that run more SQL than their @query_budget allows (tests/dev)
+app.config["QUERY_BUDGET_STRICT"] = os.getenv("QUERY_BUDGET_STRICT") == "1"
+#! request log: share of ordinary requests logged; errors and slow ones always are
+app.config["REQUEST_LOG_SAMPLE_RATE"] = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "0.1"))
+app.config["REQUEST_LOG_SLOW_MS"] = float(os.getenv("REQUEST_LOG_SLOW_MS", "500"))
+app.config["REQUEST_LOG_VERBOSE"] = os.getenv("REQUEST_LOG_VERBOSE") == "1"
+#! Prometheus metrics at /metrics (opt-in); set METRICS_TOKEN to require a bearer token
+app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED") == "1"
+app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")
+#! JSON bodies at least this big are gzip/brotli compressed when the client accepts it
+app.config["RESPONSE_COMPRESS_MIN_BYTES"] = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
 
 # JWT config
 app.config.update({
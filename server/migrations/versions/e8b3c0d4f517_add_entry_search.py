@@ -0,0 +1,36 @@
+"""add entry_search full-text index (FTS5 on SQLite, tsvector on PostgreSQL)
+
+Revision ID: e8b3c0d4f517
+Revises: d2a7f6c9e081
+Create Date: 2026-10-18 14:41:09.378052
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b3c0d4f517'
+down_revision = 'd2a7f6c9e081'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    #! not autogenerated: the index is backend specific. Backfill with `flask rebuild-search`.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS entry_search ("
+            "entry_id INTEGER PRIMARY KEY REFERENCES entries(id) ON DELETE CASCADE, "
+            "title TEXT NOT NULL, body TEXT NOT NULL, document TSVECTOR NOT NULL)"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_entry_search_document ON entry_search USING GIN (document)")
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS entry_search USING fts5("
+            "title, body, tokenize='porter unicode61 remove_diacritics 2')"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS entry_search")
@@ -6,5 +6,12 @@ from .journal import Journal
 from .entry import Entry
 from .entry_mood import EntryMood
 from .OauthState import OAuthState
+from .user_activity import UserActivity, ActivityDay
+from .mood_rollup import MoodDailyRollup
+from .rate_limit import RateLimitCounter
+from .ai_prompt_job import AiPromptJob
+from .prompt_pool import PooledPrompt, SeenPrompt
+from .entry_revision import EntryRevision
+from .import_job import ImportJob
 
-__all__ = ["db", "User", "Mood", "Journal", "Entry", "EntryMood"]
\ No newline at end of file
+__all__ = ["db", "User", "Mood", "Journal", "Entry", "EntryMood", "UserActivity", "ActivityDay", "MoodDailyRollup"]
\ No newline at end of file
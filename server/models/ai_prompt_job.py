@@ -0,0 +1,22 @@
+from models import db
+from datetime import datetime
+
+
+class AiPromptJob(db.Model):
+    """A background Writecream call; any worker can answer polls for it"""
+    __tablename__ = "ai_prompt_jobs"
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = db.Column(db.String(10), nullable=False, default="pending")  #! pending | done
+    prompt = db.Column(db.Text, nullable=True)
+    note = db.Column(db.String, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == "done":
+            data["prompt"] = self.prompt
+            if self.note:
+                data["note"] = self.note
+        return data
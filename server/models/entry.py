@@ -1,18 +1,25 @@
 from models import db
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import validates
-from sqlalchemy_serializer import SerializerMixin
+from utils.serializers import CompiledSerializerMixin
 from sqlalchemy import DateTime
 
-class Entry(db.Model, SerializerMixin):
+class Entry(db.Model, CompiledSerializerMixin):
     __tablename__ = 'entries'
+    #! per-journal listings, keyset pages and date ranges all seek on this
+    __table_args__ = (db.Index("ix_entries_journal_id_created_at", "journal_id", "created_at", "id"),)
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String, unique=False, nullable=False, )
     main_text = db.Column(db.String, unique=False, nullable=True)
-    created_at = db.Column(db.DateTime)
+    #! NOT NULL so keyset pagination on (created_at, id) reaches every entry
+    created_at = db.Column(db.DateTime, nullable=False)
     updated_at = db.Column(db.DateTime)
     journal_id = db.Column(db.Integer, db.ForeignKey('journals.id'), nullable=False)
     ai_prompt_used = db.Column(db.Boolean)
+    #! bumped on every write; clients send it back as base_version to catch lost updates
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    #! writes run UPDATE ... WHERE version = <loaded> and raise StaleDataError if another won
+    __mapper_args__ = {"version_id_col": version}
     #! Relationships
     journal = db.relationship("Journal", back_populates="entries")
     moods = db.relationship("Mood", secondary="entry_moods", back_populates="entries", cascade="save-update, merge")
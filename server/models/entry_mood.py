@@ -5,5 +5,35 @@ class EntryMood(db.Model):
     __table_args__ = (db.UniqueConstraint("entry_id", "mood_id", name="unique_entry_mood"),)
     id = db.Column(db.Integer, primary_key=True)
     entry_id = db.Column(db.Integer, db.ForeignKey("entries.id", ondelete='CASCADE'), nullable=False)
-    mood_id = db.Column(db.Integer, db.ForeignKey("moods.id", ondelete='CASCADE'), nullable=False)
+    mood_id = db.Column(db.Integer, db.ForeignKey("moods.id", ondelete='CASCADE'), nullable=False, index=True)
 
+    @classmethod
+    def sync(cls, entry_id, mood_ids, current=None):
+        """
+        Make the entry's moods exactly `mood_ids` with at most one bulk
+        INSERT and one bulk DELETE. `current` may pass the already-known
+        mood ids to skip the lookup (e.g. empty for a brand new entry).
+        Returns (added, removed) as sets of mood ids.
+        """
+        desired = set(mood_ids)
+        if current is None:
+            current = {
+                row.mood_id for row in
+                db.session.query(cls.mood_id).filter(cls.entry_id == entry_id)
+            }
+        else:
+            current = set(current)
+
+        added = desired - current
+        removed = current - desired
+
+        if removed:
+            db.session.execute(
+                db.delete(cls).where(cls.entry_id == entry_id, cls.mood_id.in_(removed))
+            )
+        if added:
+            db.session.execute(
+                db.insert(cls),
+                [{"entry_id": entry_id, "mood_id": mood_id} for mood_id in sorted(added)]
+            )
+        return added, removed
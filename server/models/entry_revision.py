@@ -0,0 +1,28 @@
+from models import db
+from datetime import datetime
+from utils.serializers import CompiledSerializerMixin
+
+
+class EntryRevision(db.Model, CompiledSerializerMixin):
+    """
+    A past state of an entry. Snapshots hold the whole body; deltas hold
+    the edit from their snapshot (base_version), so any revision rebuilds
+    from at most two rows. `data` is zlib-compressed either way.
+    """
+    __tablename__ = "entry_revisions"
+    __table_args__ = (db.UniqueConstraint("entry_id", "version", name="unique_entry_revision"),)
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.Integer, db.ForeignKey("entries.id", ondelete="CASCADE"), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    base_version = db.Column(db.Integer, nullable=True)  #! None for snapshots
+    title = db.Column(db.String, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    text_length = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    #! Serializer: listings never touch `data`
+    serialize_only = ("version", "title", "text_length", "created_at")
+
+    @property
+    def is_snapshot(self):
+        return self.base_version is None
@@ -0,0 +1,30 @@
+from models import db
+from datetime import datetime
+import json
+
+
+class ImportJob(db.Model):
+    """A bulk entry import running in the background; polled for progress"""
+    __tablename__ = "import_jobs"
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = db.Column(db.String(10), nullable=False, default="pending")  #! pending | running | done | failed
+    format = db.Column(db.String(10), nullable=False)
+    rows_read = db.Column(db.Integer, nullable=False, default=0)
+    imported = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    #! JSON list of {"row", "error"}, capped; the counts above are exact
+    errors = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "rows_read": self.rows_read,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "errors": json.loads(self.errors) if self.errors else [],
+        }
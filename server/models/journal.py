@@ -2,15 +2,17 @@
 from models import db
 from datetime import datetime
 from sqlalchemy.orm import validates
-from sqlalchemy_serializer import SerializerMixin
+from utils.serializers import CompiledSerializerMixin
 
-class Journal(db.Model,SerializerMixin):
+class Journal(db.Model, CompiledSerializerMixin):
     __tablename__ = 'journals'
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(30), unique=True, nullable=False)
     year = db.Column(db.Integer, unique=False, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     color = db.Column(db.String(7), nullable=True, default="#E7E5E5") #! store hex color code
+    #! also touched when one of its entries is deleted, see utils.conditional
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
 
     #! Relationships
     user = db.relationship("User", back_populates="journals")
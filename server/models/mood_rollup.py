@@ -0,0 +1,124 @@
+from models import db
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from utils import upsert
+
+
+class MoodDailyRollup(db.Model):
+    """
+    Mood score aggregates per user, day and journal, updated whenever an
+    entry's moods change so the trend graph never scans entries.
+    """
+    __tablename__ = "mood_daily_rollups"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    journal_id = db.Column(db.Integer, db.ForeignKey("journals.id", ondelete="CASCADE"), primary_key=True, index=True)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    score_count = db.Column(db.Integer, nullable=False, default=0)
+    score_min = db.Column(db.Integer, nullable=True)
+    score_max = db.Column(db.Integer, nullable=True)
+
+    @classmethod
+    def _bucket(cls, user_id, journal_id, day):
+        return (cls.user_id == int(user_id), cls.journal_id == journal_id, cls.day == day)
+
+    @classmethod
+    def record(cls, user_id, entry, added_mood_ids=(), removed_mood_ids=()):
+        """
+        Fold an entry's mood changes into its day bucket. Call after the
+        entry_moods change is flushed. Additions are applied as deltas;
+        removals re-aggregate the one bucket, since min/max can't be undone.
+        """
+        if not added_mood_ids and not removed_mood_ids:
+            return
+        day = entry.created_at.date()
+
+        if removed_mood_ids:
+            cls.rebuild_bucket(user_id, entry.journal_id, day)
+            return
+
+        from utils.mood_catalog import get_catalog
+        by_id = get_catalog().by_id
+        scores = [by_id[mood_id]["score"] for mood_id in added_mood_ids]
+        low, high = min(scores), max(scores)
+
+        #! one statement, so two first entries of the same day can't both try to create the bucket
+        db.session.execute(
+            upsert.insert(cls)
+            .values(
+                user_id=int(user_id), journal_id=entry.journal_id, day=day,
+                score_sum=sum(scores), score_count=len(scores), score_min=low, score_max=high,
+            )
+            .on_conflict_do_update(
+                index_elements=[cls.user_id, cls.day, cls.journal_id],
+                set_={
+                    "score_sum": cls.score_sum + sum(scores),
+                    "score_count": cls.score_count + len(scores),
+                    "score_min": case((cls.score_min < low, cls.score_min), else_=low),
+                    "score_max": case((cls.score_max > high, cls.score_max), else_=high),
+                },
+            )
+        )
+
+    @classmethod
+    def rebuild_bucket(cls, user_id, journal_id, day):
+        from models import Entry, EntryMood, Mood
+
+        start = datetime.combine(day, datetime.min.time())
+        total, count, low, high = (
+            db.session.query(func.sum(Mood.score), func.count(Mood.score), func.min(Mood.score), func.max(Mood.score))
+            .select_from(Entry)
+            .join(EntryMood, EntryMood.entry_id == Entry.id)
+            .join(Mood, Mood.id == EntryMood.mood_id)
+            .filter(Entry.journal_id == journal_id, Entry.created_at >= start, Entry.created_at < start + timedelta(days=1))
+            .one()
+        )
+
+        if not count:
+            db.session.execute(db.delete(cls).where(*cls._bucket(user_id, journal_id, day)))
+            return
+        insert = upsert.insert(cls).values(
+            user_id=int(user_id), journal_id=journal_id, day=day,
+            score_sum=total, score_count=count, score_min=low, score_max=high,
+        )
+        db.session.execute(insert.on_conflict_do_update(
+            index_elements=[cls.user_id, cls.day, cls.journal_id],
+            set_={key: insert.excluded[key] for key in ("score_sum", "score_count", "score_min", "score_max")},
+        ))
+
+    @classmethod
+    def rebuild(cls, user_id):
+        """Recompute all of a user's buckets from entries (backfill)"""
+        from models import Journal, Entry, EntryMood, Mood
+        from utils.streaks import as_date
+
+        user_id = int(user_id)
+        day = func.date(Entry.created_at)
+        rows = (
+            db.session.query(
+                Entry.journal_id, day,
+                func.sum(Mood.score), func.count(Mood.score), func.min(Mood.score), func.max(Mood.score),
+            )
+            .join(Journal, Journal.id == Entry.journal_id)
+            .join(EntryMood, EntryMood.entry_id == Entry.id)
+            .join(Mood, Mood.id == EntryMood.mood_id)
+            .filter(Journal.user_id == user_id, Entry.created_at.isnot(None))
+            .group_by(Entry.journal_id, day)
+            .all()
+        )
+
+        db.session.execute(db.delete(cls).where(cls.user_id == user_id))
+        if rows:
+            db.session.execute(db.insert(cls), [
+                {"user_id": user_id, "journal_id": journal_id, "day": as_date(d),
+                 "score_sum": total, "score_count": count, "score_min": low, "score_max": high}
+                for journal_id, d, total, count, low, high in rows
+            ])
+
+    @classmethod
+    def forget_journal(cls, journal_id):
+        db.session.execute(db.delete(cls).where(cls.journal_id == journal_id))
+
+    @classmethod
+    def forget(cls, user_id):
+        db.session.execute(db.delete(cls).where(cls.user_id == user_id))
@@ -0,0 +1,22 @@
+from models import db
+from datetime import datetime
+
+
+class PooledPrompt(db.Model):
+    """A pre-generated Writecream prompt waiting to be served for a mood context"""
+    __tablename__ = "prompt_pool"
+    __table_args__ = (db.UniqueConstraint("context", "prompt_hash", name="unique_context_prompt"),)
+    id = db.Column(db.Integer, primary_key=True)
+    context = db.Column(db.String(32), nullable=False, index=True)  #! e.g. "5,4" - distinct recent mood scores
+    prompt = db.Column(db.Text, nullable=False)
+    prompt_hash = db.Column(db.String(64), nullable=False)
+    served_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+
+class SeenPrompt(db.Model):
+    """Prompts a user has been given, by hash, so pooled prompts never repeat"""
+    __tablename__ = "seen_prompts"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    prompt_hash = db.Column(db.String(64), primary_key=True)
+    seen_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
@@ -0,0 +1,10 @@
+from models import db
+
+
+class RateLimitCounter(db.Model):
+    """One fixed-window counter per quota key, shared by every worker"""
+    __tablename__ = "rate_limit_counters"
+    key = db.Column(db.String(128), primary_key=True)
+    window_start = db.Column(db.Integer, primary_key=True)  #! unix seconds
+    count = db.Column(db.Integer, nullable=False, default=0)
+    expires_at = db.Column(db.Integer, nullable=False, index=True)
@@ -1,14 +1,14 @@
 import re
 from models import db
-from config import bcrypt
+from config import app, bcrypt
 from sqlalchemy.orm import validates
 from better_profanity import profanity
-from sqlalchemy_serializer import SerializerMixin
+from utils.serializers import CompiledSerializerMixin
 import time
-import requests
 import os
+from utils.http_client import upstream
 
-class User(db.Model, SerializerMixin):
+class User(db.Model, CompiledSerializerMixin):
     __tablename__ = 'users'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -105,9 +105,9 @@ class User(db.Model, SerializerMixin):
         }
         
         try:
-            token_response = requests.post(token_url, data=refresh_data)
+            token_response = upstream("google").post(token_url, data=refresh_data)
             if token_response.status_code != 200:
-                print(f"Refresh token error: {token_response.text}")
+                app.logger.warning(f"Refresh token error: {token_response.status_code}")
                 return False
                 
             token_json = token_response.json()
@@ -121,5 +121,5 @@ class User(db.Model, SerializerMixin):
             db.session.commit()
             return True
         except Exception as e:
-            print(f"Error refreshing Google token: {str(e)}")
+            app.logger.error(f"Error refreshing Google token: {str(e)}")
             return False
\ No newline at end of file
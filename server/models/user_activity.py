@@ -0,0 +1,224 @@
+from models import db
+from datetime import date, timedelta
+from sqlalchemy import case, func, select
+from utils import upsert
+from utils.streaks import compute_streaks, as_date
+
+
+class ActivityDay(db.Model):
+    """How many entries a user has on each day they wrote"""
+    __tablename__ = "activity_days"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UserActivity(db.Model):
+    """
+    Per-user dashboard counters, kept current as journals and entries are
+    created or deleted so UserStats is a primary-key read.
+
+    `current_run` is the streak ending on `last_active_date`; it only counts
+    as the current streak while that date is today or yesterday.
+
+    Counters move with `col = col + n` in SQL and rows are created with
+    INSERT ... ON CONFLICT, so concurrent saves neither lose increments
+    nor collide on the primary key.
+    """
+    __tablename__ = "user_activity"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    journal_count = db.Column(db.Integer, nullable=False, default=0)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    current_run = db.Column(db.Integer, nullable=False, default=0)
+    last_active_date = db.Column(db.Date, nullable=True)
+
+    def to_stats(self, today=None):
+        today = today or date.today()
+        is_current = self.last_active_date is not None and self.last_active_date >= today - timedelta(days=1)
+        return {
+            "journal_count": self.journal_count,
+            "entry_count": self.entry_count,
+            "longest_streak": self.longest_streak,
+            "current_streak": self.current_run if is_current else 0,
+        }
+
+    #! Loading / rebuilding
+
+    @classmethod
+    def for_user(cls, user_id):
+        """The user's row, backfilled from journals/entries on first use"""
+        return cls._load(user_id)[0]
+
+    @classmethod
+    def _load(cls, user_id):
+        activity = db.session.get(cls, int(user_id))
+        if activity is None:
+            return cls.rebuild(user_id), True
+        return activity, False
+
+    @classmethod
+    def rebuild(cls, user_id):
+        """Recompute every counter and the per-day table from scratch"""
+        from models import Journal, Entry
+
+        user_id = int(user_id)
+        day_counts = (
+            db.session.query(func.date(Entry.created_at), func.count(Entry.id))
+            .join(Journal)
+            .filter(Journal.user_id == user_id, Entry.created_at.isnot(None))
+            .group_by(func.date(Entry.created_at))
+            .all()
+        )
+
+        db.session.execute(db.delete(ActivityDay).where(ActivityDay.user_id == user_id))
+        rows = [
+            {"user_id": user_id, "day": as_date(day), "entry_count": count}
+            for day, count in day_counts
+        ]
+        if rows:
+            #! a concurrent rebuild may have inserted the same days
+            insert = upsert.insert(ActivityDay)
+            db.session.execute(
+                insert.on_conflict_do_update(
+                    index_elements=[ActivityDay.user_id, ActivityDay.day],
+                    set_={"entry_count": insert.excluded.entry_count},
+                ),
+                rows,
+            )
+
+        db.session.execute(upsert.insert(cls).values(user_id=user_id).on_conflict_do_nothing())
+        activity = db.session.get(cls, user_id)
+
+        activity.journal_count = Journal.query.filter_by(user_id=user_id).count()
+        activity.entry_count = (
+            db.session.query(func.count(Entry.id)).join(Journal).filter(Journal.user_id == user_id).scalar() or 0
+        )
+        activity._recompute_streaks()
+        return activity
+
+    def _recompute_streaks(self):
+        streaks = compute_streaks(db.session, self.activity_days(self.user_id))
+        self.longest_streak = streaks["longest_streak"]
+        self.current_run = streaks["current_run"]
+        self.last_active_date = streaks["last_active_date"]
+
+    @staticmethod
+    def activity_days(user_id):
+        return select(ActivityDay.day.label("day")).where(
+            ActivityDay.user_id == user_id, ActivityDay.entry_count > 0
+        )
+
+    @staticmethod
+    def entry_days(user_id):
+        """Distinct entry dates straight from entries, for audits/benchmarks"""
+        from models import Journal, Entry
+
+        return (
+            select(func.date(Entry.created_at).label("day"))
+            .join(Journal, Entry.journal_id == Journal.id)
+            .where(Journal.user_id == user_id, Entry.created_at.isnot(None))
+            .distinct()
+        )
+
+    #! Incremental updates: call after the change is flushed, before commit.
+    #! A user without a row yet gets rebuilt, which already sees the change.
+
+    def _update(self, *where, **values):
+        """UPDATE this row in SQL (the in-memory object is synchronized); returns rows matched"""
+        return db.session.execute(
+            db.update(UserActivity).where(UserActivity.user_id == self.user_id, *where).values(**values)
+        ).rowcount
+
+    @staticmethod
+    def _decrement(column, by):
+        return case((column > by, column - by), else_=0)
+
+    @classmethod
+    def journal_created(cls, user_id):
+        activity, rebuilt = cls._load(user_id)
+        if not rebuilt:
+            activity._update(journal_count=cls.journal_count + 1)
+
+    @classmethod
+    def journal_deleted(cls, user_id, entry_dates):
+        activity, rebuilt = cls._load(user_id)
+        if not rebuilt:
+            activity._update(journal_count=cls._decrement(cls.journal_count, 1))
+            activity._remove_entries(entry_dates)
+
+    @classmethod
+    def entry_created(cls, user_id, created_at):
+        activity, rebuilt = cls._load(user_id)
+        if rebuilt:
+            return
+        activity._update(entry_count=cls.entry_count + 1)
+        day = created_at.date()
+
+        #! RETURNING tells whether this entry opened the day, even when two saves race
+        day_count = db.session.execute(
+            upsert.insert(ActivityDay)
+            .values(user_id=activity.user_id, day=day, entry_count=1)
+            .on_conflict_do_update(
+                index_elements=[ActivityDay.user_id, ActivityDay.day],
+                set_={"entry_count": ActivityDay.entry_count + 1},
+            )
+            .returning(ActivityDay.entry_count)
+        ).scalar()
+        if day_count > 1:
+            return  # not a new day, streaks are unchanged
+
+        last = activity.last_active_date
+        if last is not None and day <= last:
+            #! backdated entry may bridge two older runs
+            db.session.flush()
+            activity._recompute_streaks()
+            return
+        run = cls.current_run + 1 if last is not None and day - last == timedelta(days=1) else 1
+        #! only move the streak from the state it was read in; a concurrent save that got there first means recount
+        moved = activity._update(
+            cls.last_active_date.is_(None) if last is None else cls.last_active_date == last,
+            current_run=run,
+            last_active_date=day,
+            longest_streak=case((cls.longest_streak < run, run), else_=cls.longest_streak),
+        )
+        if not moved:
+            activity._recompute_streaks()
+
+    @classmethod
+    def entries_deleted(cls, user_id, entry_dates):
+        activity, rebuilt = cls._load(user_id)
+        if not rebuilt:
+            activity._remove_entries(entry_dates)
+
+    def _remove_entries(self, entry_dates):
+        entry_dates = [d for d in entry_dates if d is not None]
+        if entry_dates:
+            self._update(entry_count=self._decrement(UserActivity.entry_count, len(entry_dates)))
+
+        per_day = {}
+        for created_at in entry_dates:
+            per_day[created_at.date()] = per_day.get(created_at.date(), 0) + 1
+
+        for day, count in per_day.items():
+            db.session.execute(
+                db.update(ActivityDay)
+                .where(ActivityDay.user_id == self.user_id, ActivityDay.day == day)
+                .values(entry_count=ActivityDay.entry_count - count)
+            )
+        if not per_day:
+            return
+
+        #! a day with no entries left can split a streak
+        emptied = db.session.execute(
+            db.delete(ActivityDay)
+            .where(ActivityDay.user_id == self.user_id, ActivityDay.entry_count <= 0)
+        ).rowcount
+        if emptied:
+            self._recompute_streaks()
+
+    @classmethod
+    def forget(cls, user_id):
+        db.session.execute(db.delete(ActivityDay).where(ActivityDay.user_id == user_id))
+        db.session.execute(db.delete(cls).where(cls.user_id == user_id))
+
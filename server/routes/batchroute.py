@@ -0,0 +1,166 @@
+from config import db, app
+from utils.after_commit import QUEUE
+from contextlib import contextmanager
+from flask import request, Response
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException, MethodNotAllowed, NotFound
+from werkzeug.test import EnvironBuilder
+import inspect
+import re
+
+MAX_OPERATIONS = 20
+#! endpoint names from app.py; everything else (auth, AI, deletes of the account) stays a normal request
+BATCHABLE = {"entry_api", "journals_api", "moods_api", "user_stats_api"}
+METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+#! conditional headers are the only ones a sub-operation may set
+FORWARDED_HEADERS = {"if-none-match", "if-modified-since"}
+#! "{0.id}" is the `id` field of operation 0's result
+_REFERENCE = re.compile(r"\{(\d+)\.(\w+)\}")
+
+
+class BatchError(ValueError):
+    pass
+
+
+@contextmanager
+def deferred_commits(session):
+    """
+    Within the block the handlers' commit() only flushes; the caller commits
+    or rolls back once. Yields the after_commit() calls the handlers queued,
+    to run after that commit.
+    """
+    session.commit = session.flush
+    session.info[QUEUE] = hooks = []
+    try:
+        yield hooks
+    finally:
+        del session.commit
+        session.info.pop(QUEUE, None)
+
+
+def _reference(results, index, field):
+    index = int(index)
+    if index >= len(results):
+        raise BatchError(f"{{{index}.{field}}} refers to an operation that has not run yet")
+    body = results[index]["body"]
+    if not isinstance(body, dict) or field not in body:
+        raise BatchError(f"Operation {index} has no field '{field}'")
+    return body[field]
+
+
+def _resolve(value, results):
+    """Substitute references in a path or body; a string that is only a reference keeps the value's type"""
+    if isinstance(value, str):
+        whole = _REFERENCE.fullmatch(value)
+        if whole:
+            return _reference(results, *whole.groups())
+        return _REFERENCE.sub(lambda m: str(_reference(results, *m.groups())), value)
+    if isinstance(value, dict):
+        return {key: _resolve(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, results) for item in value]
+    return value
+
+
+def _parse(operations):
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f"At most {MAX_OPERATIONS} operations per batch")
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or not isinstance(operation.get("path"), str):
+            raise BatchError(f"Operation {index} needs a path")
+        if str(operation.get("method", "GET")).upper() not in METHODS:
+            raise BatchError(f"Operation {index} has an unsupported method")
+        if not isinstance(operation.get("headers", {}), dict):
+            raise BatchError(f"Operation {index} headers must be an object")
+    return operations
+
+
+def _normalize(result):
+    """(status, body, headers) from whatever a Flask-RESTful handler returned"""
+    if isinstance(result, Response):
+        body = result.get_json(silent=True) if result.status_code != 304 else None
+        return result.status_code, body, dict(result.headers)
+    if isinstance(result, tuple):
+        body, status, headers = (result + (None, None))[:3]
+        return status or 200, body, dict(headers or {})
+    return 200, result, {}
+
+
+def _run(operation, results):
+    """Dispatch one operation to its resource method in a request context of its own"""
+    method = str(operation.get("method", "GET")).upper()
+    path, _, query_string = _resolve(operation["path"], results).partition("?")
+    body = _resolve(operation.get("body"), results)
+
+    try:
+        endpoint, view_args = app.url_map.bind("").match(path, method)
+    except (NotFound, MethodNotAllowed) as e:
+        return e.code, {"error": f"{method} {path} is not available"}, {}
+    if endpoint not in BATCHABLE:
+        return 400, {"error": f"{method} {path} cannot be batched"}, {}
+
+    headers = {
+        name: value for name, value in operation.get("headers", {}).items()
+        if name.lower() in FORWARDED_HEADERS
+    }
+    builder = EnvironBuilder(
+        path=path, method=method, query_string=query_string, headers=headers,
+        json=body if method != "GET" else None,
+    )
+    view_class = app.view_functions[endpoint].view_class
+    #! skip jwt_required / query_budget: the batch request already verified the token
+    handler = inspect.unwrap(getattr(view_class, method.lower()))
+    with app.request_context(builder.get_environ()):
+        try:
+            return _normalize(handler(view_class(), **view_args))
+        except HTTPException as e:
+            return e.code, {"error": e.description}, {}
+
+
+class BatchResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+        Run up to MAX_OPERATIONS entry / journal / mood / stats calls in order,
+        in one transaction: either every write commits or none does.
+        """
+        data = request.get_json(silent=True)
+        try:
+            operations = _parse(data.get("operations") if isinstance(data, dict) else None)
+        except BatchError as be:
+            return {"error": str(be)}, 400
+
+        results, failed = [], None
+        session = db.session()
+        try:
+            with deferred_commits(session) as hooks:
+                for index, operation in enumerate(operations):
+                    try:
+                        status, body, headers = _run(operation, results)
+                    except BatchError as be:
+                        status, body, headers = 400, {"error": str(be)}, {}
+                    result = {"status": status, "body": body}
+                    if "ETag" in headers:
+                        result["etag"] = headers["ETag"]
+                    results.append(result)
+                    if status >= 400:
+                        failed = index
+                        break
+            if failed is None:
+                db.session.commit()
+                #! e.g. revision recording: only now is there a committed state to read
+                for fn, args in hooks:
+                    fn(*args)
+            else:
+                db.session.rollback()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception(f"Error in POST batch: {str(e)}")
+            return {"error": f"Error running batch: {str(e)}"}, 500
+
+        for index in range(len(results), len(operations)):
+            results.append({"status": 424, "body": {"error": f"Not run: operation {failed} failed"}})
+        return {"committed": failed is None, "results": results}, 200
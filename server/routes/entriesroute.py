@@ -2,32 +2,55 @@ from config import db, api, app
 from flask import request, jsonify
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Entry, Journal, Mood, EntryMood
+from sqlalchemy.orm import selectinload, subqueryload
+from sqlalchemy.orm.exc import StaleDataError
+from models import Entry, Journal, EntryMood, UserActivity, MoodDailyRollup, AiPromptJob
+from utils.pagination import PaginationError, apply_entry_filters, is_paginated_request, paginate_entries, parse_limit
+from utils.query_budget import query_budget
+from utils.mood_catalog import valid_mood_ids
+from utils.rate_limit import consume, AI_PROMPT_QUOTAS
+from utils import ai_prompts, conditional, prompt_pool, revisions, search
+from utils.after_commit import after_commit
+from utils.text_delta import apply_delta
 from datetime import datetime
-import random
-import requests
-import json
-import os
-from datetime import date
-
-# Fallback prompts in case API fails
-FALLBACK_PROMPTS = [
-    "What was the most meaningful conversation you had today?",
-    "Describe a moment today that made you feel grateful.",
-    "What's something you learned or realized today?",
-    "If you could change one decision you made today, what would it be?",
-    "What's something that challenged you today and how did you handle it?"
-]
+
+def _version_conflict(entry_id):
+    version = db.session.query(Entry.version).filter(Entry.id == entry_id).scalar()
+    return {"error": "Entry was changed by another save; reload it and retry", "version": version}, 409
+
+
+def _is_stale(entry, data):
+    """True when the client sent a base_version that is no longer current; ValueError if it isn't an integer"""
+    base_version = data.get('base_version')
+    if base_version is None:
+        return False
+    #! "2" from a form field is fine; true/2.5 are not versions
+    if isinstance(base_version, bool) or isinstance(base_version, float) and not base_version.is_integer():
+        raise ValueError("base_version must be an integer")
+    try:
+        return int(base_version) != entry.version
+    except (TypeError, ValueError):
+        raise ValueError("base_version must be an integer")
+
 
 class EntryResource(Resource):
+    @query_budget(3)
     @jwt_required()
     def get(self, entry_id=None):
         try:
             current_user_id = get_jwt_identity()
 
             if entry_id:
+                state = conditional.entry_state(entry_id, current_user_id)
+                if state is None:
+                    return {"error": "Entry not found or access denied"}, 404
+                validators = conditional.Validators(*state)
+                if validators.not_modified():
+                    return validators.not_modified_response()
+
                 entry = (
                     Entry.query.join(Journal)
+                    .options(selectinload(Entry.moods))
                     .filter(Entry.id == entry_id, Journal.user_id == current_user_id)
                     .first()
                 )
@@ -35,20 +58,36 @@ class EntryResource(Resource):
                 if not entry:
                     return {"error": "Entry not found or access denied"}, 404
                 
-                return entry.to_dict(), 200
+                return entry.to_dict(), 200, validators.headers
             else:
-
-                entries = (
-                    Entry.query.join(Journal)
-                    .filter(Journal.user_id == current_user_id)
-                    .all()
-                )
+                state = conditional.user_state(current_user_id)
+                if state is None:
+                    return {"error": "User not found"}, 404
+                validators = conditional.Validators(*state)
+                if validators.not_modified():
+                    return validators.not_modified_response()
+
+                query = Entry.query.join(Journal).filter(Journal.user_id == current_user_id)
+                query = apply_entry_filters(query, request.args)
+
+                #! ?limit= / ?cursor= opt into keyset pages
+                if is_paginated_request(request.args):
+                    entries, next_cursor = paginate_entries(query.options(selectinload(Entry.moods)), request.args)
+                    return {
+                        "entries": [entry.to_dict() for entry in entries],
+                        "next_cursor": next_cursor
+                    }, 200, validators.headers
+
+                #! unpaged: selectinload would send one IN query per 500 entries; this is one query for all
+                entries = query.options(subqueryload(Entry.moods)).all()
                 
                 if not entries:
                     return {"message": "No entries found"}, 404
                 
-                return [entry.to_dict() for entry in entries], 200
+                return [entry.to_dict() for entry in entries], 200, validators.headers
 
+        except PaginationError as pe:
+            return {"error": str(pe)}, 400
         except Exception as e:
             return {"error": f"An error occurred while fetching entries: {str(e)}"}, 500
         
@@ -84,15 +123,11 @@ class EntryResource(Resource):
             db.session.add(new_entry)
             db.session.flush()
             
-            # Associate moods with the entry
-            for mood_id in mood_ids:
-                # Verify the mood exists
-                mood = Mood.query.get(mood_id)
-                if not mood:
-                    continue
-                
-                entry_mood = EntryMood(entry_id=new_entry.id, mood_id=mood_id)
-                db.session.add(entry_mood)
+            # Associate moods with the entry (unknown mood ids are skipped)
+            added, _ = EntryMood.sync(new_entry.id, valid_mood_ids(mood_ids), current=())
+            UserActivity.entry_created(current_user_id, new_entry.created_at)
+            MoodDailyRollup.record(current_user_id, new_entry, added)
+            search.index_entry(new_entry)
             
             db.session.commit()
             return new_entry.to_dict(), 201
@@ -118,9 +153,19 @@ class EntryResource(Resource):
             
             if not entry:
                 return {"error": "Entry not found or access denied"}, 404
+
+            if _is_stale(entry, data):
+                return _version_conflict(entry.id)
+            before = revisions.state(entry)
             
             #! Only update fields that are present in the request
-            if 'main_text' in data:
+            #! the editor sends {"base_version", "ops"}: string edits to the stored HTML, not the whole body
+            if 'ops' in data:
+                if data.get('base_version') is None:
+                    return {"error": "base_version is required with ops"}, 400
+                entry.main_text = apply_delta(entry.main_text, data['ops'])
+                entry.updated_at = datetime.now()
+            elif 'main_text' in data:
                 entry.main_text = data['main_text']
                 entry.updated_at = datetime.now()
                 
@@ -128,10 +173,23 @@ class EntryResource(Resource):
             if 'title' in data:
                 entry.title = data['title']
                 entry.updated_at = datetime.now()
-            
+
+            if 'ops' in data or 'main_text' in data or 'title' in data:
+                search.index_entry(entry)
+
             db.session.commit()
+            after_commit(revisions.note_saved, entry.id, before)
+            if 'ops' in data:
+                #! the client already holds the text; only the new version goes back
+                return entry.to_dict(only=("id", "version", "updated_at")), 200
             return entry.to_dict(), 200
-            
+
+        except ValueError as ve:  #! DeltaError, a bad base_version or a validator
+            db.session.rollback()
+            return {"error": str(ve)}, 400
+        except StaleDataError:
+            db.session.rollback()
+            return _version_conflict(entry_id)
         except Exception as e:
             db.session.rollback()
             return {"error": f"Error updating entry: {str(e)}"}, 500
@@ -150,9 +208,17 @@ class EntryResource(Resource):
             if not entry:
                 return {"error": "Entry not found or access denied"}, 404
                 
-            EntryMood.query.filter_by(entry_id=entry_id).delete()
-                
+            _, removed_moods = EntryMood.sync(entry.id, [])
+
+            created_at = entry.created_at
+            #! the journal's contents changed; keeps Last-Modified moving on deletes
+            db.session.execute(db.update(Journal).where(Journal.id == entry.journal_id).values(updated_at=datetime.now()))
+            search.remove_entry(entry.id)
+            revisions.remove_entry(entry.id)
             db.session.delete(entry)
+            db.session.flush()
+            UserActivity.entries_deleted(current_user_id, [created_at])
+            MoodDailyRollup.record(current_user_id, entry, (), removed_moods)
             db.session.commit()
                 
             return {"message": "Entry deleted successfully"}, 200
@@ -177,211 +243,207 @@ class EntryResource(Resource):
             if not entry:
                 return {"error": "Entry not found or access denied"}, 404
 
+            if _is_stale(entry, data):
+                return _version_conflict(entry.id)
+            before = revisions.state(entry)
+
             title = data.get('title', entry.title)
             main_text = data.get('main_text', entry.main_text)
             ai_prompt_used = data.get('ai_prompt_used', entry.ai_prompt_used)
-            mood_ids = data.get('mood_ids', [])
 
             entry.title = title
             entry.main_text = main_text
             entry.ai_prompt_used = ai_prompt_used
             entry.updated_at = datetime.now()  # Update the timestamp
 
-            EntryMood.query.filter_by(entry_id=entry_id).delete()
-            
-            for mood_id in mood_ids:
-                mood = Mood.query.get(mood_id)
-                if mood:
-                    entry_mood = EntryMood(entry_id=entry_id, mood_id=mood_id)
-                    db.session.add(entry_mood)
+            #! only touch entry_moods when the client actually sent moods,
+            #! and then only write the rows that changed
+            if 'mood_ids' in data:
+                added, removed = EntryMood.sync(entry.id, valid_mood_ids(data['mood_ids']))
+                MoodDailyRollup.record(current_user_id, entry, added, removed)
 
+            search.index_entry(entry)
             db.session.commit()
+            after_commit(revisions.note_saved, entry.id, before)
 
             return entry.to_dict(), 200
 
+        except ValueError as ve:
+            db.session.rollback()
+            return {"error": str(ve)}, 400
+        except StaleDataError:
+            db.session.rollback()
+            return _version_conflict(entry_id)
         except Exception as e:
             db.session.rollback()
             return {"error": f"Error updating entry: {str(e)}"}, 500
         
 
 class JournalEntriesResource(Resource):
+    @query_budget(3)
     @jwt_required()
     def get(self, journal_id):
         # Get the current user ID from the JWT
         current_user_id = get_jwt_identity()
 
         # Make sure the journal exists and belongs to the current user.
-        journal = Journal.query.filter_by(id=journal_id, user_id=current_user_id).first()
-        if not journal:
+        state = conditional.journal_state(journal_id, current_user_id)
+        if state is None:
             return {"error": "Journal not found"}, 404
+        validators = conditional.Validators(*state)
+        if validators.not_modified():
+            return validators.not_modified_response()
 
         # Query for entries that belong to the journal.
-        entries = Entry.query.filter_by(journal_id=journal_id).all()
+        try:
+            query = apply_entry_filters(Entry.query.filter_by(journal_id=journal_id), request.args)
+
+            if is_paginated_request(request.args):
+                entries, next_cursor = paginate_entries(query.options(selectinload(Entry.moods)), request.args)
+                return {
+                    "entries": [entry.to_dict() for entry in entries],
+                    "next_cursor": next_cursor
+                }, 200, validators.headers
+        except PaginationError as pe:
+            return {"error": str(pe)}, 400
+
+        #! one moods query however long the journal is (see EntryResource.get)
+        entries = query.options(subqueryload(Entry.moods)).all()
         if not entries:
             return {"message": "No entries found for this journal"}, 404
 
         # Convert each entry to a serializable dictionary
         entries_data = [entry.to_dict() for entry in entries]
-        return {"entries": entries_data}, 200
+        return {"entries": entries_data}, 200, validators.headers
+
+
+class EntrySearchResource(Resource):
+    @query_budget(3)
+    @jwt_required()
+    def get(self):
+        current_user_id = get_jwt_identity()
+        q = (request.args.get("q") or "").strip()
+        if not q:
+            return {"error": "q is required"}, 400
+
+        try:
+            hits, next_offset = search.search(current_user_id, q, request.args)
+        except PaginationError as pe:
+            return {"error": str(pe)}, 400
+
+        entries = {}
+        if hits:
+            entries = {
+                entry.id: entry
+                for entry in Entry.query.options(selectinload(Entry.moods))
+                .filter(Entry.id.in_([hit["entry_id"] for hit in hits]))
+            }
+        results = [
+            {**hit, "entry": entries[hit["entry_id"]].to_dict()}
+            for hit in hits if hit["entry_id"] in entries
+        ]
+        return {"results": results, "next_offset": next_offset}, 200
+
+
+def _owned_entry_id(entry_id, user_id):
+    return (
+        db.session.query(Entry.id).join(Journal)
+        .filter(Entry.id == entry_id, Journal.user_id == user_id)
+        .scalar()
+    )
+
+
+class EntryRevisionsResource(Resource):
+    @query_budget(2)
+    @jwt_required()
+    def get(self, entry_id):
+        """Newest first; ?limit= and ?before=<version> page back through history"""
+        if _owned_entry_id(entry_id, get_jwt_identity()) is None:
+            return {"error": "Entry not found or access denied"}, 404
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            before = request.args.get("before", type=int)
+        except PaginationError as pe:
+            return {"error": str(pe)}, 400
+
+        rows = revisions.list_revisions(entry_id, limit + 1, before)
+        next_before = rows[limit - 1].version if len(rows) > limit else None
+        return {"revisions": [row.to_dict() for row in rows[:limit]], "next_before": next_before}, 200
+
+
+class EntryRevisionResource(Resource):
+    @query_budget(3)
+    @jwt_required()
+    def get(self, entry_id, version):
+        if _owned_entry_id(entry_id, get_jwt_identity()) is None:
+            return {"error": "Entry not found or access denied"}, 404
+        revision, main_text = revisions.load(entry_id, version)
+        if revision is None:
+            return {"error": "Revision not found"}, 404
+        return {**revision.to_dict(), "main_text": main_text}, 200
 
 #!AI =============================================================== yay!
 
+def _start_prompt_job(current_user_id, tool_input, on_result=None):
+    """
+    Submit a prompt job. Missing config and exhausted quotas resolve the job
+    immediately with a fallback instead of calling Writecream.
+    `tool_input` is a callable so its queries only run for real calls.
+    """
+    config = ai_prompts.writecream_config()
+    if config is None:
+        app.logger.error("Writecream API configuration missing")
+        return ai_prompts.submit(
+            current_user_id, result=ai_prompts.fallback("Using fallback prompt due to missing API configuration")
+        )
+
+    #! upstream is failing: go straight to the fallback without spending quota
+    if not ai_prompts.writecream_available():
+        return ai_prompts.submit(
+            current_user_id, result=ai_prompts.fallback("Using fallback prompt due to API connectivity issues")
+        )
+
+    # Check rate limiting (global daily cap, per-user daily cap, burst)
+    try:
+        exhausted = consume(AI_PROMPT_QUOTAS, current_user_id)
+        if exhausted:
+            app.logger.warning(f"AI prompt quota exhausted: {exhausted.name}")
+            return ai_prompts.submit(current_user_id, result=ai_prompts.fallback(exhausted.note))
+    except Exception as e:
+        app.logger.error(f"Error handling usage tracking: {str(e)}")
+        # Continue execution even if tracking fails
+
+    return ai_prompts.submit(current_user_id, tool_input(), config, on_result=on_result)
+
+
+def _prompt_response(job):
+    """202 with a job to poll while Writecream works; 200 when the answer is already known"""
+    data = job.to_dict()
+    data["poll_url"] = f"/api/ai-prompt/jobs/{job.id}"
+    return data, 202 if job.status == "pending" else 200
+
+
 class AiPromptResource(Resource):
     @jwt_required()
     def get(self):
         try:
             current_user_id = get_jwt_identity()
-            
-            # Get Writecream API config
-            api_key = os.getenv("api_key")
-            tool_id = os.getenv("tool_id")
-            api_url = os.getenv("api_url")
-            
-            # Validate that API key is available
-            if not api_key or not tool_id:
-                app.logger.error("Writecream API configuration missing")
-                return {"prompt": random.choice(FALLBACK_PROMPTS), 
-                        "note": "Using fallback prompt due to missing API configuration"}, 200
-            
-            # Check rate limiting - keep this functionality
-            usage_file = "ai_prompt_usage.json"
-            today = date.today().isoformat()
-            
-            try:
-                if os.path.exists(usage_file):
-                    with open(usage_file, "r") as f:
-                        usage_data = json.load(f)
-                else:
-                    usage_data = {"date": today, "count": 0}
-                    
-                # Reset if it's a new day
-                if usage_data["date"] != today:
-                    usage_data = {"date": today, "count": 0}
-                    
-                # Check if we've hit the limit (45 requests per day)
-                if usage_data["count"] >= 45:
-                    app.logger.warning("Daily API limit reached")
-                    return {"prompt": random.choice(FALLBACK_PROMPTS),
-                            "note": "Using fallback prompt due to daily limit reached"}, 200
-                            
-                # Increment usage
-                usage_data["count"] += 1
-                
-                # Save updated usage
-                with open(usage_file, "w") as f:
-                    json.dump(usage_data, f)
-                    
-            except Exception as e:
-                app.logger.error(f"Error handling usage tracking: {str(e)}")
-                # Continue execution even if tracking fails
-            
-            # Get user's recent entries to generate contextual prompt
-            user_entries = (
-                Entry.query.join(Journal)
-                .filter(Journal.user_id == current_user_id)
-                .order_by(Entry.created_at.desc())
-                .limit(3)
-                .all()
-            )
-            
-            # Start with a strong base prompt
-            tool_input = "Give me a thought-provoking journaling prompt that encourages deep reflection"
-            
-            # Add mood context if entries exist
-            if user_entries:
-                moods = []
-                for entry in user_entries:
-                    for mood in entry.moods:
-                        moods.append(mood.name.lower())
-                
-                if moods:
-                    # Get unique moods
-                    unique_moods = list(set(moods))
-                    if len(unique_moods) > 0:
-                        mood_text = ", ".join(unique_moods[:3])  # Use up to 3 recent moods
-                        tool_input = f"Give me a thought-provoking journaling prompt for someone feeling {mood_text} that encourages deep reflection"
-            
-            app.logger.info(f"Making Writecream API request with input: {tool_input}")
-            
-            # Make API request to Writecream
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "key": api_key,
-                "tool_id": tool_id,
-                "tool_input": tool_input
-            }
-            
-            response = requests.post(
-                api_url,
-                headers=headers,
-                json=payload,
-                timeout=10  # Set a timeout to prevent hanging requests
+            context = ai_prompts.mood_context(current_user_id)
+
+            pooled = prompt_pool.take(current_user_id, context)
+            if pooled is not None:
+                return {"status": "done", "prompt": pooled}, 200
+
+            #! pool miss: go live, and keep the answer for other users with this context
+            job, _ = _start_prompt_job(
+                current_user_id,
+                lambda: ai_prompts.context_tool_input(context),
+                on_result=lambda prompt: prompt_pool.add(context, prompt, seen_by=current_user_id),
             )
-            
-            # Check if request was successful
-            if response.status_code == 200:
-                prompt_data = response.json()
-                app.logger.info(f"Received API response: {prompt_data}")
-                
-                try:
-                    # Extract the prompt from the response based on structure
-                    prompt = None
-                    
-                    # Try different ways to extract the prompt based on possible response formats
-                    if isinstance(prompt_data, str):
-                        prompt = prompt_data.strip()
-                    elif isinstance(prompt_data, dict):
-                        if "output" in prompt_data:
-                            prompt = prompt_data["output"].strip()
-                        elif "result" in prompt_data:
-                            prompt = prompt_data["result"].strip()
-                        elif "prompt" in prompt_data:
-                            prompt = prompt_data["prompt"].strip()
-                        elif "content" in prompt_data:
-                            prompt = prompt_data["content"].strip()
-                        elif "text" in prompt_data:
-                            prompt = prompt_data["text"].strip()
-                        # If none of the above keys exist, try to use the whole response
-                        else:
-                            prompt = str(prompt_data).strip()
-                    else:
-                        prompt = str(prompt_data).strip()
-                    
-                    # If we couldn't extract a prompt or it's too short, use a fallback
-                    if not prompt or len(prompt) < 10:
-                        app.logger.warning("Received empty or very short prompt from API")
-                        prompt = random.choice(FALLBACK_PROMPTS)
-                    
-                    # Ensure the prompt doesn't contain the default "What would you like to write about today?"
-                    if "what would you like to write about today" in prompt.lower():
-                        app.logger.warning("Received default prompt from API, using fallback")
-                        prompt = random.choice(FALLBACK_PROMPTS)
-                    
-                    return {"prompt": prompt}, 200
-                except Exception as e:
-                    app.logger.error(f"Error parsing API response: {str(e)}")
-                    prompt = random.choice(FALLBACK_PROMPTS)
-                    return {"prompt": prompt, "note": "Error parsing API response"}, 200
-            else:
-                # If API call fails, use a fallback prompt
-                app.logger.warning(f"API returned status code {response.status_code}")
-                prompt = random.choice(FALLBACK_PROMPTS)
-                return {"prompt": prompt, 
-                        "note": f"Using fallback prompt due to API response: {response.status_code}"}, 200
-                
-        except requests.exceptions.RequestException as e:
-            app.logger.error(f"Request exception when calling Writecream API: {str(e)}")
-            prompt = random.choice(FALLBACK_PROMPTS)
-            return {"prompt": prompt, "note": "Using fallback prompt due to API connectivity issues"}, 200
+            return _prompt_response(job)
         except Exception as e:
             app.logger.error(f"Error in AI Prompt generation: {str(e)}")
-            prompt = random.choice(FALLBACK_PROMPTS)
-            return {"prompt": prompt, "note": "Using fallback prompt due to an error"}, 200
-
-
+            return ai_prompts.fallback("Using fallback prompt due to an error"), 200
 
 
 class CustomAiPromptResource(Resource):
@@ -389,130 +451,29 @@ class CustomAiPromptResource(Resource):
     def post(self):
         try:
             current_user_id = get_jwt_identity()
-            
+
             # Get the request data
             request_data = request.get_json()
             if not request_data or 'customInput' not in request_data:
                 return {"error": "Custom input is required"}, 400
-                
-            custom_input = request_data['customInput']
-            
-            
-            api_key = os.getenv("api_key")
-            tool_id = os.getenv("tool_id")
-            api_url = os.getenv("api_url")
-            
-
-            if not api_key or not tool_id:
-                app.logger.error("Writecream API configuration missing")
-                return {"prompt": random.choice(FALLBACK_PROMPTS), 
-                        "note": "Using fallback prompt due to missing API configuration"}, 200
-            
-            usage_file = "ai_prompt_usage.json"
-            today = date.today().isoformat()
-            
-            try:
-                if os.path.exists(usage_file):
-                    with open(usage_file, "r") as f:
-                        usage_data = json.load(f)
-                else:
-                    usage_data = {"date": today, "count": 0}
-                    
-
-                if usage_data["date"] != today:
-                    usage_data = {"date": today, "count": 0}
-                    
-
-                if usage_data["count"] >= 45:
-                    app.logger.warning("Daily API limit reached")
-                    return {"prompt": random.choice(FALLBACK_PROMPTS),
-                            "note": "Using fallback prompt due to daily limit reached"}, 200
-                            
-
-                usage_data["count"] += 1
-
-                with open(usage_file, "w") as f:
-                    json.dump(usage_data, f)
-                    
-            except Exception as e:
-                app.logger.error(f"Error handling usage tracking: {str(e)}")
-
-            
- 
-            tool_input = f"Give me a thought-provoking journaling prompt about {custom_input} that encourages deep reflection"
-            
-            app.logger.info(f"Making Writecream API request with custom input: {tool_input}")
-            
-
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "key": api_key,
-                "tool_id": tool_id,
-                "tool_input": tool_input
-            }
-            
-            response = requests.post(
-                api_url,
-                headers=headers,
-                json=payload,
-                timeout=10  
-            )
-            
 
-            if response.status_code == 200:
-                prompt_data = response.json()
-                app.logger.info(f"Received API response: {prompt_data}")
-                
-                try:
-                    prompt = None
-                    
-                    if isinstance(prompt_data, str):
-                        prompt = prompt_data.strip()
-                    elif isinstance(prompt_data, dict):
-                        if "output" in prompt_data:
-                            prompt = prompt_data["output"].strip()
-                        elif "result" in prompt_data:
-                            prompt = prompt_data["result"].strip()
-                        elif "prompt" in prompt_data:
-                            prompt = prompt_data["prompt"].strip()
-                        elif "content" in prompt_data:
-                            prompt = prompt_data["content"].strip()
-                        elif "text" in prompt_data:
-                            prompt = prompt_data["text"].strip()
-                        else:
-                            prompt = str(prompt_data).strip()
-                    else:
-                        prompt = str(prompt_data).strip()
-                    
-
-                    if not prompt or len(prompt) < 10:
-                        app.logger.warning("Received empty or very short prompt from API")
-                        prompt = random.choice(FALLBACK_PROMPTS)
-                    
-                    if "what would you like to write about today" in prompt.lower():
-                        app.logger.warning("Received default prompt from API, using fallback")
-                        prompt = random.choice(FALLBACK_PROMPTS)
-                    
-                    return {"prompt": prompt}, 200
-                except Exception as e:
-                    app.logger.error(f"Error parsing API response: {str(e)}")
-                    prompt = random.choice(FALLBACK_PROMPTS)
-                    return {"prompt": prompt, "note": "Error parsing API response"}, 200
-            else:
-                #! If API call fails, use a fallback prompt
-                app.logger.warning(f"API returned status code {response.status_code}")
-                prompt = random.choice(FALLBACK_PROMPTS)
-                return {"prompt": prompt, 
-                        "note": f"Using fallback prompt due to API response: {response.status_code}"}, 200
-                
-        except requests.exceptions.RequestException as e:
-            app.logger.error(f"Request exception when calling Writecream API: {str(e)}")
-            prompt = random.choice(FALLBACK_PROMPTS)
-            return {"prompt": prompt, "note": "Using fallback prompt due to API connectivity issues"}, 200
+            custom_input = request_data['customInput']
+            job, _ = _start_prompt_job(current_user_id, lambda: ai_prompts.custom_tool_input(custom_input))
+            return _prompt_response(job)
         except Exception as e:
             app.logger.error(f"Error in Custom AI Prompt generation: {str(e)}")
-            prompt = random.choice(FALLBACK_PROMPTS)
-            return {"prompt": prompt, "note": "Using fallback prompt due to an error"}, 200
\ No newline at end of file
+            return ai_prompts.fallback("Using fallback prompt due to an error"), 200
+
+
+class AiPromptJobResource(Resource):
+    @jwt_required()
+    def get(self, job_id):
+        current_user_id = get_jwt_identity()
+        job = AiPromptJob.query.filter_by(id=job_id, user_id=int(current_user_id)).first()
+        if not job:
+            return {"error": "Job not found"}, 404
+
+        data = ai_prompts.poll(job)
+        if data["status"] == "pending":
+            return data, 202, {"Retry-After": "1"}
+        return data, 200
@@ -0,0 +1,58 @@
+from config import app
+from flask import request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import ImportJob, Journal
+from utils import importer
+import os
+
+
+class ImportsResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+        Start an import from a multipart `file` field or a raw request body.
+        ?format=json|csv|zip (default: from the file name) and ?journal_id=
+        for rows that don't name a journal. Answers 202 with a job to poll.
+        """
+        try:
+            current_user_id = int(get_jwt_identity())
+            upload = request.files.get("file")
+            filename = upload.filename if upload else request.args.get("filename", "")
+
+            format = importer.detect_format(request.values.get("format"), filename)
+            if format is None:
+                return {"error": f"format must be one of: {', '.join(importer.FORMATS)}"}, 400
+
+            journal_id = request.values.get("journal_id", type=int)
+            if journal_id is not None and not Journal.query.filter_by(id=journal_id, user_id=current_user_id).count():
+                return {"error": "Journal not found or access denied"}, 404
+
+            if importer.active_job(current_user_id):
+                return {"error": "An import is already running"}, 409
+
+            path = importer.spool(upload.stream if upload else request.stream, os.path.splitext(filename or "")[1])
+            if path is None:
+                return {"error": f"Imports are limited to {importer.MAX_UPLOAD_BYTES // (1024 * 1024)} MB"}, 413
+
+            job = importer.submit(current_user_id, path, format, journal_id)
+            data = job.to_dict()
+            data["poll_url"] = f"/api/imports/{job.id}"
+            return data, 202
+        except Exception as e:
+            app.logger.exception(f"Error starting import: {str(e)}")
+            return {"error": f"Error starting import: {str(e)}"}, 500
+
+
+class ImportJobResource(Resource):
+    @jwt_required()
+    def get(self, job_id):
+        current_user_id = get_jwt_identity()
+        job = ImportJob.query.filter_by(id=job_id, user_id=int(current_user_id)).first()
+        if not job:
+            return {"error": "Job not found"}, 404
+
+        data = job.to_dict()
+        if job.status in ("pending", "running"):
+            return data, 202, {"Retry-After": "1"}
+        return data, 200
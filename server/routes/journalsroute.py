@@ -1,42 +1,56 @@
-from config import db, api
+from config import db, api, app
 from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Journal
-import traceback
+from models import Journal, Entry, UserActivity, MoodDailyRollup
+from utils.projection import ProjectionError, projection_from_args, eager_loads
+from utils.query_budget import query_budget
+from utils import conditional, revisions, search
 
 class JournalsResource(Resource):
+    @query_budget(4)
     @jwt_required()
     def get(self):
         try:
             current_user_id = get_jwt_identity()
-            print(f"Current user ID: {current_user_id}")  # Debug log
             
-            journals = Journal.query.filter_by(user_id=current_user_id).all()
+            #! summaries by default, ?expand=entries for the full tree
+            only = projection_from_args(Journal, request.args)
+
+            state = conditional.user_state(current_user_id)
+            if state is None:
+                return {"error": "User not found"}, 404
+            validators = conditional.Validators(*state)
+            if validators.not_modified():
+                return validators.not_modified_response()
+
+            journals = (
+                Journal.query.options(*eager_loads(Journal, only))
+                .filter_by(user_id=current_user_id)
+                .all()
+            )
             if not journals:
                 return {"message": 'no journals found'}, 404
             
-            return [journal.to_dict() for journal in journals], 200
+            return [journal.to_dict(only=only) for journal in journals], 200, validators.headers
+        except ProjectionError as pe:
+            return {"error": str(pe)}, 400
         except Exception as e:
-            print(f"Error in GET journals: {str(e)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            app.logger.exception(f"Error in GET journals: {str(e)}")
             return {'error': f'An error occurred while fetching journals: {str(e)}'}, 500
         
     @jwt_required()
     def post(self):
         try:
-            print("POST /journals called")
             current_user_id = get_jwt_identity()
-            print(f"Current user ID: {current_user_id}")
 
             # Defensive: ensure JSON parsing doesn't blow up
             try:
                 data = request.get_json(force=True)
             except Exception as parse_error:
-                print(f"Failed to parse JSON: {parse_error}")
+                app.logger.info(f"Failed to parse JSON: {parse_error}")
                 return {"error": "Invalid JSON in request body"}, 400
 
-            print(f"Request data: {data}")
             if not isinstance(data, dict):
                 return {"error": "Malformed request data"}, 400
 
@@ -44,7 +58,6 @@ class JournalsResource(Resource):
             year = data.get("year")
             color = data.get("color", "#E7E5E5")
 
-            print(f"Parsed data - Title: {title}, Year: {year}, Color: {color}")
             if not title or not year:
                 return {"error": "Title and year are required"}, 400
 
@@ -54,18 +67,18 @@ class JournalsResource(Resource):
                 color=color,
                 user_id=current_user_id
             )
-            print(f"Created journal object: {new_journal}")
 
             db.session.add(new_journal)
+            db.session.flush()
+            UserActivity.journal_created(current_user_id)
             db.session.commit()
-            print("Journal saved successfully")
 
-            return new_journal.to_dict(), 201
+            return new_journal.to_dict(only=projection_from_args(Journal, request.args)), 201
 
+        except ProjectionError as pe:
+            return {"error": str(pe)}, 400
         except Exception as e:
-            print("🔥 Unhandled exception in POST /journals")
-            print(f"Exception: {str(e)}")
-            print(traceback.format_exc())
+            app.logger.exception(f"Unhandled exception in POST /journals: {str(e)}")
             return {"error": f"Server error while creating journal"}, 500
 
 class JournalResource(Resource):
@@ -80,7 +93,7 @@ class JournalResource(Resource):
             
             return journal.to_dict(), 200
         except Exception as e:
-            print(f"Error in GET journal: {str(e)}")
+            app.logger.error(f"Error in GET journal: {str(e)}")
             return {'error': f'An error occurred while fetching the journal: {str(e)}'}, 500
     
     @jwt_required()
@@ -106,7 +119,7 @@ class JournalResource(Resource):
             return journal.to_dict(), 200
         
         except Exception as e:
-            print(f"Error in PUT journal: {str(e)}")
+            app.logger.error(f"Error in PUT journal: {str(e)}")
             return {'error': f'Error updating journal: {str(e)}'}, 500
     
     @jwt_required()
@@ -118,11 +131,17 @@ class JournalResource(Resource):
             if not journal:
                 return {"error": "Journal not found"}, 404
             
+            entry_dates = [row.created_at for row in db.session.query(Entry.created_at).filter_by(journal_id=journal.id)]
+            search.remove_journal(journal.id)
+            revisions.remove_journal(journal.id)
             db.session.delete(journal)
+            db.session.flush()
+            UserActivity.journal_deleted(current_user_id, entry_dates)
+            MoodDailyRollup.forget_journal(journal.id)
             db.session.commit()
             
             return {"message": "Journal deleted successfully"}, 200
         
         except Exception as e:
-            print(f"Error in DELETE journal: {str(e)}")
+            app.logger.error(f"Error in DELETE journal: {str(e)}")
             return {'error': f'Error deleting journal: {str(e)}'}, 500
\ No newline at end of file
@@ -1,12 +1,93 @@
 from config import db, api
-from flask import request
+from flask import request, Response
 from flask_restful import Resource
-from models import Mood
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import MoodDailyRollup
+from utils.mood_catalog import get_catalog, CACHE_CONTROL
+from utils.query_budget import query_budget
+from datetime import date, timedelta
 
 class MoodsResource(Resource):
     def get(self):
         try:
-            moods = Mood.query.all()
-            return [mood.to_dict() for mood in moods], 200
+            catalog = get_catalog()
+            headers = {"ETag": f'"{catalog.etag}"', "Cache-Control": CACHE_CONTROL}
+
+            #! revalidation: the client's copy is still current
+            if request.if_none_match.contains(catalog.etag):
+                return Response(status=304, headers=headers)
+
+            return catalog.as_list(), 200, headers
+        except Exception as e:
+            return {"error": f"An error occurred while fetching moods: {str(e)}"}, 500
+
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def _period_start(day, granularity):
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())  # Monday
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+class MoodTrendResource(Resource):
+    @query_budget(1)
+    @jwt_required()
+    def get(self):
+        """Average/min/max mood score per day, week or month from the daily rollups"""
+        try:
+            current_user_id = int(get_jwt_identity())
+            granularity = request.args.get("granularity", "day")
+            if granularity not in GRANULARITIES:
+                return {"error": f"granularity must be one of: {', '.join(GRANULARITIES)}"}, 400
+
+            try:
+                end = date.fromisoformat(request.args["end"]) if request.args.get("end") else date.today()
+                start = date.fromisoformat(request.args["start"]) if request.args.get("start") else end - timedelta(days=365)
+                journal_id = int(request.args["journal_id"]) if request.args.get("journal_id") else None
+            except ValueError:
+                return {"error": "start/end must be YYYY-MM-DD and journal_id an integer"}, 400
+
+            query = MoodDailyRollup.query.filter(
+                MoodDailyRollup.user_id == current_user_id,
+                MoodDailyRollup.day >= start,
+                MoodDailyRollup.day <= end,
+            )
+            if journal_id is not None:
+                query = query.filter(MoodDailyRollup.journal_id == journal_id)
+
+            #! at most one row per day per journal, folded into periods here
+            periods = {}
+            for row in query.order_by(MoodDailyRollup.day):
+                key = _period_start(row.day, granularity)
+                bucket = periods.get(key)
+                if bucket is None:
+                    periods[key] = [row.score_sum, row.score_count, row.score_min, row.score_max]
+                else:
+                    bucket[0] += row.score_sum
+                    bucket[1] += row.score_count
+                    bucket[2] = min(bucket[2], row.score_min)
+                    bucket[3] = max(bucket[3], row.score_max)
+
+            points = [
+                {
+                    "period": period.isoformat(),
+                    "avg": round(total / count, 2),
+                    "min": low,
+                    "max": high,
+                    "count": count,
+                }
+                for period, (total, count, low, high) in sorted(periods.items())
+            ]
+            return {
+                "granularity": granularity,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "journal_id": journal_id,
+                "points": points,
+            }, 200
         except Exception as e:
-            return {"error": f"An error occurred while fetching moods: {str(e)}"}, 500
\ No newline at end of file
+            return {"error": f"An error occurred while fetching mood trends: {str(e)}"}, 500
@@ -1,15 +1,18 @@
 from flask import request, redirect, url_for, session, jsonify, current_app
 from flask_restful import Resource
 from config import app, db, api, google, oauth
-from models import User, Journal, Entry
+from models import User, UserActivity, MoodDailyRollup, AiPromptJob, SeenPrompt, ImportJob
+from utils.projection import ProjectionError, projection_from_args, eager_loads
+from utils.query_budget import query_budget
+from utils.http_client import upstream
+from utils import conditional, export, revisions, search
 from flask_jwt_extended import create_access_token, set_access_cookies, jwt_required, get_jwt_identity, unset_jwt_cookies, create_refresh_token, set_refresh_cookies, get_csrf_token
-from flask import make_response
+from flask import make_response, Response, stream_with_context
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, and_, or_
+from sqlalchemy import and_, or_
 from datetime import datetime, timedelta
 import secrets
 import re
-import requests
 import urllib.parse
 import os
 import time
@@ -22,6 +25,8 @@ class Signup(Resource):
             data = request.get_json()
             if not data:
                 return {"error": "Invalid JSON"}, 400
+
+            only = projection_from_args(User, request.args)
                 
             username = data.get('username', '').strip()
             email = data.get('email', '').strip().lower()
@@ -50,13 +55,15 @@ class Signup(Resource):
             
             response = jsonify({
                 "message": "Signup successful",
-                "user": new_user.to_dict()
+                "user": new_user.to_dict(only=only)
             })
             
             set_access_cookies(response, access_token)
             set_refresh_cookies(response, refresh_token)
             return response
             
+        except ProjectionError as pe:
+            return {"error": str(pe)}, 400
         except IntegrityError:
             db.session.rollback()
             return {"error": "Email is already in use"}, 400
@@ -66,19 +73,22 @@ class Signup(Resource):
             return {"error": "Signup failed"}, 500
 
 class Login(Resource):
+    @query_budget(4)
     def post(self):
         try:
             data = request.get_json()
             if not data:
                 return {"error": "Invalid JSON"}, 400
 
+            only = projection_from_args(User, request.args)
+
             username = data.get('username')
             password = data.get('password')
             
             if not username or not password:
                 return {"error": "Username and password required"}, 400
 
-            user = User.query.filter_by(username=username).first()
+            user = User.query.options(*eager_loads(User, only)).filter_by(username=username).first()
             
             if not user or not user.check_password(password):
                 return {"error": "Invalid credentials"}, 401
@@ -88,13 +98,15 @@ class Login(Resource):
             
             response = jsonify({
                 "message": "Login successful",
-                "user": user.to_dict()
+                "user": user.to_dict(only=only)
             })
             
             set_access_cookies(response, access_token)
             set_refresh_cookies(response, refresh_token)
             return response
             
+        except ProjectionError as pe:
+            return {"error": str(pe)}, 400
         except Exception as e:
             current_app.logger.error(f"Login error: {str(e)}")
             return {"error": "Login failed"}, 500
@@ -104,16 +116,13 @@ class Logout(Resource):
     def post(self):  # Using POST is more standard for logout than DELETE
         try:
             current_user_id = get_jwt_identity()
-            print(f"Logging out user ID: {current_user_id}")
-
             user = User.query.get(current_user_id)
 
             # If this user logged in with Google, revoke their token
             if user and user.google_token:
                 try:
                     revoke_url = f"https://oauth2.googleapis.com/revoke?token={user.google_token}"
-                    requests.post(revoke_url, timeout=5)
-                    print("Google token revoked successfully.")
+                    upstream("google").post(revoke_url, timeout=5)
                 except Exception as e:
                     current_app.logger.warning(f"Google token revocation failed: {str(e)}")
 
@@ -121,7 +130,6 @@ class Logout(Resource):
             response = jsonify({"message": "Logout successful"})
             unset_jwt_cookies(response)
             session.clear()
-            print("JWT cookies and session cleared.")
             return response, 200
 
         except Exception as e:
@@ -199,10 +207,9 @@ class GoogleAuthorize(Resource):
             # Get user info from Google
             try:
                 userinfo_endpoint = "https://www.googleapis.com/oauth2/v3/userinfo"
-                resp = requests.get(
+                resp = upstream("google").get(
                     userinfo_endpoint,
                     headers={"Authorization": f"Bearer {token['access_token']}"},
-                    timeout=10
                 )
                 
                 if resp.status_code != 200:
@@ -347,6 +354,7 @@ class CsrfToken(Resource):
             return {"error": "Failed to generate CSRF token"}, 500
 
 class UserProfile(Resource):
+    @query_budget(5)
     @jwt_required()
     def get(self):
         try:
@@ -355,12 +363,22 @@ class UserProfile(Resource):
             if current_user_id == "anonymous":
                 return {"error": "Authentication required"}, 401
                 
-            user = User.query.get(current_user_id)
+            only = projection_from_args(User, request.args)
+            state = conditional.user_state(current_user_id)
+            if state is None:
+                return {"error": "User not found"}, 404
+            validators = conditional.Validators(*state)
+            if validators.not_modified():
+                return validators.not_modified_response()
+
+            user = db.session.get(User, current_user_id, options=eager_loads(User, only))
             if not user:
                 return {"error": "User not found"}, 404
                 
-            return user.to_dict(), 200
+            return user.to_dict(only=only), 200, validators.headers
             
+        except ProjectionError as pe:
+            return {"error": str(pe)}, 400
         except Exception as e:
             current_app.logger.error(f"Profile error: {str(e)}")
             return {"error": "Failed to get profile"}, 500
@@ -370,89 +388,38 @@ class UserStats(Resource):
     @jwt_required()
     def get(self):
         current_user_id = get_jwt_identity()
-        user = User.query.get_or_404(current_user_id)
-        
-        #! Count journals
-        journal_count = Journal.query.filter_by(user_id=user.id).count()
-        
-        #! Count entries
-        entry_count = db.session.query(func.count(Entry.id)).join(Journal).filter(Journal.user_id == user.id).scalar() or 0
-        
-        #! Calculate streaks
-        streaks = self._calculate_streaks(user.id)
-        
-        return {
-            "journal_count": journal_count,
-            "entry_count": entry_count,
-            "longest_streak": streaks["longest_streak"],
-            "current_streak": streaks["current_streak"]
-        }, 200
-    
-    def _calculate_streaks(self, user_id):
-        entry_dates_query = db.session.query(
-            func.date(Entry.created_at).label('entry_date')
-        ).join(Journal).filter(
-            Journal.user_id == user_id
-        ).group_by(
-            func.date(Entry.created_at)
-        ).order_by(
-            func.date(Entry.created_at)
-        ).all()
-        
-        try:
-            entry_dates = [
-                datetime.strptime(row.entry_date, "%Y-%m-%d").date() 
-                for row in entry_dates_query
-            ]
-        except Exception as e:
-            app.logger.error(f"Error parsing entry dates: {e}")
-            return {"longest_streak": 0, "current_streak": 0}
 
-        if not entry_dates:
-            return {"longest_streak": 0, "current_streak": 0}
-        
-        #! Calculate longest streak
-        longest_streak = 1
-        current_streak = 1
-        streak_count = 1
-        
-        for i in range(1, len(entry_dates)):
-            if (entry_dates[i] - entry_dates[i-1]).days == 1:
-                streak_count += 1
-            else:
-                #! Reset streak if gap in dates
-                streak_count = 1
-            
-            longest_streak = max(longest_streak, streak_count)
-        
-        
-        today = datetime.now().date()
-        
-        
-        if entry_dates[-1] == today:
-            current_streak = 1
-            
-            for i in range(len(entry_dates) - 2, -1, -1):
-                if (entry_dates[i+1] - entry_dates[i]).days == 1:
-                    current_streak += 1
-                else:
-                    break
-        
-        elif entry_dates[-1] == (today - timedelta(days=1)):
-            current_streak = 1
-            
-            for i in range(len(entry_dates) - 2, -1, -1):
-                if (entry_dates[i+1] - entry_dates[i]).days == 1:
-                    current_streak += 1
-                else:
-                    break
-        else:
-            current_streak = 0
-        
-        return {
-            "longest_streak": longest_streak,
-            "current_streak": current_streak
-        }
+        #! maintained incrementally by the entry/journal routes
+        activity = db.session.get(UserActivity, int(current_user_id))
+        if activity is None:
+            User.query.get_or_404(current_user_id)
+            activity = UserActivity.rebuild(current_user_id)
+            db.session.commit()
+
+        return activity.to_stats(), 200
+
+class UserExport(Resource):
+    @jwt_required()
+    def get(self):
+        """The whole account as ?format=ndjson (default) or zip, streamed while it is read"""
+        current_user_id = int(get_jwt_identity())
+        format = request.args.get("format", "ndjson")
+        if format not in export.FORMATS:
+            return {"error": f"format must be one of: {', '.join(export.FORMATS)}"}, 400
+        if not db.session.get(User, current_user_id):
+            return {"error": "User not found"}, 404
+
+        chunks = export.ndjson_chunks if format == "ndjson" else export.zip_chunks
+        filename = f"luma-export-{datetime.now():%Y-%m-%d}.{format}"
+        return Response(
+            stream_with_context(chunks(current_user_id)),
+            mimetype=export.FORMATS[format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "Cache-Control": "no-store",
+                "X-Accel-Buffering": "no",
+            },
+        )
 
 class DeleteUser(Resource):
     @jwt_required()
@@ -461,7 +428,13 @@ class DeleteUser(Resource):
             current_user_id = get_jwt_identity()
             user = User.query.get_or_404(current_user_id)
             
-            
+            UserActivity.forget(user.id)
+            MoodDailyRollup.forget(user.id)
+            db.session.execute(db.delete(AiPromptJob).where(AiPromptJob.user_id == user.id))
+            db.session.execute(db.delete(ImportJob).where(ImportJob.user_id == user.id))
+            db.session.execute(db.delete(SeenPrompt).where(SeenPrompt.user_id == user.id))
+            search.remove_user(user.id)
+            revisions.remove_user(user.id)
             db.session.delete(user)
             db.session.commit()
             
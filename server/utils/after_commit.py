@@ -0,0 +1,20 @@
+"""
+Side effects that may only run once the request's writes are committed.
+
+Handlers call after_commit(fn, *args) right after db.session.commit().
+Normally fn runs at once. Inside routes.batchroute.deferred_commits,
+commit() only flushes, so the calls are queued on the session instead;
+the batch runs them after its real commit and drops them on rollback.
+"""
+from config import db
+
+#! session.info key holding the queued (fn, args) while commits are deferred
+QUEUE = "after_commit"
+
+
+def after_commit(fn, *args):
+    queued = db.session.info.get(QUEUE)
+    if queued is None:
+        fn(*args)
+    else:
+        queued.append((fn, args))
@@ -0,0 +1,218 @@
+import os
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from config import app, db
+from utils.http_client import upstream
+from models import AiPromptJob, Entry, EntryMood, Journal, Mood
+
+# Fallback prompts in case API fails
+FALLBACK_PROMPTS = [
+    "What was the most meaningful conversation you had today?",
+    "Describe a moment today that made you feel grateful.",
+    "What's something you learned or realized today?",
+    "If you could change one decision you made today, what would it be?",
+    "What's something that challenged you today and how did you handle it?"
+]
+
+#! a job older than the Writecream timeout (plus slack) is dead
+WRITECREAM_TIMEOUT = upstream("writecream").timeout
+JOB_TIMEOUT = timedelta(seconds=WRITECREAM_TIMEOUT + 5)
+
+#! mood score -> how the prompt describes it
+MOOD_WORDS = {5: "joyful", 4: "calm", 3: "reflective", 2: "low", 1: "upset"}
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("AI_PROMPT_WORKERS", 4)),
+    thread_name_prefix="ai-prompt",
+)
+
+
+def background(fn, *args):
+    """Run fn(*args) on the prompt thread pool inside an app context"""
+    def run():
+        with app.app_context():
+            return fn(*args)
+    return _executor.submit(run)
+
+
+def fallback(note):
+    return {"prompt": random.choice(FALLBACK_PROMPTS), "note": note}
+
+
+def is_fallback(result):
+    return "note" in result or result["prompt"] in FALLBACK_PROMPTS
+
+
+def writecream_available():
+    """False while the Writecream circuit breaker is failing fast"""
+    return upstream("writecream").available()
+
+
+def writecream_config():
+    """(api_key, tool_id, api_url), or None when the API isn't configured"""
+    api_key = os.getenv("api_key")
+    tool_id = os.getenv("tool_id")
+    api_url = os.getenv("api_url")
+    if not api_key or not tool_id:
+        return None
+    return api_key, tool_id, api_url
+
+
+def mood_context(user_id):
+    """
+    Distinct mood scores on the user's three latest entries, highest first,
+    as a pool key like "5,3". Empty when there is no mood history.
+    """
+    latest = (
+        db.select(Entry.id)
+        .join(Journal)
+        .where(Journal.user_id == int(user_id))
+        .order_by(Entry.created_at.desc())
+        .limit(3)
+        .scalar_subquery()
+    )
+    scores = db.session.scalars(
+        db.select(Mood.score).distinct()
+        .join(EntryMood, EntryMood.mood_id == Mood.id)
+        .where(EntryMood.entry_id.in_(latest))
+    ).all()
+    return ",".join(str(score) for score in sorted(scores, reverse=True)[:3])  # Use up to 3 recent moods
+
+
+def context_tool_input(context):
+    words = [MOOD_WORDS[int(score)] for score in context.split(",") if score]
+    if not words:
+        return "Give me a thought-provoking journaling prompt that encourages deep reflection"
+    return f"Give me a thought-provoking journaling prompt for someone feeling {', '.join(words)} that encourages deep reflection"
+
+
+def custom_tool_input(custom_input):
+    return f"Give me a thought-provoking journaling prompt about {custom_input} that encourages deep reflection"
+
+
+def extract_prompt(prompt_data):
+    """Pull the prompt text out of whichever response shape Writecream sent"""
+    if isinstance(prompt_data, str):
+        return prompt_data.strip()
+    if isinstance(prompt_data, dict):
+        for key in ("output", "result", "prompt", "content", "text"):
+            if key in prompt_data:
+                return prompt_data[key].strip()
+    return str(prompt_data).strip()
+
+
+def fetch_prompt(tool_input, config):
+    """Blocking Writecream call. Always returns {"prompt", ["note"]}"""
+    api_key, tool_id, api_url = config
+    app.logger.info(f"Making Writecream API request with input: {tool_input}")
+    try:
+        response = upstream("writecream").post(
+            api_url,
+            headers={"Content-Type": "application/json"},
+            json={"key": api_key, "tool_id": tool_id, "tool_input": tool_input},
+        )
+    except requests.exceptions.RequestException as e:
+        app.logger.error(f"Request exception when calling Writecream API: {str(e)}")
+        return fallback("Using fallback prompt due to API connectivity issues")
+
+    if response.status_code != 200:
+        app.logger.warning(f"API returned status code {response.status_code}")
+        return fallback(f"Using fallback prompt due to API response: {response.status_code}")
+
+    try:
+        prompt = extract_prompt(response.json())
+    except Exception as e:
+        app.logger.error(f"Error parsing API response: {str(e)}")
+        return fallback("Error parsing API response")
+
+    # If we couldn't extract a prompt or it's too short, use a fallback
+    if not prompt or len(prompt) < 10:
+        app.logger.warning("Received empty or very short prompt from API")
+        return {"prompt": random.choice(FALLBACK_PROMPTS)}
+
+    # Ensure the prompt doesn't contain the default "What would you like to write about today?"
+    if "what would you like to write about today" in prompt.lower():
+        app.logger.warning("Received default prompt from API, using fallback")
+        return {"prompt": random.choice(FALLBACK_PROMPTS)}
+
+    return {"prompt": prompt}
+
+
+#! Jobs
+
+def _finish(job, result):
+    job.status = "done"
+    job.prompt = result["prompt"]
+    job.note = result.get("note")
+    job.finished_at = datetime.now()
+
+
+def _run_job(job_id, tool_input, config, on_result):
+    with app.app_context():
+        try:
+            result = fetch_prompt(tool_input, config)
+        except Exception as e:
+            app.logger.error(f"Error in AI Prompt generation: {str(e)}")
+            result = fallback("Using fallback prompt due to an error")
+
+        if on_result is not None and not is_fallback(result):
+            try:
+                on_result(result["prompt"])
+            except Exception as e:
+                app.logger.error(f"Error handling AI prompt result: {str(e)}")
+                db.session.rollback()
+
+        job = db.session.get(AiPromptJob, job_id)
+        if job is not None and job.status == "pending":
+            _finish(job, result)
+            db.session.commit()
+        return result
+
+
+def _expired(now):
+    """Jobs nobody will poll again: done for over JOB_TIMEOUT, or pending for twice that (dead)"""
+    return db.or_(
+        db.and_(AiPromptJob.status == "done", AiPromptJob.finished_at < now - JOB_TIMEOUT),
+        db.and_(AiPromptJob.status == "pending", AiPromptJob.created_at < now - 2 * JOB_TIMEOUT),
+    )
+
+
+def prune(user_id=None, now=None):
+    """Delete expired jobs, one user's (on submit) or everyone's (CLI). Returns rows removed."""
+    query = db.delete(AiPromptJob).where(_expired(now or datetime.now()))
+    if user_id is not None:
+        query = query.where(AiPromptJob.user_id == int(user_id))
+    return db.session.execute(query).rowcount
+
+
+def submit(user_id, tool_input=None, config=None, result=None, on_result=None):
+    """
+    Create a job row and hand the Writecream call to the thread pool.
+    Pass `result` to record an already-known answer (missing config,
+    exhausted quota) without touching the pool. `on_result(prompt)` runs in
+    the worker after a successful (non-fallback) call. The user's expired
+    jobs are deleted in the same commit, so the table stays small.
+    Returns (job, future-or-None).
+    """
+    prune(user_id)
+    job = AiPromptJob(id=uuid.uuid4().hex, user_id=int(user_id))
+    if result is not None:
+        _finish(job, result)
+    db.session.add(job)
+    db.session.commit()
+
+    if result is not None:
+        return job, None
+    return job, _executor.submit(_run_job, job.id, tool_input, config, on_result)
+
+
+def poll(job):
+    """Current state of a job; a pending job past JOB_TIMEOUT is settled with a fallback"""
+    if job.status == "pending" and datetime.now() - job.created_at > JOB_TIMEOUT:
+        _finish(job, fallback("Using fallback prompt due to API connectivity issues"))
+        db.session.commit()
+    return job.to_dict()
+
@@ -0,0 +1,107 @@
+"""
+Conditional GET: ETag / Last-Modified validators from one aggregate query.
+
+Validators come from row counts, max ids, max(updated_at) and the sum of
+entry versions, never from the serialized body. When the client's
+If-None-Match (or, without it, If-Modified-Since) still matches, the
+handler returns 304 before loading or serializing anything.
+
+Every entry write bumps its version and updated_at. Deleting an entry
+touches its journal's updated_at, so Last-Modified moves forward on
+deletes as well.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from flask import Response, request
+from sqlalchemy import distinct, func
+from werkzeug.http import http_date, quote_etag
+from config import db
+from models import Entry, Journal, User
+
+#! bump when response shapes change so clients drop validators cached against the old shape
+VALIDATOR_VERSION = 1
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def _entry_columns():
+    return (func.count(Entry.id), func.max(Entry.id), func.max(Entry.updated_at), func.sum(Entry.version))
+
+
+def user_state(user_id):
+    """(state, last_modified) over the user, their journals and entries; None if the user is gone"""
+    row = (
+        db.session.query(
+            User.id, User.username, User.email,
+            func.count(distinct(Journal.id)), func.max(Journal.id), func.max(Journal.updated_at),
+            *_entry_columns(),
+        )
+        .select_from(User)
+        .outerjoin(Journal, Journal.user_id == User.id)
+        .outerjoin(Entry, Entry.journal_id == Journal.id)
+        .filter(User.id == user_id)
+        .group_by(User.id)
+        .first()
+    )
+    if row is None:
+        return None
+    return tuple(row), _latest(row[5], row[8])
+
+
+def journal_state(journal_id, user_id):
+    """(state, last_modified) over one of the user's journals and its entries; None if not theirs"""
+    row = (
+        db.session.query(Journal.id, Journal.updated_at, *_entry_columns())
+        .outerjoin(Entry, Entry.journal_id == Journal.id)
+        .filter(Journal.id == journal_id, Journal.user_id == user_id)
+        .group_by(Journal.id)
+        .first()
+    )
+    if row is None:
+        return None
+    return tuple(row), _latest(row[1], row[4])
+
+
+def entry_state(entry_id, user_id):
+    """(state, last_modified) for one of the user's entries; None if not theirs"""
+    row = (
+        db.session.query(Entry.id, Entry.updated_at, Entry.version)
+        .join(Journal)
+        .filter(Entry.id == entry_id, Journal.user_id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return tuple(row), row.updated_at
+
+
+class Validators:
+    def __init__(self, state, last_modified):
+        digest = hashlib.sha1(repr((VALIDATOR_VERSION, state)).encode("utf-8")).hexdigest()[:24]
+        self.etag = digest
+        self.last_modified = None
+        if last_modified is not None:
+            last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+            #! a change later in this same second would be invisible at 1s resolution
+            if datetime.now(timezone.utc) - last_modified >= timedelta(seconds=1):
+                self.last_modified = last_modified
+
+    @property
+    def headers(self):
+        headers = {"ETag": quote_etag(self.etag, weak=True), "Cache-Control": "private, no-cache"}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = http_date(self.last_modified)
+        return headers
+
+    def not_modified(self):
+        #! If-None-Match wins when both are sent (RFC 9110 13.2.2)
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag)
+        since = request.if_modified_since
+        return since is not None and self.last_modified is not None and self.last_modified <= since
+
+    def not_modified_response(self):
+        return Response(status=304, headers=self.headers)
@@ -0,0 +1,168 @@
+"""
+Full-account export, streamed as it is read.
+
+Entries come off one query in PARTITION_SIZE batches (yield_per, a
+server-side cursor on PostgreSQL) with one mood query per batch, and each
+batch is written out before the next is read. Nothing holds the whole
+account, so memory is flat however many entries there are. The one
+exception is the zip's central directory: zipfile keeps a ZipInfo per
+file for the end, about half a KiB each.
+
+- ndjson: an account line, every journal, then every entry. The format
+  utils.importer reads back.
+- zip: <journal>/<date> <title> (<id>).md per entry, with front matter
+  for title, dates and moods
+"""
+import html
+import re
+import zipfile
+from datetime import datetime
+from config import db
+from models import Entry, EntryMood, Journal, User
+from utils.mood_catalog import get_catalog
+from utils.serializers import dumps
+
+FORMATS = {"ndjson": "application/x-ndjson", "zip": "application/zip"}
+FORMAT_VERSION = 1
+PARTITION_SIZE = 500
+
+_BREAK = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_BLOCK = re.compile(r"</(p|div|li)>|<(ul|ol)[^>]*>|</(ul|ol)>", re.IGNORECASE)
+_ITEM = re.compile(r"<li[^>]*>", re.IGNORECASE)
+_HEADING = re.compile(r"<h([1-6])[^>]*>(.*?)</h\1>", re.IGNORECASE | re.S)
+_TAG = re.compile(r"<[^>]+>")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_UNSAFE_NAME = re.compile(r'[\x00-\x1f/\\:*?"<>|]+')
+
+
+def _time(value):
+    return value.isoformat() if value is not None else None
+
+
+def _journals(user_id):
+    """A user's journals are few; entries are what gets streamed"""
+    return Journal.query.filter_by(user_id=user_id).order_by(Journal.id).all()
+
+
+def _entry_partitions(user_id):
+    """Lists of up to PARTITION_SIZE entry rows (with a `moods` emoji list), in journal/date order"""
+    rows = db.session.execute(
+        db.select(
+            Entry.id, Entry.journal_id, Entry.title, Entry.main_text,
+            Entry.created_at, Entry.updated_at, Entry.ai_prompt_used,
+        )
+        .join(Journal)
+        .where(Journal.user_id == user_id)
+        .order_by(Entry.journal_id, Entry.created_at, Entry.id)
+        .execution_options(yield_per=PARTITION_SIZE)
+    )
+    by_id = get_catalog().by_id
+    for partition in rows.partitions():
+        moods = {}
+        for entry_id, mood_id in db.session.execute(
+            db.select(EntryMood.entry_id, EntryMood.mood_id)
+            .where(EntryMood.entry_id.in_([row.id for row in partition]))
+            .order_by(EntryMood.id)
+        ):
+            if mood_id in by_id:
+                moods.setdefault(entry_id, []).append(by_id[mood_id]["emoji"])
+        yield [(row, moods.get(row.id, [])) for row in partition]
+
+
+#! NDJSON
+
+def ndjson_chunks(user_id):
+    """Bytes chunks of the NDJSON export: one per journal list and one per entry partition"""
+    user = db.session.get(User, user_id)
+    yield dumps({
+        "type": "account", "format_version": FORMAT_VERSION, "username": user.username,
+        "email": user.email, "exported_at": _time(datetime.now()),
+    }) + b"\n"
+    yield b"".join(
+        dumps({"type": "journal", "id": journal.id, "title": journal.title, "year": journal.year,
+               "color": journal.color}) + b"\n"
+        for journal in _journals(user_id)
+    )
+    for partition in _entry_partitions(user_id):
+        yield b"".join(
+            dumps({
+                "type": "entry", "id": row.id, "journal_id": row.journal_id, "title": row.title,
+                "main_text": row.main_text or "", "created_at": _time(row.created_at),
+                "updated_at": _time(row.updated_at), "ai_prompt_used": bool(row.ai_prompt_used), "moods": moods,
+            }) + b"\n"
+            for row, moods in partition
+        )
+
+
+#! Markdown zip
+
+def html_markdown(markup):
+    """The editor's HTML as plain Markdown: headings, paragraphs, list items and line breaks"""
+    if not markup:
+        return ""
+    text = _HEADING.sub(lambda m: "\n\n" + "#" * min(int(m.group(1)), 3) + " " + _TAG.sub("", m.group(2)) + "\n\n", markup)
+    text = _ITEM.sub("- ", _BLOCK.sub("\n\n", _BREAK.sub("\n", text)))
+    text = html.unescape(_TAG.sub("", text))
+    return _BLANK_LINES.sub("\n\n", text).strip() + "\n"
+
+
+def _zip_time(value):
+    #! zip timestamps start at 1980
+    value = max(value or datetime.now(), datetime(1980, 1, 1))
+    return value.timetuple()[:6]
+
+
+def _file_name(value, limit=80):
+    return _UNSAFE_NAME.sub(" ", value).strip(" .")[:limit].strip() or "untitled"
+
+
+def _front_matter_value(value):
+    value = str(value).replace("\n", " ")
+    return f'"{value}"' if value != value.strip() or value[:1] in "\"'" or ":" in value else value
+
+
+def markdown_file(row, moods):
+    fields = [("title", row.title), ("date", _time(row.created_at)), ("updated", _time(row.updated_at))]
+    if moods:
+        fields.append(("moods", " ".join(moods)))
+    if row.ai_prompt_used:
+        fields.append(("ai_prompt_used", "true"))
+    front = "".join(f"{key}: {_front_matter_value(value)}\n" for key, value in fields if value is not None)
+    return f"---\n{front}---\n\n{html_markdown(row.main_text)}"
+
+
+class _Sink:
+    """Write-only file for zipfile that hands back whatever was written since the last take()"""
+
+    def __init__(self):
+        #! one buffer, not a list: the central directory arrives as four small writes per file
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def zip_chunks(user_id):
+    """Bytes chunks of a zip of Markdown files, one chunk per entry partition"""
+    journals = {journal.id: _file_name(journal.title, 40) for journal in _journals(user_id)}
+    sink = _Sink()
+    #! a non-seekable target makes zipfile write data descriptors instead of seeking back
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for partition in _entry_partitions(user_id):
+            for row, moods in partition:
+                day = f"{row.created_at:%Y-%m-%d}" if row.created_at else "undated"
+                name = f"{journals[row.journal_id]}/{day} {_file_name(row.title)} ({row.id}).md"
+                info = zipfile.ZipInfo(name, date_time=_zip_time(row.updated_at or row.created_at))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, markdown_file(row, moods))
+            yield sink.take()
+    yield sink.take()  #! central directory
@@ -0,0 +1,178 @@
+"""
+Pooled outbound HTTP with retries, a circuit breaker and latency stats.
+
+Each upstream gets one requests.Session per process, so calls reuse
+keep-alive connections instead of paying a TCP/TLS handshake every time.
+Connection failures (and 502/503/504 on idempotent methods) are retried
+with jittered exponential backoff. After `failure_threshold` consecutive
+failures the breaker opens and calls fail fast with UpstreamUnavailable,
+a RequestException, so existing `except RequestException` fallbacks apply.
+
+    resp = upstream("google").get(url, headers=...)
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import app
+
+#! upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+UpstreamStats = namedtuple("UpstreamStats", "calls failures short_circuits latency_sum latency_buckets state")
+
+
+class UpstreamUnavailable(requests.exceptions.ConnectionError):
+    """Raised without touching the network while an upstream's breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open after `reset_timeout` seconds, letting one trial call
+    through; the trial's outcome closes or re-opens the breaker.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False  #! open, or half-open with the trial call in flight
+
+    def is_open(self):
+        """True while calls would be refused; unlike allow() this never moves state"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at < self.reset_timeout
+            return self.state == self.HALF_OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Returns True when this failure opened the breaker"""
+        with self._lock:
+            self.failures += 1
+            if self.state != self.OPEN and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class Upstream:
+    def __init__(self, name, timeout=10, retries=2, backoff=0.3, pool_size=10,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+            #! urllib3's default: only idempotent methods retry read errors and
+            #! statuses; a POST is only retried when the connection never opened
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._failures = 0
+        self._short_circuits = 0
+        self._latency_sum = 0.0
+        self._buckets = [0] * len(LATENCY_BUCKETS)
+
+    def request(self, method, url, **kwargs):
+        if not self.breaker.allow():
+            with self._lock:
+                self._short_circuits += 1
+            raise UpstreamUnavailable(f"{self.name} circuit open, failing fast")
+
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(time.perf_counter() - started, failed=True)
+            raise
+
+        #! 4xx means the upstream is up and answered; only 5xx trips the breaker
+        self._record(time.perf_counter() - started, failed=response.status_code >= 500)
+        return response
+
+    def available(self):
+        return not self.breaker.is_open()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _record(self, elapsed, failed):
+        if failed:
+            if self.breaker.record_failure():
+                app.logger.warning(f"{self.name} circuit opened after {self.breaker.failures} failures")
+        else:
+            self.breaker.record_success()
+        with self._lock:
+            self._calls += 1
+            self._failures += failed
+            self._latency_sum += elapsed
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    self._buckets[i] += 1
+                    break
+
+    def stats(self):
+        with self._lock:
+            return UpstreamStats(
+                self._calls, self._failures, self._short_circuits,
+                self._latency_sum, tuple(self._buckets), self.breaker.state,
+            )
+
+
+_UPSTREAMS = {
+    "writecream": Upstream(
+        "writecream",
+        timeout=float(os.getenv("WRITECREAM_TIMEOUT", 10)),
+        failure_threshold=int(os.getenv("WRITECREAM_BREAKER_THRESHOLD", 5)),
+        reset_timeout=float(os.getenv("WRITECREAM_BREAKER_RESET", 60)),
+    ),
+    "google": Upstream("google", timeout=10),
+}
+
+
+def upstream(name):
+    return _UPSTREAMS[name]
+
+
+def all_stats():
+    """{upstream name: UpstreamStats} for this process"""
+    return {name: client.stats() for name, client in _UPSTREAMS.items()}
@@ -0,0 +1,456 @@
+"""
+Bulk entry import for users coming from other journaling apps.
+
+The upload is spooled to a temporary file and imported on a background
+thread; its ImportJob row carries progress for polling. Every format is
+read as a stream of records, so memory holds one chunk of CHUNK_SIZE
+entries however large the file is:
+
+- json: a top-level array of entry objects, or NDJSON with one per line.
+  Our own export works as is: {"type": "journal"} lines define journals
+  that the {"type": "entry", "journal_id"} lines after them point at.
+  Journal titles are unique across accounts, so a title someone else
+  holds gets a " (2)" style suffix.
+- csv: a header row naming title, date, text, journal and moods columns
+  (aliases in FIELDS)
+- zip: one Markdown file per entry, optional front matter with the same
+  fields; a parent folder names the journal
+
+Rows go through the Entry validators (and new journals through the
+Journal ones); mood emoji resolve through the mood catalog. Each chunk is
+one INSERT for entries and one for entry_moods, indexed for search and
+committed. Activity stats and mood rollups are rebuilt once at the end,
+whether the import finished or failed part way.
+"""
+import csv
+import html
+import json
+import os
+import re
+import tempfile
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from config import app, db
+from models import Entry, EntryMood, ImportJob, Journal, MoodDailyRollup, UserActivity
+from utils import search
+from utils.mood_catalog import resolve_moods
+
+FORMATS = ("json", "csv", "zip")
+EXTENSIONS = {".json": "json", ".ndjson": "json", ".jsonl": "json", ".csv": "csv", ".zip": "zip"}
+CHUNK_SIZE = 500
+MAX_UPLOAD_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 50 * 1024 * 1024))
+#! one record; anything bigger is rejected instead of buffered
+MAX_RECORD_CHARS = 1024 * 1024
+MAX_REPORTED_ERRORS = 50
+READ_SIZE = 64 * 1024
+#! a job unfinished after this died with its worker and no longer blocks a new import
+JOB_TIMEOUT = timedelta(hours=1)
+
+#! lower-cased source field / column / front matter key -> record field
+FIELDS = {
+    "title": "title", "name": "title", "subject": "title",
+    "main_text": "main_text", "text": "main_text", "body": "main_text", "content": "main_text", "entry": "main_text",
+    "created_at": "created_at", "date": "created_at", "created": "created_at", "datetime": "created_at",
+    "updated_at": "updated_at", "updated": "updated_at", "modified": "updated_at",
+    "journal": "journal", "journal_title": "journal", "notebook": "journal",
+    "moods": "moods", "mood": "moods", "mood_ids": "moods", "emoji": "moods",
+    "ai_prompt_used": "ai_prompt_used",
+    "journal_id": "journal_id", "id": "id", "type": "type", "year": "year", "color": "color",
+}
+MARKDOWN_EXTENSIONS = (".md", ".markdown", ".txt")
+
+csv.field_size_limit(MAX_RECORD_CHARS)
+
+_FRONT_MATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.S)
+_DATED_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})[ _-]*(.*)$")
+_HEADING = re.compile(r"^(#{1,3})\s+(.+)$")
+_BLOCKS = re.compile(r"\n[ \t]*\n")
+_HTML = re.compile(r"<(p|div|br|h[1-6]|ul|ol|li|strong|em)\b", re.IGNORECASE)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="imports")
+
+
+class ImportFormatError(ValueError):
+    """The file can't be read at all; the job fails"""
+
+
+class RowError(ValueError):
+    """One record is unusable; it is skipped and reported"""
+
+
+#! Readers: path -> records (dicts, or RowError for a record that can't be parsed)
+
+def _json_records(path):
+    """Values of a top-level JSON array, or of NDJSON lines, decoded one at a time"""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as f:
+        buffer, position, eof, started = "", 0, False, False
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                if eof:
+                    return
+                buffer, position = f.read(READ_SIZE), 0
+                eof = not buffer
+                continue
+            if not started:
+                started = True
+                if buffer[position] == "[":
+                    position += 1
+                    continue
+            if buffer[position] == "]":
+                return
+            try:
+                value, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                #! usually just a record cut off by the read boundary: read more and retry
+                if eof:
+                    raise ImportFormatError(f"Invalid JSON: {e.msg}")
+                if len(buffer) - position > MAX_RECORD_CHARS:
+                    raise ImportFormatError("A record is larger than the import limit")
+                more = f.read(READ_SIZE)
+                buffer, position, eof = buffer[position:] + more, 0, not more
+                continue
+            yield value
+
+
+def _csv_records(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        try:
+            header = next(reader, None)
+            if header is None:
+                return
+            fields = [FIELDS.get(name.strip().lower()) for name in header]
+            if "title" not in fields and "main_text" not in fields:
+                raise ImportFormatError("The CSV header needs a title or text column")
+            for row in reader:
+                yield {field: value for field, value in zip(fields, row) if field and value.strip()}
+        except csv.Error as e:
+            raise ImportFormatError(f"Invalid CSV on line {reader.line_num}: {e}")
+
+
+def _markdown_records(path):
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        raise ImportFormatError("Not a zip archive")
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(MARKDOWN_EXTENSIONS):
+                continue
+            if info.file_size > MAX_RECORD_CHARS:
+                yield RowError(f"{name} is larger than the import limit")
+                continue
+            try:
+                text = archive.read(info).decode("utf-8-sig")
+            except (UnicodeDecodeError, zipfile.BadZipFile, RuntimeError) as e:
+                yield RowError(f"{name} could not be read: {e}")
+                continue
+            yield markdown_record(name, text, datetime(*info.date_time))
+
+
+READERS = {"json": _json_records, "csv": _csv_records, "zip": _markdown_records}
+
+
+#! Markdown
+
+def markdown_record(name, text, modified):
+    """Record for one Markdown file: front matter, then a leading "# " heading, then the file name"""
+    record = {}
+    match = _FRONT_MATTER.match(text)
+    if match:
+        for line in match.group(1).splitlines():
+            key, colon, value = line.partition(":")
+            if colon:
+                record[key.strip()] = value.strip().strip("\"'")
+        text = text[match.end():]
+    record = _fields(record)
+
+    parts = name.split("/")
+    if len(parts) > 1 and "journal" not in record:
+        record["journal"] = parts[-2]
+    stem = os.path.splitext(parts[-1])[0]
+    dated = _DATED_NAME.match(stem)
+    if "created_at" not in record:
+        record["created_at"] = dated.group(1) if dated else modified.isoformat()
+
+    lines = text.strip().splitlines()
+    if "title" not in record:
+        if lines and lines[0].startswith("# "):
+            record["title"] = lines.pop(0)[2:].strip()
+        else:
+            record["title"] = (dated.group(2) if dated else "") or stem
+    record["main_text"] = markdown_html("\n".join(lines))
+    return record
+
+
+def markdown_html(text):
+    """Markdown / plain text as the HTML the editor stores: headings, paragraphs and line breaks"""
+    blocks = []
+    for block in _BLOCKS.split(text.strip()):
+        heading = _HEADING.match(block)
+        if heading and "\n" not in block:
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{html.escape(heading.group(2).strip())}</h{level}>")
+        elif block.strip():
+            blocks.append("<p>" + "<br>".join(html.escape(line) for line in block.splitlines()) + "</p>")
+    return "".join(blocks)
+
+
+#! Field parsing
+
+def _fields(record):
+    return {FIELDS[key.strip().lower()]: value for key, value in record.items() if key.strip().lower() in FIELDS}
+
+
+def _parse_time(value):
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value)
+        except (OverflowError, OSError, ValueError):
+            raise RowError(f"Timestamp out of range: {value}")
+    value = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = datetime.combine(date.fromisoformat(value[:10]), datetime.min.time())
+        except ValueError:
+            raise RowError(f"Unrecognised date: {value[:40]}")
+    #! stored naive in server time like every other entry
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y", "ai")
+    return bool(value)
+
+
+def _main_text(value):
+    if value is None:
+        return ""
+    value = str(value)
+    return value if _HTML.search(value) else markdown_html(value)
+
+
+#! Import
+
+class _Importer:
+    def __init__(self, job, journal_id):
+        self.job = job
+        self.user_id = job.user_id
+        self.default_journal_id = journal_id
+        #! the user's journals by title; journal titles are unique across all users
+        self.journals = {
+            title: journal_id for journal_id, title in
+            db.session.query(Journal.id, Journal.title).filter(Journal.user_id == self.user_id)
+        }
+        self.source_journals = {}  #! journal id in the file -> our journal id
+        self.errors = json.loads(job.errors) if job.errors else []
+
+    def run(self, path):
+        chunk = []
+        for number, record in enumerate(READERS[self.job.format](path), 1):
+            self.job.rows_read = number
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                item = self._record(record)
+                if item is not None:
+                    chunk.append(item)
+            except (ValueError, TypeError) as e:  #! RowError and the model validators' ValueError
+                self.job.skipped += 1
+                self._error(number, e)
+            if len(chunk) >= CHUNK_SIZE or number % CHUNK_SIZE == 0:
+                self._flush(chunk)
+        self._flush(chunk)
+
+    def _error(self, row, error):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": str(error)})
+
+    def _record(self, record):
+        """(Entry, mood ids) for an entry record; None for records that aren't entries"""
+        if not isinstance(record, dict):
+            raise RowError("Expected an object")
+        record = _fields(record)
+        kind = record.get("type", "entry")
+        if kind == "journal":
+            try:
+                journal_id = self._journal(record.get("title"), record.get("year"), record.get("color"))
+            except ValueError:
+                #! entries that point at this journal still land in the one picked for the import
+                if self.default_journal_id is None:
+                    raise
+                journal_id = self.default_journal_id
+            if record.get("id") is not None:
+                self.source_journals[record["id"]] = journal_id
+            return None
+        if kind != "entry":
+            return None  #! e.g. the export's account header
+        return self._entry(record)
+
+    def _journal(self, title, year=None, color=None):
+        title = str(title or "").strip()
+        if title in self.journals:
+            return self.journals[title]
+        journal = Journal(title=self._free_title(title), year=year or datetime.now().year,
+                          color=color or "#E7E5E5", user_id=self.user_id)
+        db.session.add(journal)
+        db.session.flush()
+        #! later rows name the journal by its title in the file, not the one it got here
+        self.journals[title] = journal.id
+        return journal.id
+
+    def _free_title(self, title):
+        """`title`, or "title (2)", "title (3)"... when another account has it (titles are unique)"""
+        candidate, n = title, 1
+        while db.session.query(Journal.id).filter(Journal.title == candidate).first():
+            n += 1
+            suffix = f" ({n})"
+            candidate = title[:Journal.title.type.length - len(suffix)].rstrip() + suffix
+        return candidate
+
+    def _journal_for(self, record, created_at):
+        if record.get("journal_id") in self.source_journals:
+            return self.source_journals[record["journal_id"]]
+        if record.get("journal"):
+            return self._journal(record["journal"], year=min(created_at.year, datetime.now().year))
+        if self.default_journal_id is not None:
+            return self.default_journal_id
+        raise RowError("No journal: give the row a journal or pick one for the import")
+
+    def _entry(self, record):
+        created_at = _parse_time(record.get("created_at")) or datetime.now()
+        title = str(record.get("title") or "").strip()
+        #! the same fields and validators EntryResource.post uses; the object itself is never added
+        entry = Entry(
+            title=title or f"{created_at:%B} {created_at.day}, {created_at.year}",
+            main_text=_main_text(record.get("main_text")),
+            created_at=created_at,
+            updated_at=_parse_time(record.get("updated_at")) or created_at,
+            ai_prompt_used=_parse_bool(record.get("ai_prompt_used", False)),
+        )
+        entry.journal_id = self._journal_for(record, created_at)
+        return entry, resolve_moods(record.get("moods"))
+
+    def _flush(self, chunk):
+        """One INSERT ... RETURNING for the chunk's entries and one for their moods, then commit"""
+        if chunk:
+            ids = db.session.scalars(
+                db.insert(Entry).returning(Entry.id, sort_by_parameter_order=True),
+                [
+                    {"title": entry.title, "main_text": entry.main_text, "created_at": entry.created_at,
+                     "updated_at": entry.updated_at, "journal_id": entry.journal_id,
+                     "ai_prompt_used": entry.ai_prompt_used, "version": 1}
+                    for entry, _ in chunk
+                ],
+            ).all()
+            moods = []
+            for (entry, mood_ids), entry_id in zip(chunk, ids):
+                entry.id = entry_id
+                moods.extend({"entry_id": entry_id, "mood_id": mood_id} for mood_id in mood_ids)
+            if moods:
+                db.session.execute(db.insert(EntryMood), moods)
+            search.index_entries([entry for entry, _ in chunk])
+            #! entries keep their original dates; the journals' Last-Modified still has to move
+            journal_ids = {entry.journal_id for entry, _ in chunk}
+            db.session.execute(db.update(Journal).where(Journal.id.in_(journal_ids)).values(updated_at=datetime.now()))
+            self.job.imported += len(chunk)
+            chunk.clear()
+        self.job.errors = json.dumps(self.errors) if self.errors else None
+        db.session.commit()
+
+
+def _failed(job, importer, message):
+    """
+    Roll back the chunk in progress. Earlier chunks stay committed, so the
+    job keeps its counts and says how many entries a retry would repeat.
+    """
+    rows_read, skipped = job.rows_read, job.skipped
+    errors = importer.errors if importer is not None else []
+    db.session.rollback()
+    job.status = "failed"
+    job.rows_read, job.skipped = rows_read, skipped
+    errors = errors + [{"row": None, "error": message}]
+    if job.imported:
+        errors.append({"row": None, "error": f"{job.imported} entries were imported before the failure; "
+                                             "importing the same file again will add them a second time"})
+    job.errors = json.dumps(errors)
+
+
+def _run(job_id, path, journal_id):
+    with app.app_context():
+        job = db.session.get(ImportJob, job_id)
+        importer = None
+        try:
+            job.status = "running"
+            db.session.commit()
+            importer = _Importer(job, journal_id)
+            importer.run(path)
+            job.status = "done"
+        except ImportFormatError as e:
+            _failed(job, importer, str(e))
+        except Exception as e:
+            app.logger.exception(f"Import {job_id} failed: {e}")
+            _failed(job, importer, "Import failed")
+        finally:
+            #! chunks commit as they go: a failed import's entries need their stats too
+            if job.imported:
+                UserActivity.rebuild(job.user_id)
+                MoodDailyRollup.rebuild(job.user_id)
+            job.finished_at = datetime.now()
+            db.session.commit()
+            os.remove(path)
+
+
+#! Request side
+
+def detect_format(requested, filename):
+    """json / csv / zip from ?format= or the file extension, or None"""
+    if requested:
+        return requested.lower() if requested.lower() in FORMATS else None
+    return EXTENSIONS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def spool(stream, suffix=""):
+    """Copy the upload to a temporary file; None (and nothing kept) if it exceeds MAX_UPLOAD_BYTES"""
+    fd, path = tempfile.mkstemp(prefix="luma-import-", suffix=suffix)
+    size = 0
+    with os.fdopen(fd, "wb") as out:
+        while True:
+            piece = stream.read(READ_SIZE)
+            if not piece:
+                break
+            size += len(piece)
+            if size > MAX_UPLOAD_BYTES:
+                break
+            out.write(piece)
+    if size > MAX_UPLOAD_BYTES:
+        os.remove(path)
+        return None
+    return path
+
+
+def active_job(user_id):
+    return ImportJob.query.filter(
+        ImportJob.user_id == int(user_id),
+        ImportJob.status.in_(("pending", "running")),
+        ImportJob.created_at > datetime.now() - JOB_TIMEOUT,
+    ).first()
+
+
+def submit(user_id, path, format, journal_id=None):
+    job = ImportJob(id=uuid.uuid4().hex, user_id=int(user_id), format=format)
+    db.session.add(job)
+    db.session.commit()
+    _executor.submit(_run, job.id, path, journal_id)
+    return job
@@ -0,0 +1,204 @@
+"""
+Per-endpoint request metrics in Prometheus text format.
+
+Opt in with METRICS_ENABLED=1; otherwise no hooks are installed at all.
+For each Flask endpoint this records a latency histogram, responses by
+status, SQL statement count and time, and time spent serializing
+(to_dict, JSON encoding and compression). It also tracks in-flight
+requests and the outbound upstream stats from utils.http_client.
+
+Counters live in this process. Under several gunicorn workers each scrape
+sees one worker's numbers; the `pid` label keeps the series apart.
+
+    GET /metrics    (Authorization: Bearer $METRICS_TOKEN when set)
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, request
+from utils import http_client, representation, serializers
+
+#! upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class EndpointMetrics:
+    __slots__ = ("lock", "buckets", "latency_sum", "count", "statuses", "sql_queries", "sql_seconds", "serialize_seconds")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.count = 0
+        self.statuses = {}
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def observe(self, elapsed, status, queries, sql_seconds, serialize_seconds):
+        i = bisect_left(LATENCY_BUCKETS, elapsed)
+        with self.lock:
+            self.buckets[i] += 1
+            self.latency_sum += elapsed
+            self.count += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.sql_queries += queries
+            self.sql_seconds += sql_seconds
+            self.serialize_seconds += serialize_seconds
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+_in_flight = [0]
+_in_flight_lock = threading.Lock()
+
+
+def _for_endpoint(name):
+    metrics = _endpoints.get(name)
+    if metrics is None:
+        with _endpoints_lock:
+            metrics = _endpoints.setdefault(name, EndpointMetrics())
+    return metrics
+
+
+#! hooks resolve the `g` proxy once and read its __dict__ directly: proxy
+#! lookups and getattr() misses on `g` each cost a microsecond or more
+
+def add_serialize_time(seconds):
+    state = g._get_current_object().__dict__
+    if "metrics_started" in state:
+        state["serialize_seconds"] = state.get("serialize_seconds", 0.0) + seconds
+
+
+def _start_request():
+    state = g._get_current_object().__dict__
+    state["metrics_started"] = time.perf_counter()
+    state["metrics_request"] = request._get_current_object()
+    with _in_flight_lock:
+        _in_flight[0] += 1
+
+
+def _record(response):
+    state = g._get_current_object().__dict__
+    started = state.get("metrics_started")
+    if started is not None:
+        #! unmatched URLs share one series so scanners can't blow up cardinality
+        _for_endpoint(request._get_current_object().endpoint or "unmatched").observe(
+            time.perf_counter() - started,
+            response.status_code,
+            state.get("query_count", 0),
+            state.get("query_seconds", 0.0),
+            state.get("serialize_seconds", 0.0),
+        )
+    return response
+
+
+def _finish_request(exc=None):
+    state = g._get_current_object().__dict__
+    #! /api/batch runs sub-requests inside this app context; only the outer request's teardown counts
+    if state.get("metrics_request") is not request._get_current_object():
+        return
+    if state.pop("metrics_started", None) is not None:
+        with _in_flight_lock:
+            _in_flight[0] -= 1
+
+
+def _timed_output_json(data, code, headers=None):
+    started = time.perf_counter()
+    response = representation.output_json(data, code, headers)
+    add_serialize_time(time.perf_counter() - started)
+    return response
+
+
+#! Exposition
+
+def _labels(**labels):
+    labels.setdefault("pid", os.getpid())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def _histogram(lines, name, labels, buckets, bounds, total_sum, count):
+    cumulative = 0
+    for bound, n in zip(bounds, buckets):
+        cumulative += n
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f"{name}_bucket{_labels(**labels, le=le)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total_sum}")
+    lines.append(f"{name}_count{_labels(**labels)} {count}")
+
+
+def render():
+    lines = []
+    with _endpoints_lock:
+        endpoints = sorted(_endpoints.items())
+
+    lines += ["# HELP luma_http_request_duration_seconds Request latency by endpoint",
+              "# TYPE luma_http_request_duration_seconds histogram"]
+    snapshot = []
+    for name, metrics in endpoints:
+        with metrics.lock:
+            snapshot.append((name, list(metrics.buckets), metrics.latency_sum, metrics.count, dict(metrics.statuses),
+                             metrics.sql_queries, metrics.sql_seconds, metrics.serialize_seconds))
+    for name, buckets, latency_sum, count, *_ in snapshot:
+        _histogram(lines, "luma_http_request_duration_seconds", {"endpoint": name},
+                   buckets, LATENCY_BUCKETS, latency_sum, count)
+
+    lines += ["# HELP luma_http_responses_total Responses by endpoint and status",
+              "# TYPE luma_http_responses_total counter"]
+    for name, _, _, _, statuses, *_ in snapshot:
+        for status, n in sorted(statuses.items()):
+            lines.append(f"luma_http_responses_total{_labels(endpoint=name, status=status)} {n}")
+
+    for metric, help_text, index in (
+        ("luma_sql_queries_total", "SQL statements run by endpoint", 5),
+        ("luma_sql_seconds_total", "Time spent executing SQL by endpoint", 6),
+        ("luma_serialize_seconds_total", "Time spent in to_dict, JSON encoding and compression by endpoint", 7),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for row in snapshot:
+            lines.append(f"{metric}{_labels(endpoint=row[0])} {row[index]}")
+
+    lines += ["# HELP luma_http_requests_in_flight Requests currently being handled",
+              "# TYPE luma_http_requests_in_flight gauge",
+              f"luma_http_requests_in_flight{_labels()} {_in_flight[0]}"]
+
+    upstreams = sorted(http_client.all_stats().items())
+    lines += ["# HELP luma_upstream_request_duration_seconds Outbound call latency by upstream",
+              "# TYPE luma_upstream_request_duration_seconds histogram"]
+    for name, stats in upstreams:
+        _histogram(lines, "luma_upstream_request_duration_seconds", {"upstream": name},
+                   stats.latency_buckets, http_client.LATENCY_BUCKETS, stats.latency_sum, stats.calls)
+    for metric, help_text, field in (
+        ("luma_upstream_failures_total", "Outbound calls that raised or returned 5xx", "failures"),
+        ("luma_upstream_short_circuits_total", "Outbound calls refused by an open circuit breaker", "short_circuits"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for name, stats in upstreams:
+            lines.append(f"{metric}{_labels(upstream=name)} {getattr(stats, field)}")
+    lines += ["# HELP luma_upstream_circuit_open 1 while the upstream's circuit breaker is not closed",
+              "# TYPE luma_upstream_circuit_open gauge"]
+    for name, stats in upstreams:
+        lines.append(f"luma_upstream_circuit_open{_labels(upstream=name)} {int(stats.state != 'closed')}")
+
+    return "\n".join(lines) + "\n"
+
+
+def init_metrics(app, api):
+    if not app.config.get("METRICS_ENABLED"):
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_record)
+    app.teardown_request(_finish_request)
+    api.representations["application/json"] = _timed_output_json
+    serializers.set_timer(add_serialize_time)
+
+    @app.route("/metrics")
+    def metrics():
+        token = app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return {"error": "Unauthorized"}, 401
+        return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
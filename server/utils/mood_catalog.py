@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import re
+import time
+from types import MappingProxyType
+from models import Mood
+
+#! browsers/CDNs may reuse the catalog for a day before revalidating
+CACHE_CONTROL = "public, max-age=86400"
+#! how often a worker re-reads the moods table to pick up edits made by any process
+CHECK_INTERVAL = float(os.getenv("MOOD_CATALOG_CHECK_SECONDS", 60))
+
+
+def _etag(moods):
+    body = json.dumps(moods, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class MoodCatalog:
+    """Immutable snapshot of the moods table plus its HTTP validator"""
+
+    __slots__ = ("moods", "by_id", "by_emoji", "emoji_pattern", "etag")
+
+    def __init__(self, moods):
+        self.moods = tuple(MappingProxyType(mood) for mood in moods)
+        self.by_id = MappingProxyType({mood["id"]: mood for mood in self.moods})
+        self.by_emoji = MappingProxyType({mood["emoji"]: mood["id"] for mood in self.moods})
+        #! longest first so an emoji with a variation selector wins over its base character
+        emojis = sorted(self.by_emoji, key=len, reverse=True)
+        self.emoji_pattern = re.compile("|".join(map(re.escape, emojis)) + r"|\d+") if emojis else re.compile(r"\d+")
+        self.etag = _etag(moods)
+
+    def as_list(self):
+        return [dict(mood) for mood in self.moods]
+
+
+_catalog = None
+_checked_at = 0.0
+
+
+def _read_moods():
+    return [mood.to_dict() for mood in Mood.query.order_by(Mood.id).all()]
+
+
+def load_catalog():
+    return MoodCatalog(_read_moods())
+
+
+def get_catalog():
+    """
+    The process-wide catalog. At most every CHECK_INTERVAL seconds the
+    moods table (a handful of rows) is read again and the snapshot replaced
+    if its contents changed, so the ETag follows what is stored.
+    """
+    global _catalog, _checked_at
+    now = time.monotonic()
+    if _catalog is None or now - _checked_at >= CHECK_INTERVAL:
+        moods = _read_moods()
+        if _catalog is None or _etag(moods) != _catalog.etag:
+            _catalog = MoodCatalog(moods)
+        _checked_at = now
+    return _catalog
+
+
+def reload_catalog():
+    """Force a reload in this process, e.g. right after editing moods"""
+    global _catalog, _checked_at
+    _catalog = load_catalog()
+    _checked_at = time.monotonic()
+    return _catalog
+
+
+def valid_mood_ids(mood_ids):
+    """
+    Keep the submitted ids that exist in the catalog, de-duplicated and in
+    submission order. Unknown or malformed ids are dropped, matching the old
+    per-id Mood.query.get() check without touching the database.
+    """
+    by_id = get_catalog().by_id
+    valid = []
+    for mood_id in mood_ids or []:
+        try:
+            mood_id = int(mood_id)
+        except (TypeError, ValueError):
+            continue
+        if mood_id in by_id and mood_id not in valid:
+            valid.append(mood_id)
+    return valid
+
+
+def resolve_moods(value):
+    """
+    Mood ids for imported data: a list of ids / emoji, or a string such as
+    "😊 😢", "😊,😢" or "3,7". Unknown values are dropped like valid_mood_ids.
+    """
+    catalog = get_catalog()
+    if isinstance(value, str):
+        value = catalog.emoji_pattern.findall(value)
+    ids = []
+    for item in value or []:
+        if isinstance(item, str) and item in catalog.by_emoji:
+            item = catalog.by_emoji[item]
+        ids.append(item)
+    return valid_mood_ids(ids)
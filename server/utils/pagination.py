@@ -0,0 +1,97 @@
+import base64
+from datetime import datetime, timedelta
+from sqlalchemy import tuple_
+from models import Entry
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(entry):
+    """Opaque cursor pointing just past `entry` in (created_at, id) order"""
+    raw = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, entry_id = base64.urlsafe_b64decode(padded).decode("utf-8").rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except Exception:
+        raise PaginationError("Invalid cursor")
+
+
+def parse_limit(value):
+    if value is None or value == "":
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_date_bound(value, name):
+    """Accepts YYYY-MM-DD or a full ISO timestamp"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f"{name} must be an ISO date (YYYY-MM-DD)")
+
+
+def apply_entry_filters(query, args):
+    """Narrow an Entry query by the journal_id / start / end query params"""
+    journal_id = args.get("journal_id")
+    if journal_id:
+        try:
+            query = query.filter(Entry.journal_id == int(journal_id))
+        except ValueError:
+            raise PaginationError("journal_id must be an integer")
+
+    start = parse_date_bound(args.get("start"), "start")
+    if start:
+        query = query.filter(Entry.created_at >= start)
+
+    end = parse_date_bound(args.get("end"), "end")
+    if end:
+        #! a bare date means "through the end of that day"
+        if len(args.get("end")) == 10:
+            query = query.filter(Entry.created_at < end + timedelta(days=1))
+        else:
+            query = query.filter(Entry.created_at <= end)
+    return query
+
+
+def is_paginated_request(args):
+    return any(key in args for key in ("limit", "cursor"))
+
+
+def paginate_entries(query, args):
+    """
+    Keyset pagination over Entry, newest first.
+
+    Seeks with `(created_at, id) < cursor` instead of OFFSET so each page
+    costs the same no matter how deep the caller has scrolled.
+    Returns (entries, next_cursor); next_cursor is None on the last page.
+    """
+    limit = parse_limit(args.get("limit"))
+    cursor = args.get("cursor")
+
+    if cursor:
+        created_at, entry_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Entry.created_at, Entry.id) < tuple_(created_at, entry_id))
+
+    #! fetch one extra row to know whether another page exists
+    rows = query.order_by(Entry.created_at.desc(), Entry.id.desc()).limit(limit + 1).all()
+    entries = rows[:limit]
+    next_cursor = encode_cursor(entries[-1]) if len(rows) > limit else None
+    return entries, next_cursor
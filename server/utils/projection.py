@@ -0,0 +1,104 @@
+from functools import lru_cache
+from sqlalchemy import inspect as sql_inspect
+from sqlalchemy.orm import subqueryload
+from models import Entry
+
+
+class ProjectionError(ValueError):
+    pass
+
+
+def _hidden(cls):
+    """Top-level keys the model's own serialize_rules already strip"""
+    return {rule[1:] for rule in cls.serialize_rules if rule.startswith("-") and "." not in rule}
+
+
+@lru_cache(maxsize=None)
+def public_fields(cls):
+    hidden = _hidden(cls)
+    return tuple(a.key for a in sql_inspect(cls).column_attrs if a.key not in hidden)
+
+
+@lru_cache(maxsize=None)
+def expandable(cls):
+    hidden = _hidden(cls)
+    return {key: rel.mapper.class_ for key, rel in sql_inspect(cls).relationships.items() if key not in hidden}
+
+
+#! relationships that ride along whenever their parent is expanded
+ALWAYS_EXPAND = {
+    Entry: ("moods",),
+}
+
+
+def _split(value):
+    return tuple(part.strip() for part in value.split(",") if part.strip()) if value else ()
+
+
+def _build_only(cls, fields, expand, prefix=""):
+    only = [prefix + field for field in fields]
+
+    nested = {}
+    for path in expand + ALWAYS_EXPAND.get(cls, ()):
+        head, _, rest = path.partition(".")
+        relations = expandable(cls)
+        if head not in relations:
+            raise ProjectionError(f"Cannot expand '{prefix}{head}'")
+        nested.setdefault(head, [])
+        if rest:
+            nested[head].append(rest)
+
+    for key, sub_expand in nested.items():
+        child = expandable(cls)[key]
+        only += _build_only(child, public_fields(child), tuple(sub_expand), f"{prefix}{key}.")
+    return only
+
+
+def projection(cls, fields=None, expand=()):
+    """
+    Build the `only=` tuple for to_dict() from a field list and expand paths.
+
+    Only the model's public columns are returned unless a relationship is
+    named in `expand` (dotted paths reach deeper, e.g. "journals.entries").
+    """
+    if fields:
+        unknown = [f for f in fields if f not in public_fields(cls)]
+        if unknown:
+            raise ProjectionError(f"Unknown field(s): {', '.join(unknown)}")
+    else:
+        fields = public_fields(cls)
+    return tuple(_build_only(cls, tuple(fields), tuple(expand)))
+
+
+def projection_from_args(cls, args, default_expand=()):
+    """Read ?fields=a,b and ?expand=rel.sub from the query string"""
+    fields = _split(args.get("fields"))
+    expand = _split(args.get("expand")) if "expand" in args else default_expand
+    return projection(cls, fields, expand)
+
+
+def eager_loads(cls, only):
+    """
+    subqueryload() options for every relationship a projection touches,
+    so serializing N rows costs one query per relationship level, not N.
+    selectinload() would split each level into IN queries of 500 keys, and
+    expanded trees (every entry of every journal) pass that easily.
+    """
+    paths = set()
+    for field in only:
+        parts = field.split(".")[:-1]
+        for depth in range(1, len(parts) + 1):
+            paths.add(tuple(parts[:depth]))
+
+    options = []
+    for path in sorted(paths):
+        #! deeper paths extend their parent's chain, so only emit the leaves
+        if any(other[:len(path)] == path and other != path for other in paths):
+            continue
+        owner, loader = cls, None
+        for key in path:
+            attr = getattr(owner, key)
+            loader = subqueryload(attr) if loader is None else loader.subqueryload(attr)
+            owner = expandable(owner)[key]
+        options.append(loader)
+    return options
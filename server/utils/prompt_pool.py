@@ -0,0 +1,163 @@
+"""
+Pre-generated Writecream prompts, keyed by mood context.
+
+Requests take an unseen prompt from the pool with one indexed query instead
+of a live API call. When a context runs low, a refill is queued on the
+prompt thread pool; refills spend the PROMPT_POOL_QUOTAS slice of the daily
+Writecream allowance and stop as soon as it is gone.
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import exists
+from sqlalchemy.exc import IntegrityError
+from config import app, db
+from models import PooledPrompt, SeenPrompt
+from utils import ai_prompts
+from utils.rate_limit import consume, PROMPT_POOL_QUOTAS
+
+POOL_TARGET = int(os.getenv("PROMPT_POOL_TARGET", 5))  #! unserved-ish prompts kept per context
+POOL_LOW_WATER = int(os.getenv("PROMPT_POOL_LOW_WATER", 2))
+POOL_MAX_SERVES = int(os.getenv("PROMPT_POOL_MAX_SERVES", 20))  #! a prompt retires after this many users
+POOL_TTL = timedelta(days=14)
+SEEN_TTL = timedelta(days=180)
+
+_refilling = set()
+_refilling_lock = threading.Lock()
+
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.strip().lower().encode()).hexdigest()
+
+
+def _servable(context, now):
+    return (
+        PooledPrompt.context == context,
+        PooledPrompt.created_at >= now - POOL_TTL,
+        PooledPrompt.served_count < POOL_MAX_SERVES,
+    )
+
+
+def take(user_id, context):
+    """
+    Serve the least-used pooled prompt this user hasn't seen, or None.
+    Queues a refill when the context is running low.
+    """
+    user_id = int(user_id)
+    now = datetime.now()
+    seen = exists().where(SeenPrompt.user_id == user_id, SeenPrompt.prompt_hash == PooledPrompt.prompt_hash)
+    pooled = (
+        PooledPrompt.query.filter(*_servable(context, now), ~seen)
+        .order_by(PooledPrompt.served_count, PooledPrompt.id)
+        .first()
+    )
+    if pooled is None:
+        request_refill(context)
+        return None
+
+    prompt, served = pooled.prompt, pooled.served_count + 1
+    db.session.execute(
+        db.update(PooledPrompt).where(PooledPrompt.id == pooled.id)
+        .values(served_count=PooledPrompt.served_count + 1)
+    )
+    db.session.add(SeenPrompt(user_id=user_id, prompt_hash=pooled.prompt_hash))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        #! the same user raced us for this prompt
+        db.session.rollback()
+        return None
+
+    if served >= POOL_MAX_SERVES or _remaining(context, now) < POOL_LOW_WATER:
+        request_refill(context)
+    return prompt
+
+
+def _remaining(context, now):
+    return PooledPrompt.query.filter(*_servable(context, now)).count()
+
+
+def add(context, prompt, seen_by=None):
+    """Pool a prompt for a context; `seen_by` marks it seen for that user"""
+    digest = prompt_hash(prompt)
+    try:
+        if not PooledPrompt.query.filter_by(context=context, prompt_hash=digest).count():
+            db.session.add(PooledPrompt(
+                context=context, prompt=prompt, prompt_hash=digest,
+                served_count=1 if seen_by is not None else 0,
+            ))
+        if seen_by is not None:
+            db.session.merge(SeenPrompt(user_id=int(seen_by), prompt_hash=digest, seen_at=datetime.now()))
+        db.session.commit()
+    except IntegrityError:
+        #! a concurrent refill pooled the same prompt first
+        db.session.rollback()
+        if seen_by is not None:
+            db.session.merge(SeenPrompt(user_id=int(seen_by), prompt_hash=digest, seen_at=datetime.now()))
+            db.session.commit()
+
+
+def request_refill(context):
+    """Queue a background refill unless this worker already has one running"""
+    with _refilling_lock:
+        if context in _refilling:
+            return
+        _refilling.add(context)
+    ai_prompts.background(_refill_and_release, context)
+
+
+def _refill_and_release(context):
+    try:
+        refill(context)
+    except Exception as e:
+        app.logger.error(f"Prompt pool refill failed for {context!r}: {str(e)}")
+        db.session.rollback()
+    finally:
+        with _refilling_lock:
+            _refilling.discard(context)
+
+
+def refill(context, target=None):
+    """
+    Top a context up to `target` servable prompts. Returns how many were
+    added; stops early on a spent quota or a failing API.
+    """
+    config = ai_prompts.writecream_config()
+    if config is None:
+        return 0
+    target = POOL_TARGET if target is None else target
+
+    evict()
+    added = 0
+    while _remaining(context, datetime.now()) < target and ai_prompts.writecream_available():
+        exhausted = consume(PROMPT_POOL_QUOTAS)
+        if exhausted:
+            app.logger.info(f"Prompt pool refill stopped: {exhausted.note}")
+            break
+        result = ai_prompts.fetch_prompt(ai_prompts.context_tool_input(context), config)
+        if ai_prompts.is_fallback(result):
+            break  #! the API is unhealthy or answered with junk
+        before = _remaining(context, datetime.now())
+        add(context, result["prompt"])
+        if _remaining(context, datetime.now()) == before:
+            break  #! API repeated itself, more calls would be wasted
+        added += 1
+    return added
+
+
+def evict(now=None):
+    """Drop stale or fully served prompts and old seen markers"""
+    now = now or datetime.now()
+    db.session.execute(db.delete(PooledPrompt).where(
+        (PooledPrompt.created_at < now - POOL_TTL) | (PooledPrompt.served_count >= POOL_MAX_SERVES)
+    ))
+    db.session.execute(db.delete(SeenPrompt).where(SeenPrompt.seen_at < now - SEEN_TTL))
+    db.session.commit()
+
+
+def known_contexts():
+    """Every context that has ever been pooled, plus the no-mood context"""
+    contexts = {row[0] for row in db.session.query(PooledPrompt.context).distinct()}
+    contexts.add("")
+    return sorted(contexts)
@@ -0,0 +1,65 @@
+import time
+from functools import wraps
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+        context._query_started = time.perf_counter()
+
+
+def _time_statement(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is not None and has_request_context():
+        g.query_seconds = g.get("query_seconds", 0.0) + time.perf_counter() - started
+
+
+def query_count():
+    """SQL statements issued so far by the current request"""
+    return g.get("query_count", 0)
+
+
+def query_time():
+    """Seconds the current request has spent executing SQL"""
+    return g.get("query_seconds", 0.0)
+
+
+def query_budget(limit):
+    """
+    Declare how many SQL statements a resource method may run.
+
+    Over-budget requests are logged; with QUERY_BUDGET_STRICT they turn into
+    a 500 so a test client fails loudly when a route regresses into N+1.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            g.query_budget = limit
+            return fn(*args, **kwargs)
+        wrapper.query_budget = limit  #! lets benchmarks.query_budgets find every budgeted route
+        return wrapper
+    return decorator
+
+
+def init_query_budget(app):
+    event.listen(Engine, "before_cursor_execute", _count_statement)
+    event.listen(Engine, "after_cursor_execute", _time_statement)
+
+    @app.after_request
+    def check_query_budget(response):
+        count = query_count()
+        budget = g.get("query_budget")
+        strict = app.config.get("QUERY_BUDGET_STRICT")
+
+        if budget is not None and count > budget:
+            app.logger.warning(f"Query budget exceeded on {request.method} {request.path}: {count} > {budget}")
+            if strict:
+                response = jsonify(error="Query budget exceeded", query_count=count, query_budget=budget)
+                response.status_code = 500
+
+        if strict:
+            response.headers["X-Query-Count"] = str(count)
+        return response
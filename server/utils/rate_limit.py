@@ -0,0 +1,94 @@
+import os
+import time
+from collections import namedtuple
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, RateLimitCounter
+
+DAY = 24 * 60 * 60
+
+Quota = namedtuple("Quota", "name limit window per_user note")
+
+#! Writecream allows 45 calls a day across the whole app
+AI_PROMPT_QUOTAS = (
+    Quota("writecream:burst", int(os.getenv("AI_BURST_LIMIT", 3)), int(os.getenv("AI_BURST_WINDOW", 60)), True,
+          "Using fallback prompt due to rate limit, try again in a minute"),
+    Quota("writecream:user", int(os.getenv("AI_USER_DAILY_LIMIT", 15)), DAY, True,
+          "Using fallback prompt due to your daily limit reached"),
+    Quota("writecream:global", int(os.getenv("AI_DAILY_LIMIT", 45)), DAY, False,
+          "Using fallback prompt due to daily limit reached"),
+)
+
+#! the prompt pool refiller gets its own slice of the global allowance,
+#! leaving the rest for live requests
+PROMPT_POOL_QUOTAS = (
+    Quota("writecream:pool", int(os.getenv("AI_POOL_DAILY_LIMIT", 25)), DAY, False,
+          "Prompt pool refill budget spent for today"),
+    AI_PROMPT_QUOTAS[-1],
+)
+
+
+def _insert_ignore(conn):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(RateLimitCounter).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(RateLimitCounter).on_conflict_do_nothing()
+    raise RuntimeError(f"Rate limiter does not support the {dialect} dialect")
+
+
+def _key(quota, user_id):
+    return f"{quota.name}:{user_id}" if quota.per_user else quota.name
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, quota):
+        super().__init__(quota.name)
+        self.quota = quota
+
+
+def consume(quotas, user_id=None, now=None):
+    """
+    Atomically take one unit from every quota, or from none of them.
+
+    Each quota is an INSERT ... ON CONFLICT DO NOTHING to create its window
+    row, then a conditional `count = count + 1 WHERE count < limit`. The
+    UPDATE takes a row lock, so concurrent workers serialize on it instead
+    of losing increments. Everything runs in one short transaction on its
+    own connection; if any quota is spent the transaction rolls back and
+    the earlier ones are refunded.
+
+    Returns None when allowed, otherwise the first exhausted Quota.
+    """
+    now = int(now if now is not None else time.time())
+    try:
+        with db.engine.begin() as conn:
+            for quota in quotas:
+                key = _key(quota, user_id)
+                window_start = now - now % quota.window
+                created = conn.execute(
+                    _insert_ignore(conn).values(
+                        key=key, window_start=window_start, count=0, expires_at=window_start + quota.window
+                    )
+                ).rowcount
+                if created:
+                    #! a new window started, sweep expired ones for this quota
+                    conn.execute(delete(RateLimitCounter).where(
+                        RateLimitCounter.key == key, RateLimitCounter.expires_at <= now
+                    ))
+
+                taken = conn.execute(
+                    update(RateLimitCounter)
+                    .where(
+                        RateLimitCounter.key == key,
+                        RateLimitCounter.window_start == window_start,
+                        RateLimitCounter.count < quota.limit,
+                    )
+                    .values(count=RateLimitCounter.count + 1)
+                ).rowcount
+                if not taken:
+                    raise QuotaExceeded(quota)
+    except QuotaExceeded as exceeded:
+        return exceeded.quota
+    return None
+
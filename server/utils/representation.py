@@ -0,0 +1,66 @@
+"""
+JSON representation for the Flask-RESTful Api: msgspec encoding plus
+gzip / brotli negotiated from Accept-Encoding.
+
+Bodies smaller than RESPONSE_COMPRESS_MIN_BYTES go out as is; compressing
+them costs more CPU than it saves on the wire. Brotli is used when the
+optional `brotli` package is installed and the client prefers it.
+"""
+import zlib
+from flask import current_app, make_response, request
+from utils.serializers import dumps
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - Brotli is pinned in requirements.txt; gzip still works without it
+    brotli = None
+
+GZIP_LEVEL = 1  #! most of the size win; higher levels cost 2-4x the CPU for 10-25% smaller bodies
+BROTLI_QUALITY = 4  #! brotli's fast dynamic-content range
+
+
+def _gzip(body):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  #! wbits 31: gzip container
+    return compressor.compress(body) + compressor.flush()
+
+
+def _brotli(body):
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+def choose_encoding(accept_encodings):
+    """Best of br / gzip the client accepts, or None"""
+    candidates = [("br", _brotli)] if brotli is not None else []
+    candidates.append(("gzip", _gzip))
+    best, best_quality = None, 0
+    for name, compress in candidates:
+        quality = accept_encodings[name]
+        if quality > best_quality:
+            best, best_quality = (name, compress), quality
+    return best
+
+
+def compress_response(response, body):
+    response.vary.add("Accept-Encoding")
+    if len(body) < current_app.config["RESPONSE_COMPRESS_MIN_BYTES"] or "Content-Encoding" in response.headers:
+        return response
+    choice = choose_encoding(request.accept_encodings)
+    if choice is None:
+        return response
+    name, compress = choice
+    response.set_data(compress(body))
+    response.headers["Content-Encoding"] = name
+    return response
+
+
+def output_json(data, code, headers=None):
+    body = dumps(data)
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    response.mimetype = "application/json"
+    return compress_response(response, body)
+
+
+def init_json_representation(app, api):
+    app.config.setdefault("RESPONSE_COMPRESS_MIN_BYTES", 1024)
+    api.representations["application/json"] = output_json
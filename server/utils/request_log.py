@@ -0,0 +1,121 @@
+"""
+Structured, sampled request logging that never blocks a request thread.
+
+Every log record (app.logger included) goes through a QueueHandler; one
+QueueListener thread formats and writes them. Each request produces at
+most one JSON line on the "luma.request" logger:
+
+    {"method": "GET", "path": "/api/journals", "status": 200, "ms": 4.2, ...}
+
+Errors (>= 500) and slow requests are always logged, the rest are sampled
+at REQUEST_LOG_SAMPLE_RATE. REQUEST_LOG_VERBOSE adds headers and JSON
+bodies, with cookies, tokens and passwords redacted.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, request
+from flask.logging import default_handler
+from utils.query_budget import query_count
+
+REDACTED = "[redacted]"
+REDACT_HEADERS = {"cookie", "set-cookie", "authorization", "x-csrf-token", "x-csrftoken"}
+REDACT_FIELDS = {"password", "password_hash", "token", "access_token", "refresh_token",
+                 "google_token", "google_refresh_token", "client_secret", "key", "api_key"}
+
+request_logger = logging.getLogger("luma.request")
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue the record untouched; formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        if isinstance(record.msg, dict):
+            return json.dumps({"ts": self.formatTime(record), **record.msg}, default=str)
+        return super().format(record)
+
+
+def redact_headers(headers):
+    return {
+        name: REDACTED if name.lower() in REDACT_HEADERS else value
+        for name, value in headers.items()
+    }
+
+
+def redact(data):
+    """Copy of a parsed JSON body with secret-looking fields masked"""
+    if isinstance(data, dict):
+        return {
+            key: REDACTED if str(key).lower() in REDACT_FIELDS else redact(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [redact(item) for item in data]
+    return data
+
+
+def _should_log(app, status, elapsed_ms):
+    if status >= 500 or elapsed_ms >= app.config["REQUEST_LOG_SLOW_MS"]:
+        return True
+    return random.random() < app.config["REQUEST_LOG_SAMPLE_RATE"]
+
+
+def init_request_logging(app):
+    app.config.setdefault("REQUEST_LOG_SAMPLE_RATE", 1.0)
+    app.config.setdefault("REQUEST_LOG_SLOW_MS", 1000)
+    app.config.setdefault("REQUEST_LOG_VERBOSE", False)
+
+    #! unbounded: a slow stdout must never push back on request threads
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(_JsonFormatter("[%(asctime)s] %(levelname)s in %(module)s: %(message)s"))
+    listener = QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queued = _DeferredQueueHandler(records)
+    app.logger.removeHandler(default_handler)
+    app.logger.addHandler(queued)
+    request_logger.addHandler(queued)
+    request_logger.setLevel(logging.INFO)
+    request_logger.propagate = False
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        started = g.get("request_started")
+        if started is None:
+            return response
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if not _should_log(app, response.status_code, elapsed_ms):
+            return response
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "ms": round(elapsed_ms, 1),
+            "queries": query_count(),
+            "ip": request.headers.get("X-Forwarded-For", request.remote_addr),
+        }
+        if app.config["REQUEST_LOG_VERBOSE"]:
+            record["headers"] = redact_headers(request.headers)
+            if request.is_json:
+                record["body"] = redact(request.get_json(silent=True))
+        request_logger.info(record)
+        return response
+
+    return listener
@@ -0,0 +1,274 @@
+"""
+Entry revision history: periodic snapshots plus compressed deltas.
+
+Saves never wait on this. After an entry write commits, `note_saved`
+queues the entry on one background thread, which records the entry's
+state at most once per REVISION_INTERVAL. The write that opens an
+interval also records the state it replaced (captured with `state`
+before the write), so the last text of the previous editing session is
+kept even when it is overwritten. Every SNAPSHOT_EVERY-th
+revision is a full snapshot, as is any revision whose delta would be more
+than half a snapshot's size. The rest are token-level deltas against the
+latest snapshot, so rebuilding any revision reads at most two rows.
+
+Retention thins old history: everything from the last day, then one per
+hour for a month, then one per day, and never more than MAX_REVISIONS
+per entry.
+"""
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+from sqlalchemy.orm import defer
+from config import app, db
+from models import Entry, EntryRevision, Journal
+
+REVISION_INTERVAL = timedelta(seconds=int(os.getenv("REVISION_INTERVAL_SECONDS", 300)))
+SNAPSHOT_EVERY = 20
+MAX_REVISIONS = int(os.getenv("REVISION_MAX_PER_ENTRY", 200))
+#! (younger than, keep one per) - checked in order; None spacing keeps everything
+RETENTION = (
+    (timedelta(days=1), None),
+    (timedelta(days=30), timedelta(hours=1)),
+    (None, timedelta(days=1)),
+)
+
+#! tags, whitespace runs, word runs, single other characters: joins back to the exact text
+_TOKEN = re.compile(r"<[^>]*>|\s+|\w+|[^\w\s]")
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="revisions")
+_pending = set()
+_queued_at = {}
+_lock = threading.Lock()
+
+
+#! Encoding
+
+def _tokens(text):
+    return _TOKEN.findall(text or "")
+
+
+def make_delta(base, text):
+    """Ops turning `base` into `text`: [i, j] copies base tokens i..j, a string is inserted"""
+    a, b = _tokens(base), _tokens(text)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j1 != j2:
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def apply_delta(base, ops):
+    a = _tokens(base)
+    return "".join(op if isinstance(op, str) else "".join(a[op[0]:op[1]]) for op in ops)
+
+
+def _pack_text(text):
+    return zlib.compress((text or "").encode("utf-8"))
+
+
+def _pack_ops(ops):
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(data):
+    return zlib.decompress(data).decode("utf-8")
+
+
+def _encode(text, snapshot):
+    """(base_version, data) for `text`: a delta on `snapshot` (version, text) if that's small enough"""
+    full = _pack_text(text)
+    if snapshot is not None:
+        delta = _pack_ops(make_delta(snapshot[1], text))
+        if len(delta) * 2 <= len(full):
+            return snapshot[0], delta
+    return None, full
+
+
+#! Reading
+
+def list_revisions(entry_id, limit, before=None):
+    """Newest first, without loading any bodies"""
+    query = (
+        EntryRevision.query.options(defer(EntryRevision.data))
+        .filter(EntryRevision.entry_id == entry_id)
+    )
+    if before is not None:
+        query = query.filter(EntryRevision.version < before)
+    return query.order_by(EntryRevision.version.desc()).limit(limit).all()
+
+
+def load(entry_id, version):
+    """(revision, main_text) for one version, or (None, None)"""
+    revision = EntryRevision.query.filter_by(entry_id=entry_id, version=version).first()
+    if revision is None:
+        return None, None
+    if revision.is_snapshot:
+        return revision, _unpack(revision.data)
+    base = EntryRevision.query.filter_by(entry_id=entry_id, version=revision.base_version).first()
+    return revision, apply_delta(_unpack(base.data), json.loads(_unpack(revision.data)))
+
+
+#! Writing
+
+def state(entry):
+    """(version, title, main_text) of a loaded entry; take it before changing the entry"""
+    return entry.version, entry.title, entry.main_text
+
+
+def record(entry_id, now=None, before=None):
+    """
+    Store the entry's current state unless the newest revision is recent or
+    current. `before` is the entry's `state` ahead of the write that queued
+    this; it is stored first when history doesn't have it yet.
+    Returns the newest stored revision, or None.
+    """
+    now = now or datetime.now()
+    entry = db.session.get(Entry, entry_id)
+    if entry is None:
+        return None
+
+    history = (
+        db.session.query(EntryRevision.version, EntryRevision.base_version, EntryRevision.created_at)
+        .filter(EntryRevision.entry_id == entry_id)
+        .order_by(EntryRevision.version.desc())
+        .limit(SNAPSHOT_EVERY)
+        .all()
+    )
+    if history and (history[0].version >= entry.version or now - history[0].created_at < REVISION_INTERVAL):
+        return None
+
+    snapshot = None
+    snapshot_version = next((row.version for row in history if row.base_version is None), None)
+    if snapshot_version is not None:
+        row = EntryRevision.query.filter_by(entry_id=entry_id, version=snapshot_version).first()
+        snapshot = (snapshot_version, _unpack(row.data))
+
+    states = [state(entry)]
+    #! the text being replaced; skipped when history already ends at it
+    if before is not None and before[0] < entry.version and (not history or before[0] > history[0].version):
+        states.insert(0, before)
+
+    for version, title, main_text in states:
+        base_version, data = _encode(main_text, snapshot)
+        revision = EntryRevision(
+            entry_id=entry_id, version=version, base_version=base_version, title=title,
+            data=data, text_length=len(main_text or ""), created_at=now,
+        )
+        db.session.add(revision)
+        if base_version is None:
+            snapshot = (version, main_text)
+    db.session.flush()
+    return revision
+
+
+def _keep(rows, now):
+    """Versions that survive RETENTION and MAX_REVISIONS; rows are newest first"""
+    keep, buckets = [], set()
+    for row in rows:
+        age = now - row.created_at
+        spacing = next(spacing for max_age, spacing in RETENTION if max_age is None or age < max_age)
+        if spacing is not None:
+            bucket = (spacing, int(row.created_at.timestamp() // spacing.total_seconds()))
+            if bucket in buckets:
+                continue
+            buckets.add(bucket)
+        keep.append(row.version)
+    return set(keep[:MAX_REVISIONS])
+
+
+def prune(entry_id, now=None):
+    """Apply retention to one entry; deltas that lose their snapshot are re-based. Returns rows removed."""
+    now = now or datetime.now()
+    rows = (
+        EntryRevision.query.filter_by(entry_id=entry_id)
+        .order_by(EntryRevision.version.desc())
+        .all()
+    )
+    keep = _keep(rows, now)
+    if len(keep) == len(rows):
+        return 0
+
+    by_version = {row.version: row for row in rows}
+    old_texts = {}
+    rebased = {}  #! dropped snapshot version -> (new snapshot version, text)
+    for row in reversed(rows):
+        if row.version not in keep or row.is_snapshot or row.base_version in keep:
+            continue
+        old_base = row.base_version
+        if old_base not in old_texts:
+            old_texts[old_base] = _unpack(by_version[old_base].data)
+        text = apply_delta(old_texts[old_base], json.loads(_unpack(row.data)))
+        row.base_version, row.data = _encode(text, rebased.get(old_base))
+        if row.base_version is None:
+            rebased[old_base] = (row.version, text)
+
+    for row in rows:
+        if row.version not in keep:
+            db.session.delete(row)
+    db.session.flush()
+    return len(rows) - len(keep)
+
+
+def prune_all(now=None):
+    """Retention pass over every entry with history, e.g. from cron"""
+    removed = 0
+    for (entry_id,) in db.session.query(EntryRevision.entry_id).distinct().all():
+        removed += prune(entry_id, now)
+        db.session.commit()
+    return removed
+
+
+#! Hot path hook
+
+def _record_in_background(entry_id, before):
+    with app.app_context():
+        try:
+            if record(entry_id, before=before) is not None:
+                prune(entry_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Recording revision for entry {entry_id} failed: {e}")
+        finally:
+            with _lock:
+                _pending.discard(entry_id)
+
+
+def note_saved(entry_id, before=None):
+    """
+    Call after an entry write commits, with the entry's `state` from before
+    the write; queues a revision at most once per interval and returns at once
+    """
+    now = time.monotonic()
+    with _lock:
+        if entry_id in _pending or now - _queued_at.get(entry_id, -1e9) < REVISION_INTERVAL.total_seconds():
+            return
+        if len(_queued_at) > 10000:
+            _queued_at.clear()
+        _pending.add(entry_id)
+        _queued_at[entry_id] = now
+    _executor.submit(_record_in_background, entry_id, before)
+
+
+#! Cleanup: call before the entries are deleted
+
+def remove_entry(entry_id):
+    db.session.execute(db.delete(EntryRevision).where(EntryRevision.entry_id == entry_id))
+
+
+def remove_journal(journal_id):
+    entry_ids = db.select(Entry.id).where(Entry.journal_id == journal_id)
+    db.session.execute(db.delete(EntryRevision).where(EntryRevision.entry_id.in_(entry_ids)))
+
+
+def remove_user(user_id):
+    entry_ids = db.select(Entry.id).join(Journal).where(Journal.user_id == user_id)
+    db.session.execute(db.delete(EntryRevision).where(EntryRevision.entry_id.in_(entry_ids)))
@@ -0,0 +1,216 @@
+"""
+Full-text search over entry titles and bodies.
+
+SQLite uses an FTS5 table (rowid = entry id); PostgreSQL a plain table
+with a weighted tsvector and a GIN index. Either way the index is a side
+table kept in sync by EntryResource / JournalResource / DeleteUser, the
+same way user_activity and mood_daily_rollups are.
+
+Bodies are Quill HTML; tags are stripped before indexing. Highlights come
+back HTML-escaped with matches wrapped in <mark>.
+"""
+import html
+import re
+from sqlalchemy import bindparam, text
+from config import db
+from models import Entry, EntryMood, Journal
+from utils.pagination import PaginationError, parse_limit
+
+MARK_START, MARK_END = "\x02", "\x03"  #! can't occur in stripped entry text
+SNIPPET_WORDS = 24
+
+DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS entry_search USING fts5("
+        "title, body, tokenize='porter unicode61 remove_diacritics 2')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS entry_search ("
+        "entry_id INTEGER PRIMARY KEY REFERENCES entries(id) ON DELETE CASCADE, "
+        "title TEXT NOT NULL, body TEXT NOT NULL, document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_entry_search_document ON entry_search USING GIN (document)",
+    ],
+}
+
+_TAG = re.compile(r"<[^>]+>")
+_BLOCK_END = re.compile(r"</(p|div|li|h[1-6])>|<br\s*/?>", re.IGNORECASE)
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def ensure_index():
+    """Create the search table for the configured backend if it's missing"""
+    statements = DDL.get(_dialect())
+    if statements is None:
+        return
+    with db.engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+
+
+def plain_text(markup):
+    """Quill HTML -> searchable text"""
+    if not markup:
+        return ""
+    return html.unescape(_TAG.sub("", _BLOCK_END.sub(" ", markup))).strip()
+
+
+#! Index maintenance: call after the entry change is flushed
+
+def index_entry(entry):
+    index_entries([entry])
+
+
+def index_entries(entries):
+    """index_entry for many entries at once (bulk import): one executemany per statement"""
+    params = [{"id": entry.id, "title": entry.title or "", "body": plain_text(entry.main_text)} for entry in entries]
+    if not params:
+        return
+    if _dialect() == "postgresql":
+        db.session.execute(text(
+            "INSERT INTO entry_search (entry_id, title, body, document) VALUES (:id, :title, :body, "
+            "setweight(to_tsvector('english', :title), 'A') || setweight(to_tsvector('english', :body), 'B')) "
+            "ON CONFLICT (entry_id) DO UPDATE SET title = excluded.title, body = excluded.body, "
+            "document = excluded.document"
+        ), params)
+    else:
+        db.session.execute(text("DELETE FROM entry_search WHERE rowid = :id"), params)
+        db.session.execute(text("INSERT INTO entry_search (rowid, title, body) VALUES (:id, :title, :body)"), params)
+
+
+def _remove_where(entry_ids_sql, params):
+    key = "entry_id" if _dialect() == "postgresql" else "rowid"
+    db.session.execute(text(f"DELETE FROM entry_search WHERE {key} IN ({entry_ids_sql})"), params)
+
+
+def remove_entry(entry_id):
+    _remove_where(":id", {"id": entry_id})
+
+
+def remove_journal(journal_id):
+    """Call before the journal (and its entries) are deleted"""
+    _remove_where("SELECT id FROM entries WHERE journal_id = :journal_id", {"journal_id": journal_id})
+
+
+def remove_user(user_id):
+    """Call before the user's journals are deleted"""
+    _remove_where(
+        "SELECT entries.id FROM entries JOIN journals ON journals.id = entries.journal_id "
+        "WHERE journals.user_id = :user_id",
+        {"user_id": user_id},
+    )
+
+
+def rebuild(user_id=None):
+    """Re-index every entry (or one user's), e.g. after enabling search"""
+    query = Entry.query.join(Journal)
+    if user_id is not None:
+        remove_user(user_id)
+        query = query.filter(Journal.user_id == user_id)
+    else:
+        db.session.execute(text("DELETE FROM entry_search"))
+    count = 0
+    for entry in query.yield_per(500):
+        index_entry(entry)
+        count += 1
+    return count
+
+
+#! Querying
+
+def _fts5_query(q):
+    """
+    Quote every word so user input can't hit FTS5 syntax errors;
+    the last word is a prefix match so results appear while typing.
+    """
+    words = _WORD.findall(q)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _highlight(fragment):
+    return html.escape(fragment or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def _filters(args, params):
+    sql = ["journals.user_id = :user_id"]
+    journal_id = args.get("journal_id")
+    if journal_id:
+        try:
+            params["journal_id"] = int(journal_id)
+        except ValueError:
+            raise PaginationError("journal_id must be an integer")
+        sql.append("entries.journal_id = :journal_id")
+
+    mood_ids = args.getlist("mood_id")
+    if mood_ids:
+        try:
+            params["mood_ids"] = [int(m) for m in mood_ids]
+        except ValueError:
+            raise PaginationError("mood_id must be an integer")
+        sql.append(
+            f"EXISTS (SELECT 1 FROM {EntryMood.__tablename__} em "
+            "WHERE em.entry_id = entries.id AND em.mood_id IN :mood_ids)"
+        )
+    return " AND ".join(sql)
+
+
+def search(user_id, q, args):
+    """
+    Ranked hits for `q` in the user's entries, filtered by ?journal_id= and
+    repeated ?mood_id=, paged with ?limit= / ?offset=.
+    Returns (hits, next_offset) where each hit is {entry_id, rank, title, snippet}.
+    """
+    limit = parse_limit(args.get("limit"))
+    try:
+        offset = max(int(args.get("offset", 0)), 0)
+    except ValueError:
+        raise PaginationError("offset must be an integer")
+
+    params = {"user_id": int(user_id), "limit": limit + 1, "offset": offset}
+    where = _filters(args, params)
+
+    if _dialect() == "postgresql":
+        params["q"] = q
+        sql = (
+            "SELECT s.entry_id, ts_rank_cd(s.document, query) AS rank, "
+            f"ts_headline('english', s.title, query, 'HighlightAll=true, StartSel={MARK_START}, StopSel={MARK_END}') AS title, "
+            f"ts_headline('english', s.body, query, 'MaxFragments=1, MaxWords={SNIPPET_WORDS}, MinWords=8, "
+            f"StartSel={MARK_START}, StopSel={MARK_END}') AS snippet "
+            "FROM entry_search s, websearch_to_tsquery('english', :q) AS query, entries, journals "
+            "WHERE s.document @@ query AND entries.id = s.entry_id AND journals.id = entries.journal_id "
+            f"AND {where} ORDER BY rank DESC, s.entry_id DESC LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params["q"] = _fts5_query(q)
+        if params["q"] is None:
+            return [], None
+        #! bm25 is lower-is-better; titles weigh 4x the body
+        sql = (
+            "SELECT entry_search.rowid AS entry_id, -bm25(entry_search, 4.0, 1.0) AS rank, "
+            f"highlight(entry_search, 0, '{MARK_START}', '{MARK_END}') AS title, "
+            f"snippet(entry_search, 1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_WORDS}) AS snippet "
+            "FROM entry_search JOIN entries ON entries.id = entry_search.rowid "
+            "JOIN journals ON journals.id = entries.journal_id "
+            f"WHERE entry_search MATCH :q AND {where} "
+            "ORDER BY bm25(entry_search, 4.0, 1.0), entry_search.rowid DESC LIMIT :limit OFFSET :offset"
+        )
+
+    statement = text(sql)
+    if "mood_ids" in params:
+        statement = statement.bindparams(bindparam("mood_ids", expanding=True))
+    rows = db.session.execute(statement, params).all()
+
+    next_offset = offset + limit if len(rows) > limit else None
+    hits = [
+        {"entry_id": row.entry_id, "rank": float(row.rank),
+         "title": _highlight(row.title), "snippet": _highlight(row.snippet)}
+        for row in rows[:limit]
+    ]
+    return hits, next_offset
@@ -0,0 +1,184 @@
+import json
+import time as _time
+from datetime import datetime, date, time
+from decimal import Decimal
+from sqlalchemy import inspect as sql_inspect
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy_serializer.lib.schema import Schema
+
+try:
+    import msgspec
+    _encode_json = msgspec.json.encode
+except ImportError:  # pragma: no cover - msgspec is pinned in requirements.txt
+    msgspec = None
+
+    def _encode_json(data):
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+#! (model class, only, rules) -> compiled plan, built once per process
+_PLANS = {}
+
+#! optional callback(seconds) fed the time of each to_dict(), see utils.metrics
+_timer = None
+
+_COLUMN = 0
+_MANY = 1
+_ONE = 2
+_OTHER = 3
+
+
+class _Formats:
+    def __init__(self, cls):
+        self.date = cls.date_format
+        self.datetime = cls.datetime_format
+        self.time = cls.time_format
+        self.decimal = cls.decimal_format
+
+    def converter_for(self, python_type):
+        """Pick the value converter for a column once, at compile time"""
+        if python_type is None or python_type in (int, str, float, bool):
+            return None
+        if issubclass(python_type, datetime):
+            fmt = self.datetime
+            return lambda v: None if v is None else v.strftime(fmt)
+        if issubclass(python_type, time):
+            fmt = self.time
+            return lambda v: None if v is None else v.strftime(fmt)
+        if issubclass(python_type, date):
+            fmt = self.date
+            return lambda v: None if v is None else v.strftime(fmt)
+        if issubclass(python_type, Decimal):
+            fmt = self.decimal
+            return lambda v: None if v is None else fmt.format(v)
+        return self.convert
+
+    def convert(self, value):
+        """Runtime fallback for values whose type isn't known up front"""
+        if isinstance(value, (int, str, float, bool, type(None))):
+            return value
+        if isinstance(value, time):
+            return value.strftime(self.time)
+        if isinstance(value, datetime):
+            return value.strftime(self.datetime)
+        if isinstance(value, date):
+            return value.strftime(self.date)
+        if isinstance(value, Decimal):
+            return self.decimal.format(value)
+        if isinstance(value, bytes):
+            return value.decode()
+        if isinstance(value, (list, tuple, set)):
+            return [self.convert(v) for v in value]
+        return str(value)
+
+
+def _python_type(column_attr):
+    try:
+        return column_attr.columns[0].type.python_type
+    except (NotImplementedError, AttributeError, IndexError):
+        return None
+
+
+def _compile(cls, schema, formats):
+    """
+    Walk the serializer schema exactly like SerializerMixin.serialize_model
+    does, but once per class instead of once per row, and record the result
+    as a flat list of (key, kind, converter-or-child-plan) steps.
+    """
+    if not issubclass(cls, SerializerMixin):
+        raise TypeError(f"{cls.__name__} does not use SerializerMixin")
+
+    schema.update(only=cls.serialize_only, extend=cls.serialize_rules)
+
+    mapper = sql_inspect(cls)
+    keys = set(schema.keys)
+    if schema.is_greedy:
+        keys.update(a.key for a in mapper.attrs)
+
+    #! keep mapper order so output is stable, then any extra rule-only keys
+    ordered = [a.key for a in mapper.attrs if a.key in keys]
+    ordered += sorted(keys.difference(ordered))
+
+    steps = []
+    for key in ordered:
+        if not schema.is_included(key=key):
+            continue
+        if key in mapper.relationships:
+            rel = mapper.relationships[key]
+            child = _compile(rel.mapper.class_, schema.fork(key=key), formats)
+            steps.append((key, _MANY if rel.uselist else _ONE, child))
+        elif key in mapper.column_attrs:
+            steps.append((key, _COLUMN, formats.converter_for(_python_type(mapper.column_attrs[key]))))
+        else:
+            steps.append((key, _OTHER, formats.convert))
+    return tuple(steps)
+
+
+def _run(steps, obj):
+    out = {}
+    for key, kind, arg in steps:
+        value = getattr(obj, key)
+        if kind == _COLUMN:
+            out[key] = value if arg is None else arg(value)
+        elif kind == _MANY:
+            out[key] = [_run(arg, child) for child in value]
+        elif kind == _ONE:
+            out[key] = None if value is None else _run(arg, value)
+        else:
+            if callable(value):
+                value = value()
+            out[key] = arg(value)
+    return out
+
+
+def get_plan(cls, only=(), rules=()):
+    cache_key = (cls, tuple(only), tuple(rules))
+    plan = _PLANS.get(cache_key)
+    if plan is None:
+        schema = Schema()
+        schema.update(only=only, extend=rules)
+        plan = _compile(cls, schema, _Formats(cls))
+        _PLANS[cache_key] = plan
+    return plan
+
+
+def serialize(obj, only=(), rules=()):
+    """Same output as obj.to_dict(only=..., rules=...) from SerializerMixin"""
+    return _run(get_plan(type(obj), only, rules), obj)
+
+
+def serialize_many(objs, only=(), rules=()):
+    objs = list(objs)
+    if not objs:
+        return []
+    steps = get_plan(type(objs[0]), only, rules)
+    return [_run(steps, obj) for obj in objs]
+
+
+def set_timer(callback):
+    global _timer
+    _timer = callback
+
+
+def dumps(data):
+    """Encode already-serialized data straight to JSON bytes"""
+    return _encode_json(data)
+
+
+class CompiledSerializerMixin(SerializerMixin):
+    """
+    Drop-in SerializerMixin whose to_dict() runs a cached field plan.
+    Custom formats / tzinfo / serialize_types still go through the mixin.
+    """
+
+    def to_dict(self, only=(), rules=(), **kwargs):
+        cls = type(self)
+        if (any(v is not None for v in kwargs.values()) or cls.serialize_types
+                or cls.get_tzinfo is not SerializerMixin.get_tzinfo):
+            return SerializerMixin.to_dict(self, only=only, rules=rules, **kwargs)
+        if _timer is None:
+            return _run(get_plan(cls, only, rules), self)
+        started = _time.perf_counter()
+        try:
+            return _run(get_plan(cls, only, rules), self)
+        finally:
+            _timer(_time.perf_counter() - started)
@@ -0,0 +1,164 @@
+"""
+Serve the Vite build (client/dist) in front of Flask.
+
+A WSGI middleware answers GET/HEAD for built files before the request
+reaches Flask, so no before/after_request hooks run for assets. It:
+
+- serves a precompressed .br / .gz sibling when the client accepts it
+  (write them at deploy time with `flask compress-static`)
+- sends fingerprinted files (assets/name-<hash>.js) as immutable for a
+  year, everything else as no-cache with an ETag
+- hands the open file to the server's wsgi.file_wrapper, which gunicorn
+  turns into sendfile()
+- falls back to index.html for extensionless SPA routes
+
+/api/*, /metrics, "/" and anything not in the build go to Flask as before.
+The build is indexed once at startup; redeploys restart the workers.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from werkzeug.http import http_date, parse_accept_header, parse_etags, quote_etag
+from werkzeug.wsgi import wrap_file
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - Brotli is pinned in requirements.txt
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+#! Vite's default asset names: assets/<name>-<8+ char hash>.<ext>
+_FINGERPRINTED = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+_PASS_THROUGH = ("/api/", "/metrics")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE = re.compile(r"^(text/|application/(javascript|json|xml|manifest\+json|wasm)|image/svg\+xml)")
+MIN_COMPRESS_BYTES = 1024
+
+
+class Asset:
+    __slots__ = ("path", "content_type", "cache_control", "variants")
+
+    def __init__(self, root, relative):
+        self.path = os.path.join(root, relative)
+        content_type, _ = mimetypes.guess_type(relative)
+        self.content_type = content_type or "application/octet-stream"
+        if self.content_type.startswith("text/") or self.content_type == "application/javascript":
+            self.content_type += "; charset=utf-8"
+        self.cache_control = IMMUTABLE if _FINGERPRINTED.match(relative) else REVALIDATE
+        #! encoding -> (file path, size, etag, mtime); None is the identity file
+        self.variants = {}
+        for encoding, suffix in ((None, ""),) + ENCODINGS:
+            stat = _stat(self.path + suffix)
+            if stat is not None:
+                etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}" + (f"-{encoding}" if encoding else "")
+                self.variants[encoding] = (self.path + suffix, stat.st_size, etag, stat.st_mtime)
+
+    def pick(self, accept_encoding):
+        """Best precompressed variant the client accepts (br before gzip), or None for identity"""
+        accepted = parse_accept_header(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accepted[encoding] > 0:
+                return encoding
+        return None
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat if os.path.isfile(path) else None
+
+
+def index_build(root):
+    """URL path -> Asset for every file in the build (compressed siblings folded in)"""
+    assets = {}
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(suffixes):
+                continue
+            relative = os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/")
+            assets["/" + relative] = Asset(root, relative)
+    return assets
+
+
+class StaticAssets:
+    def __init__(self, wsgi_app, root):
+        self.wsgi_app = wsgi_app
+        self.assets = index_build(root) if os.path.isdir(root) else {}
+        self.index = self.assets.get("/index.html")
+
+    def _lookup(self, path):
+        if path == "/" or path.startswith(_PASS_THROUGH):
+            return None
+        asset = self.assets.get(path)
+        if asset is None and "." not in path.rsplit("/", 1)[-1]:
+            return self.index  #! client-side route
+        return asset
+
+    def __call__(self, environ, start_response):
+        if environ["REQUEST_METHOD"] not in ("GET", "HEAD"):
+            return self.wsgi_app(environ, start_response)
+        asset = self._lookup(environ.get("PATH_INFO", ""))
+        if asset is None:
+            return self.wsgi_app(environ, start_response)
+        return self._send(asset, environ, start_response)
+
+    def _send(self, asset, environ, start_response):
+        encoding = asset.pick(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        path, size, etag, mtime = asset.variants[encoding]
+        headers = [
+            ("Content-Type", asset.content_type),
+            ("Cache-Control", asset.cache_control),
+            ("ETag", quote_etag(etag)),
+            ("Last-Modified", http_date(mtime)),
+        ]
+        if len(asset.variants) > 1:
+            headers.append(("Vary", "Accept-Encoding"))
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+
+        if parse_etags(environ.get("HTTP_IF_NONE_MATCH")).contains(etag):
+            start_response("304 Not Modified", headers)
+            return []
+
+        if environ["REQUEST_METHOD"] == "HEAD":
+            body = []
+        else:
+            try:
+                body = wrap_file(environ, open(path, "rb"))  #! gunicorn's file_wrapper uses sendfile()
+            except OSError:
+                return self.wsgi_app(environ, start_response)  #! removed since startup
+        headers.append(("Content-Length", str(size)))
+        start_response("200 OK", headers)
+        return body
+
+
+def init_static_assets(app):
+    app.wsgi_app = StaticAssets(app.wsgi_app, app.static_folder)
+
+
+#! Deploy step
+
+def compress_build(root):
+    """Write .gz (and .br when available) next to every compressible file; returns files written"""
+    written = 0
+    for asset in index_build(root).values():
+        if not COMPRESSIBLE.match(asset.content_type):
+            continue
+        with open(asset.path, "rb") as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_BYTES:
+            continue
+        outputs = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            outputs.append((".br", brotli.compress(data, quality=11)))
+        for suffix, compressed in outputs:
+            if len(compressed) < len(data):
+                with open(asset.path + suffix, "wb") as f:
+                    f.write(compressed)
+                written += 1
+    return written
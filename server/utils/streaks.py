@@ -0,0 +1,58 @@
+from datetime import date
+from sqlalchemy import Date, cast, func, literal, select
+
+_EPOCH = date(1970, 1, 1)
+
+
+def day_number(expr, dialect_name):
+    """Map a date to a consecutive integer-valued day number, per backend"""
+    if dialect_name == "sqlite":
+        return func.julianday(expr)
+    #! PostgreSQL: date - date is an integer number of days
+    return cast(expr, Date) - literal(_EPOCH, Date)
+
+
+def compute_streaks(session, days):
+    """
+    Gaps-and-islands over a selectable of distinct days (column "day").
+
+    Consecutive days share the same `day_number - row_number()`, so grouping
+    on that difference yields one row per run. Only the most recent run and
+    the longest length come back to Python, whatever the history size.
+    Returns {"longest_streak", "current_run", "last_active_date"}.
+    """
+    days = days.subquery("days")
+    dialect_name = session.get_bind().dialect.name
+
+    islands = select(
+        days.c.day.label("day"),
+        (day_number(days.c.day, dialect_name) - func.row_number().over(order_by=days.c.day)).label("island"),
+    ).subquery("islands")
+
+    runs = (
+        select(func.count().label("length"), func.max(islands.c.day).label("last_day"))
+        .group_by(islands.c.island)
+        .subquery("runs")
+    )
+
+    longest = select(func.max(runs.c.length)).scalar_subquery()
+    row = session.execute(
+        select(runs.c.length, runs.c.last_day, longest.label("longest"))
+        .order_by(runs.c.last_day.desc())
+        .limit(1)
+    ).first()
+
+    if row is None:
+        return {"longest_streak": 0, "current_run": 0, "last_active_date": None}
+    return {
+        "longest_streak": row.longest,
+        "current_run": row.length,
+        "last_active_date": as_date(row.last_day),
+    }
+
+
+def as_date(value):
+    """SQLite hands dates back as strings, PostgreSQL as date objects"""
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
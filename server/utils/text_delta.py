@@ -0,0 +1,65 @@
+"""
+Apply retain/delete/insert deltas to a stored string.
+
+A delta is a list of ops walked left to right over the base text:
+
+    [{"retain": 120}, {"delete": 4}, {"insert": "river"}]
+
+The base is the entry's stored main_text, HTML markup included, exactly
+as the server last returned it. These are string edits, not Quill
+document deltas: Quill's offsets count its plain-text document and would
+land inside tags here. The client diffs the HTML it last saved against
+the editor's current HTML (client/src/services/textDelta.js).
+
+Offsets and lengths count UTF-16 code units, the way JavaScript strings
+measure text. Text after the last op is kept as is.
+"""
+
+MAX_OPS = 1000
+
+
+class DeltaError(ValueError):
+    pass
+
+
+def _count(op, key):
+    value = op[key]
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise DeltaError(f"{key} must be a positive integer")
+    return value * 2
+
+
+def apply_delta(text, ops):
+    """Return `text` with `ops` applied; raises DeltaError on a malformed or out-of-range delta"""
+    if not isinstance(ops, list) or not ops:
+        raise DeltaError("ops must be a non-empty list")
+    if len(ops) > MAX_OPS:
+        raise DeltaError(f"A delta can have at most {MAX_OPS} ops")
+
+    #! work on UTF-16 bytes so offsets match the client's string indices
+    base = (text or "").encode("utf-16-le")
+    out = []
+    cursor = 0
+    for op in ops:
+        if not isinstance(op, dict) or len(op) != 1:
+            raise DeltaError("Each op must be exactly one of retain, delete or insert")
+        if "insert" in op:
+            if not isinstance(op["insert"], str):
+                raise DeltaError("insert must be a string")
+            out.append(op["insert"].encode("utf-16-le", "surrogatepass"))
+        elif "retain" in op or "delete" in op:
+            key = "retain" if "retain" in op else "delete"
+            end = cursor + _count(op, key)
+            if end > len(base):
+                raise DeltaError(f"{key} runs past the end of the text")
+            if key == "retain":
+                out.append(base[cursor:end])
+            cursor = end
+        else:
+            raise DeltaError("Each op must be exactly one of retain, delete or insert")
+    out.append(base[cursor:])
+
+    try:
+        return b"".join(out).decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise DeltaError("Delta splits a surrogate pair")
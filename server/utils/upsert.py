@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from config import db
+
+
+def insert(model):
+    """
+    INSERT for `model` with on_conflict_do_nothing() / on_conflict_do_update(),
+    for counters that concurrent requests may create at the same time
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise RuntimeError(f"Upserts are not supported on the {dialect} dialect")